@@ -10,7 +10,7 @@ import re
 from collections import OrderedDict
 from string import maketrans
 import yaml
-from pygame_maker.logic.language_engine import SymbolTable, LanguageEngine
+from pygame_maker.logic.language_engine import LanguageEngine
 
 __all__ = ["Action", "AccountingAction", "CodeAction", "DrawAction",
            "GameAction", "InfoAction", "MotionAction", "ObjectAction",
@@ -398,49 +398,31 @@ common_parameters:
         """
         Calculate the value inside a field.
 
-        Given a field name possibly containing an expression, register the
-        expression with the language engine and execute the code, and
-        return the result.  Use the spreadsheet formula scheme to indicate
+        Given a field name possibly containing an expression, compile the
+        expression with the language engine the first time it's needed, and
+        return its value.  Use the spreadsheet formula scheme to indicate
         an expression to execute: first char is '='.
 
         :param field_name: The field containing the expression
         :type field_name: str
-        :param symbols: The symbols available to the code block
+        :param symbols: The symbols available to the expression
         :type symbols: SymbolTable
         :param language_engine: The language engine instance
         :type language_engine: LanguageEngine
         :return: The result from the expression
         :rtype: varies by symbol
         """
-        # print("{}: get expression for field {}: {}".format(self, field_name,
-        #    self.action_data[field_name]))
-        if (not isinstance(self.action_data[field_name], str) or
-                (not self.action_data[field_name]) or
-                (self.action_data[field_name][0] != '=')):
+        field_value = self.action_data[field_name]
+        if (not isinstance(field_value, str) or (not field_value) or
+                (field_value[0] != '=')):
             # not an expression, so just return the contents of the field
-            return self.action_data[field_name]
-        exp_name = "{}_block".format(field_name)
-        # print("check for code block {}".format(exp_name))
-        # create a hopefully unique symbol to store the expression result in
-        sym_name = "intern_{}_{}".format(field_name, abs(hash(field_name)))
-        # print("sym_name: {}".format(sym_name))
-        if exp_name not in list(self.runtime_data.keys()):
-            # create an entry in the action data that points to a
-            #  hopefully unique name that will be registered with the language
-            #  engine
-            exp_id = "{}_{}_{}".format(self.name,
-                                       re.sub(r"\.", "_", field_name), id(self))
-            expression_code = "{} = {}".format(sym_name,
-                                               self.action_data[field_name][1:])
-            # print("register new code block {}: {}".format(exp_id, expression_code))
-            language_engine.register_code_block(exp_id, expression_code)
-            self.runtime_data[exp_name] = exp_id
-        # execute the expression and collect its result
-        local_symbols = SymbolTable(symbols)
-        language_engine.execute_code_block(self.runtime_data[exp_name],
-                                           local_symbols)
-        # print("{} = {}".format(sym_name, local_symbols[sym_name]))
-        return local_symbols[sym_name]
+            return field_value
+        exp_name = "{}_expression".format(field_name)
+        evaluate = self.runtime_data.get(exp_name)
+        if evaluate is None:
+            evaluate = language_engine.get_expression(field_value[1:])
+            self.runtime_data[exp_name] = evaluate
+        return evaluate(symbols, language_engine.global_symbol_table)
 
     def to_yaml(self, indent=0):
         """
@@ -0,0 +1,191 @@
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Pygame maker instance hierarchy module, for placing the descendants of many
+parent instances at once.
+"""
+
+import numpy as np
+from pygame_maker.actors.motion import MotionArrays
+from pygame_maker.events import event
+from pygame_maker.support import logging_object
+
+
+class InstanceHierarchy(logging_object.LoggingObject):
+    """
+    A flattened copy of the parent/child trees below an object type's
+    instances.
+
+    Each tree's instances are stored in depth-first order, the same order
+    :py:meth:`~pygame_maker.actors.object_instance.ObjectInstance._update_child_instances`
+    visits them, with the index of each instance's parent.  Since a parent
+    always comes before its children, every child's rect can be placed
+    relative to its parent with one array operation per level of the
+    hierarchy, and every child's boundary check is done in bulk through its
+    own object type's motion arrays.
+
+    The flattened trees are only rebuilt when an instance's parent or
+    children change (see
+    :py:attr:`~pygame_maker.actors.simple_object_instance.SimpleObjectInstance.hierarchy_version`).
+    """
+    #: Boundary codes mapped to the names of the events they cause
+    BOUNDARY_EVENT_NAMES = {
+        MotionArrays.INTERSECT_BOUNDARY: "intersect_boundary",
+        MotionArrays.OUTSIDE_ROOM: "outside_room",
+    }
+
+    def __init__(self):
+        """Create an empty hierarchy."""
+        super(InstanceHierarchy, self).__init__(type(self).__name__)
+        #: The hierarchy version the trees were built from, or None if they
+        #: were never built
+        self.version = None
+        #: All instances in the trees, parents before their children
+        self.instances = []
+        #: The index in :py:attr:`instances` of each instance's parent, or
+        #: -1 for the root instances
+        self.parent_index = np.zeros(0, dtype=int)
+        #: The indices of the root instances
+        self.root_index = np.zeros(0, dtype=int)
+        #: The indices of the instances at each depth below the roots
+        self.levels = []
+        #: The child instances grouped by the motion arrays they live in, as
+        #: (motion arrays, indices, slots) tuples
+        self.motion_groups = []
+
+    def build(self, root_instances, version):
+        """
+        Flatten the trees below the given instances.
+
+        :param root_instances: Instances without a parent, that have children
+        :type root_instances: list
+        :param version: The current hierarchy version
+        :type version: int
+        """
+        self.debug("build(root_instances={}, version={}):".format(root_instances, version))
+        instances = []
+        parent_index = []
+        depths = []
+        pending = [(root, -1, 0) for root in reversed(root_instances)]
+        while pending:
+            inst, parent_idx, depth = pending.pop()
+            new_idx = len(instances)
+            instances.append(inst)
+            parent_index.append(parent_idx)
+            depths.append(depth)
+            # visit the first child next
+            pending.extend([(child, new_idx, depth + 1)
+                            for child in reversed(inst.symbols["children"])])
+        self.instances = instances
+        self.parent_index = np.array(parent_index, dtype=int)
+        depth_array = np.array(depths, dtype=int)
+        self.root_index = np.flatnonzero(depth_array == 0)
+        max_depth = depth_array.max() if len(depths) > 0 else 0
+        self.levels = [np.flatnonzero(depth_array == depth)
+                       for depth in range(1, max_depth + 1)]
+        groups = {}
+        for idx in np.flatnonzero(depth_array > 0).tolist():
+            child_inst = instances[idx]
+            group = groups.setdefault(id(child_inst.motion), (child_inst.motion, [], []))
+            group[1].append(idx)
+            group[2].append(child_inst.motion_slot)
+        self.motion_groups = [(motion_arrays, np.array(indices, dtype=int),
+                               np.array(slots, dtype=int))
+                              for motion_arrays, indices, slots in groups.values()]
+        self.version = version
+
+    def update(self, event_engine, root_codes):
+        """
+        Place every child instance relative to its parent, check the children
+        against the room boundaries, and queue the resulting events.
+
+        A child crossing or leaving the room receives its own boundary event
+        and sends a ``child_intersect_boundary`` or ``child_outside_room``
+        event to its parent, and a parent's boundary event is passed on to
+        its children as ``parent_intersect_boundary`` or
+        ``parent_outside_room``.  Children whose object type only sends
+        boundary events on transitions keep a boundary code only on the frame
+        it changes, and each event is only queued if the object type
+        receiving it has an action sequence for it.
+
+        :param event_engine: The event engine to queue events with
+        :type event_engine: :py:class:`~pygame_maker.events.event_engine.EventEngine`
+        :param root_codes: The boundary codes of root instances this frame,
+            keyed by the root's motion slot; roots without a code are inside
+            the room
+        :type root_codes: dict
+        :return: The names of the queued events, to be transmitted
+        :rtype: set
+        """
+        event_names_queued = set()
+        count = len(self.instances)
+        if count == len(self.root_index):
+            return event_names_queued
+        instances = self.instances
+        rel_x = np.zeros(count)
+        rel_y = np.zeros(count)
+        for motion_arrays, indices, slots in self.motion_groups:
+            rel_x[indices] = motion_arrays.fields["x"][slots]
+            rel_y[indices] = motion_arrays.fields["y"][slots]
+        world_x = np.zeros(count, dtype=int)
+        world_y = np.zeros(count, dtype=int)
+        codes = np.zeros(count, dtype=int)
+        for idx in self.root_index.tolist():
+            root = instances[idx]
+            world_x[idx] = root.rect.x
+            world_y[idx] = root.rect.y
+            codes[idx] = root_codes.get(root.motion_slot, MotionArrays.NO_BOUNDARY)
+        # parents are placed before their children, one level at a time;
+        #  rects truncate the parent-relative positions
+        for level in self.levels:
+            parents = self.parent_index[level]
+            world_x[level] = np.trunc(world_x[parents] + rel_x[level])
+            world_y[level] = np.trunc(world_y[parents] + rel_y[level])
+        for motion_arrays, indices, slots in self.motion_groups:
+            group_codes = motion_arrays.get_boundary_codes(
+                slots, world_x[indices], world_y[indices])
+            group_kind = instances[indices[0]].kind
+            if group_kind.boundary_events == group_kind.BOUNDARY_EVENTS_TRANSITION:
+                group_codes = motion_arrays.take_boundary_transitions(slots, group_codes)
+            codes[indices] = group_codes
+        parent_codes = np.zeros(count, dtype=int)
+        child_mask = self.parent_index >= 0
+        parent_codes[child_mask] = codes[self.parent_index[child_mask]]
+        for idx, new_x, new_y in zip(np.flatnonzero(child_mask).tolist(),
+                                     world_x[child_mask].tolist(),
+                                     world_y[child_mask].tolist()):
+            instances[idx].rect.x = new_x
+            instances[idx].rect.y = new_y
+        for motion_arrays, _, _ in self.motion_groups:
+            motion_arrays.position_version += 1
+        # queue events in the same order as the recursive update
+        has_event = ((codes != MotionArrays.NO_BOUNDARY) |
+                     (parent_codes != MotionArrays.NO_BOUNDARY))
+        with_events = np.flatnonzero(child_mask & has_event)
+        for idx, code, parent_code in zip(with_events.tolist(), codes[with_events].tolist(),
+                                          parent_codes[with_events].tolist()):
+            child_inst = instances[idx]
+            parent = instances[self.parent_index[idx]]
+            if parent_code != MotionArrays.NO_BOUNDARY:
+                ev_name = "parent_{}".format(self.BOUNDARY_EVENT_NAMES[parent_code])
+                if child_inst.kind.handles_event(ev_name):
+                    event_names_queued.add(ev_name)
+                    event_engine.queue_event(event.OtherEvent(ev_name, {
+                        "type": child_inst.kind, "instance": child_inst,
+                        "parent_type": parent.kind}))
+            if code != MotionArrays.NO_BOUNDARY:
+                ev_name = self.BOUNDARY_EVENT_NAMES[code]
+                self.debug("bounds {} event in child {}".format(ev_name, child_inst))
+                if child_inst.kind.handles_event(ev_name):
+                    event_names_queued.add(ev_name)
+                    event_engine.queue_event(event.OtherEvent(ev_name, {
+                        "type": child_inst.kind, "instance": child_inst}))
+                ev_name = "child_{}".format(ev_name)
+                if parent.kind.handles_event(ev_name):
+                    event_names_queued.add(ev_name)
+                    event_engine.queue_event(event.OtherEvent(ev_name, {
+                        "type": parent.kind, "instance": parent,
+                        "child_type": child_inst.kind}))
+        return event_names_queued
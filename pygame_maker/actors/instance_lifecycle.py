@@ -0,0 +1,112 @@
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Pygame maker object instance lifecycle module.
+"""
+
+from pygame_maker.support import logging_object
+
+
+class InstanceLifecycle(logging_object.LoggingObject):
+    """
+    Create and destroy object instances in bulk.
+
+    Creation requests made while events are being handled (E.G. by
+    ``create_object`` actions) are queued with :py:meth:`queue_create`, then
+    created together by :py:meth:`create_queued` at the start of the next
+    frame.  However many instances are created at once, their ``create`` and
+    ``create_child`` events are each transmitted only once, delivering every
+    queued event in a single dispatch pass.
+    """
+
+    def __init__(self, game_engine):
+        """
+        Create the lifecycle manager.
+
+        :param game_engine: The game engine, for access to its event engine
+        :type game_engine: GameEngine
+        """
+        super(InstanceLifecycle, self).__init__(type(self).__name__)
+        #: A reference to the game engine, for transmitting events
+        self.game_engine = game_engine
+        #: Queued creation requests, as (object type, settings) tuples
+        self.create_queue = []
+
+    def queue_create(self, object_type, settings=None):
+        """
+        Schedule a new instance of an object type for creation at the start
+        of the next frame.
+
+        :param object_type: The type of the new instance
+        :type object_type: :py:class:`~pygame_maker.actors.object_type.ObjectType`
+        :param settings: A hash of settings to be applied to the new instance
+        :type settings: None | dict
+        """
+        self.create_queue.append((object_type, settings))
+
+    def create_queued(self, screen):
+        """
+        Create all instances whose creation was queued since the last call.
+
+        :param screen: The surface the instances will be drawn upon
+        :type screen: :py:class:`pygame.Surface`
+        :return: The new instances
+        :rtype: list
+        """
+        if not self.create_queue:
+            return []
+        requests = self.create_queue
+        # new requests made by create event handlers wait for the next call
+        self.create_queue = []
+        return self.spawn(screen, requests)
+
+    def spawn(self, screen, requests):
+        """
+        Create many instances immediately, then transmit their creation
+        events together.
+
+        :param screen: The surface the instances will be drawn upon
+        :type screen: :py:class:`pygame.Surface`
+        :param requests: A list of (object type, settings) tuples, one per
+            new instance
+        :type requests: list
+        :return: The new instances
+        :rtype: list
+        """
+        new_instances = []
+        child_created = False
+        for object_type, settings in requests:
+            new_instance, parent_inst = object_type.spawn_instance(screen, settings)
+            object_type.queue_create_events(new_instance, parent_inst)
+            new_instances.append(new_instance)
+            if parent_inst is not None:
+                child_created = True
+        self.debug("Spawned {:d} instances".format(len(new_instances)))
+        if new_instances:
+            self.game_engine.event_engine.transmit_event('create')
+            if child_created:
+                self.game_engine.event_engine.transmit_event('create_child')
+        return new_instances
+
+    def despawn(self, instances):
+        """
+        Destroy many instances, transmitting their destroy events together.
+
+        Each instance (and its children) is removed from its object type
+        after the type's next update.  Instances that are already scheduled
+        for removal are skipped.
+
+        :param instances: The instances to destroy
+        :type instances: iterable
+        """
+        destroyed = False
+        for instance in instances:
+            if instance in instance.kind.instance_delete_list:
+                continue
+            # defer the destroy event transmission until all are queued
+            instance.destroy_object(None, no_destroy_event=True)
+            destroyed = True
+        if destroyed:
+            self.game_engine.event_engine.transmit_event('destroy')
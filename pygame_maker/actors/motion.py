@@ -0,0 +1,752 @@
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Pygame maker motion module, for moving many object instances at once.
+"""
+
+import numbers
+import numpy as np
+from pygame_maker.support import coordinate
+from pygame_maker.support import logging_object
+from pygame_maker.logic.language_engine import SymbolTable
+from pygame_maker.logic.run_time_support import batch_type
+
+
+class MotionArrays(logging_object.LoggingObject):
+    """
+    Keep the motion state of many object instances in contiguous NumPy
+    arrays, one array per field and one slot per instance.
+
+    Instances read and write their position, speed and direction through
+    views into the arrays (see :py:class:`MotionSymbolTable` and
+    :py:class:`MotionCoordinate`), so the object type can move all of its
+    instances and check them against the room boundaries using a few array
+    operations per frame, instead of updating them one by one.
+
+    Each slot also holds its instance's animation state, so that every
+    instance's animation can be advanced at once as well.
+
+    Writing a position only flags the slot in :py:attr:`rect_dirty`.  The
+    object type copies the rounded positions of flagged slots into the
+    instances' rects in one pass, before they are needed for collisions and
+    drawing.
+    """
+    #: Symbol names that are views into the arrays, mapped to their fields
+    SYMBOL_FIELDS = {
+        "position.x": "x",
+        "position.y": "y",
+        "speed": "speed",
+        "direction": "direction",
+        "hspeed": "hspeed",
+        "vspeed": "vspeed",
+        "friction": "friction",
+        "gravity": "gravity",
+        "gravity_direction": "gravity_direction",
+        "image_index": "image_index",
+        "image_speed": "image_speed",
+    }
+    #: All per-slot fields.  Width and height are the instance's rect size,
+    #: and the screen dimensions are used for boundary checks.  The image
+    #: index is the position in the animation, counted in frames, and the
+    #: image frame is the animation frame the instance currently shows.  The
+    #: boundary code is the instance's last reported boundary code.
+    FIELDS = (
+        "x", "y", "hspeed", "vspeed", "speed", "direction", "friction", "gravity",
+        "gravity_direction", "width", "height", "screen_width", "screen_height",
+        "image_index", "image_speed", "image_frame", "boundary_code",
+    )
+    #: The initial number of slots
+    DEFAULT_CAPACITY = 16
+    #: Boundary code for an instance fully inside the room
+    NO_BOUNDARY = 0
+    #: Boundary code for an instance crossing the edge of the room
+    INTERSECT_BOUNDARY = 1
+    #: Boundary code for an instance completely outside the room
+    OUTSIDE_ROOM = 2
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """
+        Create empty motion arrays.
+
+        :param capacity: The initial number of slots.  The arrays grow as
+            needed.
+        :type capacity: int
+        """
+        super(MotionArrays, self).__init__(type(self).__name__)
+        #: The current number of slots in each array
+        self.capacity = max(1, int(capacity))
+        #: A dict of field names mapped to their arrays
+        self.fields = {}
+        for field in self.FIELDS:
+            self.fields[field] = np.zeros(self.capacity)
+        #: True for slots owned by an instance
+        self.in_use = np.zeros(self.capacity, dtype=bool)
+        #: True for slots whose instance has no parent.  Child instances are
+        #: placed relative to their parent, so they aren't moved by speed.
+        self.root = np.ones(self.capacity, dtype=bool)
+        #: True for slots whose position changed since their instance's rect
+        #: was last updated
+        self.rect_dirty = np.zeros(self.capacity, dtype=bool)
+        #: The instance owning each slot, or None
+        self.instances = [None] * self.capacity
+        #: Released slots, available for re-use
+        self.free_slots = []
+        #: The number of slots ever allocated, so unused slots at the end
+        #: of the arrays can be skipped
+        self.slot_count = 0
+        #: Incremented whenever a position changes or a slot is allocated or
+        #: released, so that copies of the positions know to update
+        self.position_version = 0
+
+    def _grow(self):
+        # Double the size of every array.
+        added = self.capacity
+        for field in self.FIELDS:
+            self.fields[field] = np.concatenate((self.fields[field], np.zeros(added)))
+        self.in_use = np.concatenate((self.in_use, np.zeros(added, dtype=bool)))
+        self.root = np.concatenate((self.root, np.ones(added, dtype=bool)))
+        self.rect_dirty = np.concatenate((self.rect_dirty, np.zeros(added, dtype=bool)))
+        self.instances.extend([None] * added)
+        self.capacity += added
+        self.debug("Grew motion arrays to {:d} slots".format(self.capacity))
+
+    def allocate(self, instance):
+        """
+        Reserve a slot for an instance, with all fields set to 0.
+
+        :param instance: The instance that will own the slot
+        :type instance: :py:class:`~pygame_maker.actors.object_instance.ObjectInstance`
+        :return: The slot number
+        :rtype: int
+        """
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            if self.slot_count >= self.capacity:
+                self._grow()
+            slot = self.slot_count
+            self.slot_count += 1
+        for field in self.FIELDS:
+            self.fields[field][slot] = 0.0
+        self.in_use[slot] = True
+        self.root[slot] = True
+        self.instances[slot] = instance
+        self.mark_moved(slot)
+        return slot
+
+    def release(self, slot):
+        """
+        Return a slot for re-use.
+
+        :param slot: The slot number
+        :type slot: int
+        """
+        self.in_use[slot] = False
+        self.instances[slot] = None
+        self.free_slots.append(slot)
+        self.position_version += 1
+
+    def mark_moved(self, slot):
+        """
+        Record that the position in a slot changed, flagging its rect for
+        update.
+
+        :param slot: The slot number
+        :type slot: int
+        """
+        self.rect_dirty[slot] = True
+        self.position_version += 1
+
+    def get_live_mask(self, skip_slots=None):
+        """
+        Return a mask of the slots in use, within the allocated range.
+
+        :param skip_slots: Slots to leave out of the mask (E.G. those of
+            instances destroyed this frame)
+        :type skip_slots: None | list
+        :return: A boolean array with slot_count entries
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        live = self.in_use[:self.slot_count].copy()
+        if skip_slots:
+            live[skip_slots] = False
+        return live
+
+    def get_root_slots(self, live):
+        """
+        Return the live slots of instances without a parent.
+
+        :param live: The mask returned by :py:meth:`get_live_mask`
+        :type live: :py:class:`numpy.ndarray`
+        :return: Slot numbers
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        return np.flatnonzero(live & self.root[:self.slot_count])
+
+    def take_dirty_root_slots(self, live):
+        """
+        Return the live slots of instances without a parent whose position
+        changed since their rect was last updated, and clear every slot's
+        dirty flag.  Child instances' rects are placed relative to their
+        parent instead.
+
+        :param live: The mask returned by :py:meth:`get_live_mask`
+        :type live: :py:class:`numpy.ndarray`
+        :return: Slot numbers
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        count = self.slot_count
+        dirty = np.flatnonzero(live & self.root[:count] & self.rect_dirty[:count])
+        self.rect_dirty[:count] = False
+        return dirty
+
+    def integrate(self, live):
+        """
+        Move every live root instance with a positive speed by its horizontal
+        and vertical speed, flagging their rects for update.
+
+        :param live: The mask returned by :py:meth:`get_live_mask`
+        :type live: :py:class:`numpy.ndarray`
+        :return: The slots that moved
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        count = self.slot_count
+        fields = self.fields
+        moving = np.flatnonzero(live & self.root[:count] & (fields["speed"][:count] > 0.0))
+        if len(moving) > 0:
+            fields["x"][moving] += fields["hspeed"][moving]
+            fields["y"][moving] += fields["vspeed"][moving]
+            self.rect_dirty[moving] = True
+            self.position_version += 1
+        return moving
+
+    def advance_animation(self, live, frame_count):
+        """
+        Advance the image index of every live instance with a non-zero image
+        speed, wrapping around at either end of the animation.
+
+        :param live: The mask returned by :py:meth:`get_live_mask`
+        :type live: :py:class:`numpy.ndarray`
+        :param frame_count: The number of frames in the animation
+        :type frame_count: int
+        :return: A tuple of the slots that must show a different frame, the
+            frame each must show, and the slots whose animation reached its
+            end
+        :rtype: tuple
+        """
+        count = self.slot_count
+        fields = self.fields
+        animating = np.flatnonzero(live & (fields["image_speed"][:count] != 0.0))
+        if len(animating) == 0 or frame_count < 1:
+            empty = np.zeros(0, dtype=int)
+            return empty, empty, empty
+        new_index = fields["image_index"][animating] + fields["image_speed"][animating]
+        ended = (new_index >= frame_count) | (new_index < 0.0)
+        new_index = np.mod(new_index, frame_count)
+        fields["image_index"][animating] = new_index
+        new_frames = np.minimum(np.floor(new_index), frame_count - 1)
+        changed = new_frames != fields["image_frame"][animating]
+        changed_slots = animating[changed]
+        fields["image_frame"][changed_slots] = new_frames[changed]
+        return changed_slots, new_frames[changed].astype(int), animating[ended]
+
+    def get_rect_positions(self, slots):
+        """
+        Round the positions in the given slots to the nearest pixel.
+
+        :param slots: Slot numbers
+        :type slots: :py:class:`numpy.ndarray`
+        :return: A tuple of integer arrays (x, y)
+        :rtype: tuple
+        """
+        rect_x = np.floor(self.fields["x"][slots] + 0.5).astype(int)
+        rect_y = np.floor(self.fields["y"][slots] + 0.5).astype(int)
+        return rect_x, rect_y
+
+    def get_boundary_codes(self, slots, rect_x, rect_y):
+        """
+        Check instances against the room boundaries.
+
+        Matches
+        :py:meth:`~pygame_maker.actors.object_instance.ObjectInstance._detect_boundary_events`,
+        so an instance is never both intersecting the boundary and outside
+        the room.
+
+        :param slots: Slot numbers
+        :type slots: :py:class:`numpy.ndarray`
+        :param rect_x: The instances' rect x coordinates
+        :type rect_x: :py:class:`numpy.ndarray`
+        :param rect_y: The instances' rect y coordinates
+        :type rect_y: :py:class:`numpy.ndarray`
+        :return: An array of boundary codes (:py:attr:`NO_BOUNDARY`,
+            :py:attr:`INTERSECT_BOUNDARY` or :py:attr:`OUTSIDE_ROOM`), one
+            per slot
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        width = self.fields["width"][slots]
+        height = self.fields["height"][slots]
+        screen_w = self.fields["screen_width"][slots]
+        screen_h = self.fields["screen_height"][slots]
+        right = rect_x + width
+        bottom = rect_y + height
+        in_x_bounds = (right >= 0) & (rect_x <= screen_w)
+        in_y_bounds = (bottom >= 0) & (rect_y <= screen_h)
+        hit_x = (((rect_x <= 0) & (right >= 0)) |
+                 ((rect_x <= screen_w) & (right >= screen_w) & in_y_bounds))
+        hit_y = (((rect_y <= 0) & (bottom >= 0)) |
+                 ((rect_y <= screen_h) & (bottom >= screen_h) & in_x_bounds))
+        outside = (rect_x > screen_w) | (right < 0) | (rect_y > screen_h) | (bottom < 0)
+        codes = np.where(outside, self.OUTSIDE_ROOM, self.NO_BOUNDARY)
+        codes[hit_x | hit_y] = self.INTERSECT_BOUNDARY
+        return codes
+
+    def take_boundary_transitions(self, slots, codes):
+        """
+        Keep only the boundary codes that changed since the last call, and
+        remember the new codes.
+
+        :param slots: Slot numbers
+        :type slots: :py:class:`numpy.ndarray`
+        :param codes: The slots' current boundary codes, from
+            :py:meth:`get_boundary_codes`
+        :type codes: :py:class:`numpy.ndarray`
+        :return: The codes of slots that changed, with
+            :py:attr:`NO_BOUNDARY` for the others
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        changed = codes != self.fields["boundary_code"][slots]
+        self.fields["boundary_code"][slots] = codes
+        return np.where(changed, codes, self.NO_BOUNDARY)
+
+    def update_velocity_components(self, slots):
+        """
+        Recalculate horizontal and vertical speed from speed and direction.
+
+        :param slots: Slot numbers
+        :type slots: :py:class:`numpy.ndarray`
+        """
+        fields = self.fields
+        radians = fields["direction"][slots] / 180.0 * np.pi
+        fields["hspeed"][slots] = fields["speed"][slots] * np.sin(radians)
+        fields["vspeed"][slots] = -fields["speed"][slots] * np.cos(radians)
+
+    def update_speed_and_direction(self, slots):
+        """
+        Recalculate speed and direction from horizontal and vertical speed.
+
+        :param slots: Slot numbers
+        :type slots: :py:class:`numpy.ndarray`
+        """
+        fields = self.fields
+        hspeed = fields["hspeed"][slots]
+        vspeed = fields["vspeed"][slots]
+        fields["speed"][slots] = np.hypot(hspeed, vspeed)
+        fields["direction"][slots] = np.degrees(np.arctan2(hspeed, -vspeed)) % 360.0
+
+    def apply_gravity(self, live):
+        """
+        Accelerate live instances by their gravity, in their gravity
+        direction.
+
+        :param live: The mask returned by :py:meth:`get_live_mask`
+        :type live: :py:class:`numpy.ndarray`
+        """
+        count = self.slot_count
+        fields = self.fields
+        pulled = np.flatnonzero(live & (fields["gravity"][:count] != 0.0))
+        if len(pulled) > 0:
+            gravity = fields["gravity"][pulled]
+            radians = fields["gravity_direction"][pulled] / 180.0 * np.pi
+            fields["hspeed"][pulled] += gravity * np.sin(radians)
+            fields["vspeed"][pulled] -= gravity * np.cos(radians)
+            self.update_speed_and_direction(pulled)
+
+    def apply_friction(self, live):
+        """
+        Reduce the speed of live instances by their friction, stopping at 0.
+
+        :param live: The mask returned by :py:meth:`get_live_mask`
+        :type live: :py:class:`numpy.ndarray`
+        """
+        count = self.slot_count
+        fields = self.fields
+        slowing = np.flatnonzero(live & (fields["friction"][:count] > 0.0) &
+                                 (fields["speed"][:count] > 0.0))
+        if len(slowing) > 0:
+            fields["speed"][slowing] = np.maximum(
+                fields["speed"][slowing] - fields["friction"][slowing], 0.0)
+            self.update_velocity_components(slowing)
+
+
+class MotionSymbolTable(SymbolTable):
+    """
+    An instance symbol table whose motion symbols (see
+    :py:attr:`MotionArrays.SYMBOL_FIELDS`) are views into a slot of the
+    motion arrays.  All other symbols are stored as usual.
+    """
+    __slots__ = ("motion", "slot")
+
+    def __init__(self, motion, slot, initial_symbols=None, sym_change_callback=None,
+                 defaults=None):
+        """
+        Initialize a new symbol table.
+
+        :param motion: The motion arrays holding the motion symbols
+        :type motion: MotionArrays
+        :param slot: The slot in the motion arrays
+        :type slot: int
+        :param initial_symbols: The initial contents to place in the
+            variables section of the symbol table
+        :type initial_symbols: dict
+        :param sym_change_callback: An optional callback to execute whenever
+            the interpreted language changes a symbol's value
+        :type sym_change_callback: callable
+        :param defaults: Shared default values for the other symbols
+        :type defaults: None | dict
+        """
+        super(MotionSymbolTable, self).__init__(initial_symbols, sym_change_callback,
+                                                defaults)
+        self.motion = motion
+        self.slot = slot
+
+    def bind(self, motion, slot):
+        """
+        Point the motion symbols at a different slot.
+
+        :param motion: The motion arrays holding the motion symbols
+        :type motion: MotionArrays
+        :param slot: The slot in the motion arrays
+        :type slot: int
+        """
+        self.motion = motion
+        self.slot = slot
+
+    def keys(self):
+        return (list(self.vars.keys()) + list(MotionArrays.SYMBOL_FIELDS.keys()) +
+                [sym for sym in self.defaults
+                 if sym not in self.vars and sym not in MotionArrays.SYMBOL_FIELDS] +
+                list(self.consts.keys()))
+
+    def __contains__(self, item):
+        return item in MotionArrays.SYMBOL_FIELDS or SymbolTable.__contains__(self, item)
+
+    def __setitem__(self, item, val):
+        field = MotionArrays.SYMBOL_FIELDS.get(item)
+        if field is None:
+            if item == "parent":
+                self.motion.root[self.slot] = (val is None)
+                self.motion.mark_moved(self.slot)
+            SymbolTable.__setitem__(self, item, val)
+            return
+        self.motion.fields[field][self.slot] = val
+        if field in ("x", "y"):
+            self.motion.mark_moved(self.slot)
+        if self.sym_change_callback:
+            self.sym_change_callback(item, val)
+
+    def __getitem__(self, item):
+        field = MotionArrays.SYMBOL_FIELDS.get(item)
+        if field is None:
+            return SymbolTable.__getitem__(self, item)
+        return float(self.motion.fields[field][self.slot])
+
+
+class MotionBatchScope(object):
+    """
+    The symbols of many instances sharing motion arrays, for running a code
+    block once for all of them (see
+    :py:meth:`~pygame_maker.logic.code_block.CodeBlock.to_python_batch`).
+
+    Reading a motion symbol returns an array with each instance's value,
+    and other symbols are read from the global symbol table.  Like the scope
+    an instance runs a code block in, assigned values are kept for the rest
+    of the run, and instances whose symbol changes have it set through the
+    same rules as :py:class:`~pygame_maker.actors.object_instance.ObjectInstance`
+    properties: setting speed or direction updates the horizontal and
+    vertical speed, setting those updates speed and direction, and
+    directions are kept between 0 and 360 degrees.
+
+    A run that fails (E.G. dividing by zero for some instance) leaves the
+    motion arrays as they were, so the code block can run again for each
+    instance to report the error as usual.
+    """
+    #: The exceptions that make a batch run fail.  Floating point errors
+    #: are raised instead of producing infinite or NaN values, which Python
+    #: would have reported for a single instance.
+    BATCH_ERRORS = (ArithmeticError, TypeError, ValueError)
+
+    def __init__(self, motion, slots, global_symbols):
+        """
+        Create a scope over some instances' symbols.
+
+        :param motion: The motion arrays holding the instances' motion
+            symbols
+        :type motion: MotionArrays
+        :param slots: The instances' slots in the motion arrays
+        :type slots: :py:class:`numpy.ndarray`
+        :param global_symbols: The language engine's global symbol table
+        :type global_symbols: :py:class:`~pygame_maker.logic.language_engine.SymbolTable`
+        """
+        #: The motion arrays holding the motion symbols
+        self.motion = motion
+        #: The instances' slots
+        self.slots = slots
+        #: A mask selecting every instance in the scope
+        self.mask = np.ones(len(slots), dtype=bool)
+        #: The global symbol table
+        self.global_symbols = global_symbols
+        # values of the symbols assigned during a run, the instances each
+        #  symbol was assigned for, and the values of the global symbols it
+        #  reads
+        self.values = {}
+        self.assigned = {}
+        self.global_values = {}
+        # assigned symbols whose instances' values have different types
+        self.mixed_symbols = set()
+        # the original values of each field a run changes, for restoring
+        #  them if the run fails
+        self.saved = {}
+
+    def run(self, run_batch, reads, stores):
+        """
+        Run a code block's ``run_batch()`` function for every instance.
+
+        Code blocks can only run in batches if they assign nothing but
+        motion symbols, and every other symbol they read is a global number
+        that no instance has its own copy of.
+
+        :param run_batch: The code block's ``run_batch()`` function
+        :type run_batch: callable
+        :param reads: The names of the symbols the code block reads
+        :type reads: tuple
+        :param stores: The names of the symbols the code block assigns
+        :type stores: tuple
+        :return: True if the code block ran, or False if it must run for
+            each instance instead
+        :rtype: bool
+        """
+        for symbol in stores:
+            if symbol not in MotionArrays.SYMBOL_FIELDS:
+                return False
+        self.global_values = {}
+        instances = [self.motion.instances[slot] for slot in self.slots.tolist()]
+        for symbol in reads:
+            if symbol in MotionArrays.SYMBOL_FIELDS:
+                continue
+            value = self.global_symbols[symbol]
+            if not isinstance(value, numbers.Number):
+                return False
+            for inst in instances:
+                if symbol in inst.symbols:
+                    return False
+            self.global_values[symbol] = value
+        self.values = {}
+        self.assigned = {}
+        self.mixed_symbols = set()
+        self.saved = {}
+        try:
+            with np.errstate(divide="raise", over="raise", invalid="raise"):
+                run_batch(self)
+        except self.BATCH_ERRORS as err:
+            self.motion.debug("Batch run failed ({}), restoring motion arrays".format(err))
+            for field, saved_values in self.saved.items():
+                if field == "rect_dirty":
+                    self.motion.rect_dirty[self.slots] = saved_values
+                else:
+                    self.motion.fields[field][self.slots] = saved_values
+            return False
+        return True
+
+    def read(self, symbol, mask):
+        """
+        Read a symbol's value, for the instances selected by a mask.
+
+        :param symbol: The symbol's name
+        :type symbol: str
+        :param mask: The instances reading the symbol
+        :type mask: :py:class:`numpy.ndarray`
+        :raise: TypeError if the symbol's value has different types for
+            the selected instances
+        :return: The value assigned during this run, the instances' motion
+            symbol values, or the global symbol's value
+        """
+        field = MotionArrays.SYMBOL_FIELDS.get(symbol)
+        if field is None:
+            return self.global_values[symbol]
+        if symbol not in self.values:
+            return self.motion.fields[field][self.slots]
+        if symbol in self.mixed_symbols:
+            raise TypeError("Symbol '{}' holds values of different types".format(symbol))
+        value = self.values[symbol]
+        assigned = self.assigned[symbol]
+        if not (mask & ~assigned).any():
+            return value
+        # instances the symbol wasn't assigned for read their current value,
+        #  which setting another motion symbol may have changed
+        current_value = self.motion.fields[field][self.slots]
+        if batch_type(value) is float:
+            return np.where(assigned, value, current_value)
+        if not (mask & assigned).any():
+            return current_value
+        raise TypeError("Symbol '{}' holds values of different types".format(symbol))
+
+    def store(self, symbol, value, mask):
+        """
+        Assign a motion symbol, for the instances selected by a mask.
+
+        As with an instance's scope, instances only have the symbol set if
+        its value changes, or has a different type.
+
+        :param symbol: The symbol's name
+        :type symbol: str
+        :param value: The new value, or an array of values
+        :param mask: The instances to assign the symbol for
+        :type mask: :py:class:`numpy.ndarray`
+        """
+        old_value = self.read(symbol, mask)
+        if batch_type(old_value) is batch_type(value):
+            changed = mask & (old_value != value)
+        else:
+            changed = mask
+        self.mixed_symbols.discard(symbol)
+        if symbol in self.values and mask is not self.mask and not mask.all():
+            old_assigned = self.assigned[symbol] & ~mask
+            if (old_assigned.any() and
+                    batch_type(self.values[symbol]) is not batch_type(value)):
+                # the instances keeping their assigned values would need a
+                #  different type than the others
+                self.mixed_symbols.add(symbol)
+            self.values[symbol] = np.where(mask, value, self.values[symbol])
+            self.assigned[symbol] = self.assigned[symbol] | mask
+        else:
+            self.values[symbol] = value
+            self.assigned[symbol] = self.assigned.get(symbol, ~self.mask) | mask
+        if not changed.any():
+            return
+        if isinstance(value, np.ndarray):
+            value = value[changed]
+        self._set_symbol(symbol, self.slots[changed], value)
+
+    @staticmethod
+    def normalize_angles(angles):
+        """
+        Keep angles between 0 and 360 degrees.
+
+        :param angles: An angle, or an array of angles
+        :return: The normalized angles
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        angles = np.array(angles, dtype=float, ndmin=1)
+        wrapped = (angles >= 360.0) | (angles <= -360.0)
+        angles[wrapped] = np.mod(angles[wrapped], 360.0)
+        angles[(angles > -360.0) & (angles < 0.0)] += 360.0
+        return angles
+
+    def _write(self, field, slots, values):
+        # Change a field for some slots, saving its original values first.
+        if field not in self.saved:
+            self.saved[field] = self.motion.fields[field][self.slots]
+        self.motion.fields[field][slots] = values
+
+    def _set_symbol(self, symbol, slots, value):
+        # Set a motion symbol for some slots, with the side effects of the
+        #  matching ObjectInstance property.
+        fields = self.motion.fields
+        if symbol in ("speed", "direction"):
+            if symbol == "direction":
+                value = self.normalize_angles(value)
+            self._write(symbol, slots, value)
+            radians = fields["direction"][slots] / 180.0 * np.pi
+            speed = fields["speed"][slots]
+            self._write("hspeed", slots, speed * np.sin(radians))
+            self._write("vspeed", slots, speed * -1 * np.cos(radians))
+        elif symbol in ("hspeed", "vspeed"):
+            if symbol == "hspeed":
+                hspeed = value
+                vspeed = fields["vspeed"][slots]
+            else:
+                hspeed = fields["hspeed"][slots]
+                vspeed = value
+            self._write("speed", slots, np.sqrt(hspeed ** 2 + vspeed ** 2))
+            self._write("direction", slots, self.normalize_angles(
+                np.arctan2(vspeed, hspeed) * 180 / np.pi))
+            self._write(symbol, slots, value)
+        elif symbol == "gravity_direction":
+            self._write(symbol, slots, self.normalize_angles(value))
+        else:
+            field = MotionArrays.SYMBOL_FIELDS[symbol]
+            if field in ("x", "y"):
+                if "rect_dirty" not in self.saved:
+                    self.saved["rect_dirty"] = self.motion.rect_dirty[self.slots]
+                self.motion.rect_dirty[slots] = True
+                self.motion.position_version += 1
+            self._write(field, slots, value)
+
+
+class MotionCoordinate(coordinate.Coordinate):
+    """
+    A coordinate whose x and y are views into a slot of the motion arrays.
+
+    Changes only flag the slot's rect for update, instead of running
+    callbacks.
+    """
+    __slots__ = ("motion", "slot")
+
+    #pylint: disable=super-init-not-called
+    def __init__(self, motion, slot, x=0, y=0):
+        """
+        Store an x, y coordinate in the motion arrays.
+
+        :param motion: The motion arrays holding the coordinate
+        :type motion: MotionArrays
+        :param slot: The slot in the motion arrays
+        :type slot: int
+        :param x: X component
+        :type x: int | float
+        :param y: Y component
+        :type y: int | float
+        """
+        self.motion = motion
+        self.slot = slot
+        motion.fields["x"][slot] = x
+        motion.fields["y"][slot] = y
+        motion.mark_moved(slot)
+        self.x_callback = None
+        self.y_callback = None
+    #pylint: enable=super-init-not-called
+
+    def bind(self, motion, slot):
+        """
+        Point the coordinate at a different slot.
+
+        :param motion: The motion arrays holding the coordinate
+        :type motion: MotionArrays
+        :param slot: The slot in the motion arrays
+        :type slot: int
+        """
+        self.motion = motion
+        self.slot = slot
+
+    #pylint: disable=invalid-name
+    @property
+    def x(self):
+        """Get and set the X coordinate."""
+        return float(self.motion.fields["x"][self.slot])
+
+    @x.setter
+    def x(self, value):
+        self.motion.fields["x"][self.slot] = value
+        self.motion.mark_moved(self.slot)
+
+    @property
+    def y(self):
+        """Get and set the Y coordinate."""
+        return float(self.motion.fields["y"][self.slot])
+
+    @y.setter
+    def y(self, value):
+        self.motion.fields["y"][self.slot] = value
+        self.motion.mark_moved(self.slot)
+    #pylint: enable=invalid-name
@@ -11,6 +11,7 @@ import random
 import pygame
 import numpy as np
 from pygame_maker.actors.simple_object_instance import SimpleObjectInstance
+from pygame_maker.actors.motion import MotionArrays, MotionCoordinate, MotionSymbolTable
 import pygame_maker.events.event as event
 
 
@@ -101,6 +102,10 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
     * produce outside_room events
     * draw itself
 
+    The position and motion symbols are views into the object type's
+    :py:class:`~pygame_maker.actors.motion.MotionArrays`, which lets the
+    object type move all of its instances at once.
+
     As a :py:class:`~pygame.sprite.DirtySprite` subclass, instances support
     ``dirty``, ``blendmode``, ``source_rect``, ``visible``, and ``layer``
     attributes.
@@ -129,7 +134,16 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
         "hspeed": 0.0,
         "vspeed": 0.0,
         "subimage_number": 0,
+        "image_index": 0.0,
+        "image_speed": 0.0,
     }
+    ACTION_METHODS = dict(SimpleObjectInstance.ACTION_METHODS)
+    ACTION_METHODS.update({
+        'set_velocity_compass': 'set_velocity_compass',
+        'move_toward_point': 'move_toward_point',
+        'set_horizontal_speed': 'set_horizontal_speed',
+        'set_vertical_speed': 'set_vertical_speed',
+    })
 
     def __init__(self, kind, screen_dims, new_id, settings=None, **kwargs):
         """
@@ -157,11 +171,11 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
               moves in each update [0.0]
             * direction (float): 0-359 degrees for direction of motion [0.0]
             * gravity (float): Strength of gravity toward gravity_direction in
-              pixels/frame^2 [0.0]
+              pixels/frame^2 [the object type's gravity]
             * gravity_direction (float): 0-359 degrees for direction of gravity
-              vector [0.0]
+              vector [the object type's gravity_direction]
             * friction (float): Strength of friction vs direction of motion in
-              pixels/frame [0.0]
+              pixels/frame [the object type's friction]
             * parent (ObjectInstance): An object instance that "owns" this one.
               Makes this object instance's coordinates relative to its parent.
               Connects the two instances, so events can be communicated.
@@ -169,6 +183,10 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
         """
         # Flag when methods shouldn't automatically update speed, direction
         self._delay_motion_updates = False
+        #: The motion arrays holding this instance's position and velocity
+        self.motion = kind.motion
+        #: This instance's slot in the motion arrays
+        self.motion_slot = kind.motion.allocate(self)
         # call the superclasses' __init__
         SimpleObjectInstance.__init__(self, kind, screen_dims, new_id, settings, **kwargs)
         pygame.sprite.DirtySprite.__init__(self)
@@ -178,23 +196,126 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
         self._visible = False
         self.visible = kind.visible
         self.source_rect = pygame.Rect(0, 0, 0, 0)
-        # Get a copy of the selected subimage and its collision mask (and a
-        # radius, if the disk collision mask was selected)
+        #: True once this instance has its own copy of its image (see
+        #: :py:meth:`get_own_image`), instead of sharing it
+        self.owns_image = False
+        # Get the selected subimage and its collision mask (and a radius, if
+        # the disk collision mask was selected)
         self.set_subimage()
+        self._store_motion_extents()
         self.blendmode = kind.blend_mode
         # use the instance type's 'depth' parameter as the layer for this
         #  instance
         self.layer = kind.depth
 
         self.start_position = tuple(self.position)
-        self.action_name_to_method_map.update({
-            'set_velocity_compass': self.set_velocity_compass,
-            'move_toward_point': self.move_toward_point,
-            'set_horizontal_speed': self.set_horizontal_speed,
-            'set_vertical_speed': self.set_vertical_speed,
-        })
         # print("{}".format(self))
 
+    def recycle(self, screen_dims, new_id, settings=None, **kwargs):
+        """
+        Reset a destroyed instance taken from its object type's pool, so it
+        can be re-used as a new instance.
+
+        The sprite image is only looked up again if the instance ends up with
+        a different subimage than it had before, or had its own copy of it.
+
+        :param screen_dims: Width, height of the surface this instance will be
+            drawn to
+        :type screen_dims: [int, int]
+        :param new_id: A unique integer ID for this instance
+        :type new_id: int
+        :param settings: Attribute settings, the same as for ``__init__()``
+        :type settings: None or dict
+        :param kwargs: Attribute settings, the same as for ``__init__()``
+        """
+        old_subimage_number = self.symbols["subimage_number"]
+        self._delay_motion_updates = False
+        # the slot was released when the instance was removed
+        self._bind_motion(self.kind.motion, self.kind.motion.allocate(self))
+        SimpleObjectInstance.recycle(self, screen_dims, new_id, settings, **kwargs)
+        self.dirty = 0
+        self._visible = False
+        self.visible = self.kind.visible
+        if (self.image is None or self.owns_image or
+                self.symbols["subimage_number"] != old_subimage_number):
+            self.set_subimage()
+        self._store_motion_extents()
+        self.blendmode = self.kind.blend_mode
+        self.layer = self.kind.depth
+        self.start_position = tuple(self.position)
+
+    def _init_symbols(self):
+        # New instances start with their object type's forces.
+        SimpleObjectInstance._init_symbols(self)
+        self.symbols["gravity"] = self.kind.gravity
+        self.symbols["gravity_direction"] = self.kind.gravity_direction
+        self.symbols["friction"] = self.kind.friction
+        # animated instances start with the type's first animation frame
+        self.symbols["image_speed"] = self.kind.image_speed
+        if self.kind.animation_frames:
+            self.symbols["subimage_number"] = self.kind.animation_frames[0]
+
+    def _make_position(self):
+        # Keep the position in the motion arrays.  The rect is updated from
+        #  it by the object type, or by sync_rect().
+        return MotionCoordinate(self.motion, self.motion_slot, 0, 0)
+
+    def _make_symbol_table(self):
+        # Keep the motion symbols in the motion arrays.
+        return MotionSymbolTable(self.motion, self.motion_slot,
+                                 defaults=self.get_default_symbols())
+
+    def _bind_motion(self, motion, slot):
+        # Move this instance's motion state to a different slot.
+        self.motion = motion
+        self.motion_slot = slot
+        self.symbols.bind(motion, slot)
+        self.position.bind(motion, slot)
+
+    def _store_motion_extents(self):
+        # Record the rect size and screen size used for boundary checks.
+        fields = self.motion.fields
+        fields["width"][self.motion_slot] = self.rect.width
+        fields["height"][self.motion_slot] = self.rect.height
+        fields["screen_width"][self.motion_slot] = self.screen_dims[0]
+        fields["screen_height"][self.motion_slot] = self.screen_dims[1]
+
+    def sync_rect(self):
+        """
+        Copy the position, rounded to the nearest pixel, into the rect.
+
+        Object types update all of their instances' rects once per frame
+        before checking for collisions and before drawing, so this is only
+        needed when the rect must match a position changed earlier in the
+        same frame.  Child instances are left alone, since their rects are
+        placed relative to their parent's rect.
+        """
+        slot = self.motion_slot
+        if self.motion.root[slot]:
+            self.rect.x = int(math.floor(self.motion.fields["x"][slot] + 0.5))
+            self.rect.y = int(math.floor(self.motion.fields["y"][slot] + 0.5))
+        self.motion.rect_dirty[slot] = False
+
+    def detach_motion(self):
+        """
+        Release this instance's slot in its object type's motion arrays,
+        once the instance has been removed from the object type.
+
+        The instance keeps a private copy of its motion state, so it can
+        still be read by anything that holds a reference to it.
+        """
+        if self.motion is not self.kind.motion:
+            return
+        old_motion = self.motion
+        old_slot = self.motion_slot
+        private_motion = MotionArrays(capacity=1)
+        new_slot = private_motion.allocate(self)
+        for field in MotionArrays.FIELDS:
+            private_motion.fields[field][new_slot] = old_motion.fields[field][old_slot]
+        private_motion.root[new_slot] = old_motion.root[old_slot]
+        old_motion.release(old_slot)
+        self._bind_motion(private_motion, new_slot)
+
     @property
     def visible(self):
         """Get and set the instance's visibility."""
@@ -342,6 +463,8 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
         :rtype: (int, int)
         """
         self.debug("get_center_point():")
+        if self.motion.rect_dirty[self.motion_slot]:
+            self.sync_rect()
         center_xy = (self.rect.x + self.rect.width / 2.0,
                      self.rect.y + self.rect.height / 2.0)
         return center_xy
@@ -354,6 +477,10 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
         events for boundary collisions or outside-of-room positions.  Make
         friction and/or gravity changes to speed and/or direction for the next
         update().
+
+        :py:meth:`~pygame_maker.actors.object_type.CollideableObjectType.update`
+        does the same for all of a type's instances at once, so this is only
+        needed to move a single instance.
         """
         self.debug("update():")
         event_queued = None
@@ -366,8 +493,7 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
         if self.symbols["parent"] is None and self.speed > 0.0:
             self.position[0] += self.symbols['hspeed']
             self.position[1] += self.symbols['vspeed']
-            self.rect.x = int(math.floor(self.position[0] + 0.5))
-            self.rect.y = int(math.floor(self.position[1] + 0.5))
+            self.sync_rect()
             event_queued = self._detect_boundary_events()
             self.debug("  {} inst {} new position: {} ({})".
                        format(self.kind.name, self.inst_id, self.position, self.rect))
@@ -384,9 +510,9 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
         # apply forces for next update
         self._apply_gravity()
         self._apply_friction()
-        # transmit outside_room or intersect_boundary event last
+        # transmit outside_room or intersect_boundary event last (it was
+        #  queued by _detect_boundary_events())
         if event_queued is not None:
-            self.game_engine.event_engine.queue_event(event_queued)
             self.debug("  {} inst {} transmitting {} event".format(self.kind.name,
                                                                    self.inst_id, event_queued))
             self.game_engine.event_engine.transmit_event(event_queued.name)
@@ -410,7 +536,7 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
             # print("inst {} hit x bound".format(self.inst_id))
         if ((self.rect.y <= 0 <= (self.rect.y + self.rect.height)) or
                 (self.rect.y <= self.screen_dims[1] <=
-                 (self.rect.y + self.rect.width)) and in_x_bounds):
+                 (self.rect.y + self.rect.height)) and in_x_bounds):
             # queue and handle boundary collision event
             if event_queued is None:
                 event_queued = event.OtherEvent("intersect_boundary", {"type": self.kind,
@@ -483,6 +609,14 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
     def _apply_gravity(self):
         # Adjust speed and direction using value and direction of gravity.
         self.debug("_apply_gravity():")
+        if self.gravity != 0.0:
+            gravity_xy = get_vector_xy_from_velocity(self.gravity, self.gravity_direction)
+            new_hspeed = self.hspeed + gravity_xy[0]
+            new_vspeed = self.vspeed + gravity_xy[1]
+            self.symbols['hspeed'] = new_hspeed
+            self.symbols['vspeed'] = new_vspeed
+            self.symbols['speed'] = math.hypot(new_hspeed, new_vspeed)
+            self.symbols['direction'] = math.degrees(math.atan2(new_hspeed, -new_vspeed)) % 360.0
 
     def _apply_friction(self):
         # Adjust speed based on friction value.
@@ -497,17 +631,37 @@ class ObjectInstance(SimpleObjectInstance, pygame.sprite.DirtySprite):
         """
         Set the current subimage, source_rect, and collision mask (and possibly
         a radius)
+
+        The subimage is shared with other instances, replacing any copy made
+        by :py:meth:`get_own_image`.
         """
         subimage_info = self.kind.get_image(self.symbols["subimage_number"])
         self.image, self.mask, self.source_rect, radius = subimage_info
+        self.owns_image = False
         if self.image is not None:
             self.debug("Setting subimage {}".format(self.symbols["subimage_number"]))
-            image_rect = self.image.get_rect()
-            self.rect.width = image_rect.width
-            self.rect.height = image_rect.height
+            self.rect.width = self.image.get_width()
+            self.rect.height = self.image.get_height()
             if radius is not None:
                 # disk collision type; get the predefined radius for collisions
                 self.radius = radius
+            self._store_motion_extents()
+
+    def get_own_image(self):
+        """
+        Return this instance's image, first copying it if it's shared with
+        other instances.
+
+        Call this before changing the image's pixels (E.G. to tint it), so
+        other instances showing the same subimage aren't changed too.
+
+        :return: The instance's own image, or None if it has no image
+        :rtype: None | :py:class:`pygame.Surface`
+        """
+        if self.image is not None and not self.owns_image:
+            self.image = self.image.copy()
+            self.owns_image = True
+        return self.image
 
     def aim_toward_point(self, pointxy):
         """
@@ -9,11 +9,15 @@ Pygame maker object type resource module.
 import math
 import re
 import logging
+import numpy as np
 import pygame
 import yaml
 from pygame_maker.support import logging_object
 import pygame_maker.actors.simple_object_instance as simple_object_instance
 import pygame_maker.actors.object_instance as object_instance
+import pygame_maker.actors.motion as motion
+import pygame_maker.actors.instance_hierarchy as instance_hierarchy
+import pygame_maker.actors.spatial_index as spatial_index
 import pygame_maker.actors.object_sprite as object_sprite
 from pygame_maker.events import event
 from pygame_maker.actions import action
@@ -176,6 +180,8 @@ class ObjectType(logging_object.LoggingObject):
     instances of a particular kind of object.
     """
     DEFAULT_OBJECT_PREFIX = "obj_"
+    #: By default, destroyed instances aren't kept for re-use
+    DEFAULT_POOL_SIZE = 0
     EVENT_NAME_OBJECT_HASH = {
         "outside_room": event.OtherEvent,
         "intersect_boundary": event.OtherEvent,
@@ -186,6 +192,7 @@ class ObjectType(logging_object.LoggingObject):
         "create": event.ObjectStateEvent,
         "create_child": event.ObjectStateEvent,
         "image_loaded": event.OtherEvent,
+        "animation_end": event.OtherEvent,
         "destroy": event.ObjectStateEvent,
         "destroy_child": event.ObjectStateEvent,
         "destroy_parent": event.ObjectStateEvent,
@@ -223,6 +230,8 @@ class ObjectType(logging_object.LoggingObject):
         :rtype: dict
         """
         kwargs = {"event_action_sequences": {}}
+        if "pool_size" in list(obj_yaml.keys()):
+            kwargs["pool_size"] = int(obj_yaml["pool_size"])
         if "events" in list(obj_yaml.keys()):
             # print("Found '{}', passing {} to load..".format(kwarg, obj_yaml[kwarg]))
             for ev_seq in obj_yaml["events"]:
@@ -268,6 +277,7 @@ class ObjectType(logging_object.LoggingObject):
 
             obj_type1:
               - obj_name1:
+                  pool_size: <int>
                   events:
                     <event1_name>:
                       <yaml representation for event action sequence>
@@ -283,7 +293,9 @@ class ObjectType(logging_object.LoggingObject):
         For a description of the action sequence YAML format, see
         :py:meth:`~pygame_maker.actions.action_sequence.ActionSequence.load_sequence_from_yaml_obj`
 
-        Each obj_typeN must match a registered object type's name.
+        Each obj_typeN must match a registered object type's name.  The
+        optional pool_size keeps up to that many destroyed instances for
+        re-use by new instances of the same type.
 
         :param yaml_stream: A file or stream containing the YAML string data
         :type yaml_stream: file-like
@@ -323,6 +335,8 @@ class ObjectType(logging_object.LoggingObject):
               (e.g. a platform) [False]
             * depth (int): Which layer object instances will be placed into [0]
             * sprite (str): Name of a sprite resource used as the image [None]
+            * pool_size (int): Maximum number of destroyed instances kept for
+              re-use [0]
         """
         super(ObjectType, self).__init__(type(self).__name__)
         self.debug("New object type {} named '{}', with args {}".format(
@@ -341,6 +355,16 @@ class ObjectType(logging_object.LoggingObject):
         self.group = []
         #: A list of instances to delete following update()
         self.instance_delete_list = set()
+        #: The maximum number of destroyed instances kept for re-use
+        self.pool_size = self.DEFAULT_POOL_SIZE
+        if kwargs and "pool_size" in kwargs:
+            self.pool_size = max(0, int(kwargs["pool_size"]))
+        #: Destroyed instances waiting to be re-used
+        self.instance_pool = []
+        #: The number of new instances that re-used a pooled instance
+        self.pool_hits = 0
+        #: The number of new instances created while the pool was empty
+        self.pool_misses = 0
         #: A mapping of event regexs to handler methods
         self.handler_table = {
             re.compile(r"^alarm(\d{1,2})$"):    self.handle_alarm_event,
@@ -348,8 +372,8 @@ class ObjectType(logging_object.LoggingObject):
             re.compile("^mouse_(.*)$"):         self.handle_mouse_event,
             re.compile("^(parent_|child_)?collision_(.*)$"):     self.handle_collision_event,
             re.compile("^([^_]+)_step$"):       self.handle_step_event,
-            re.compile("^outside_room$"):       self.handle_instance_event,
-            re.compile("^intersect_boundary$"): self.handle_instance_event,
+            re.compile("^(parent_|child_)?outside_room$"):       self.handle_instance_event,
+            re.compile("^(parent_|child_)?intersect_boundary$"): self.handle_instance_event,
             re.compile("^create$"):             self.handle_create_event,
             re.compile("^destroy$"):            self.handle_destroy_event,
             re.compile("^draw$"):               self.draw,
@@ -400,25 +424,29 @@ class ObjectType(logging_object.LoggingObject):
         self.instance_list.append(new_instance)
         return new_instance
 
-    def create_instance(self, screen, settings=None, **kwargs):
+    def spawn_instance(self, screen, settings=None, **kwargs):
         """
-        Create a new instance of this object type.
+        Create a new instance of this object type, without queuing its
+        creation events.
 
-        Every instance is assigned a unique ID, and a create event is queued
-        to be passed on to the new instance.
+        Every instance is assigned a unique ID.  Used by
+        :py:meth:`create_instance`, and by
+        :py:class:`~pygame_maker.actors.instance_lifecycle.InstanceLifecycle`
+        to create many instances before transmitting their create events
+        together.
 
-        :param screen: The surface the instance will be drawn upon.  The
-            instance can use this surface's width and height parameters to
-            detect boundary collision events, which are queued in the event
-            engine
+        :param screen: The surface the instance will be drawn upon
         :type screen: :py:class:`pygame.Surface`
         :param settings: A hash of settings to be applied.  See kwargs entry
             in :py:meth:`~pygame_maker.actors.object_instance.ObjectInstance.__init__`
         :type settings: dict
         :param kwargs: Named settings can be passed in, in addition to
             the settings hash
+        :return: A tuple containing the new instance and its parent instance
+            (or None)
+        :rtype: tuple
         """
-        self.debug("create_instance(screen={}, settings={}, kwargs={}):".
+        self.debug("spawn_instance(screen={}, settings={}, kwargs={}):".
                    format(screen, settings, kwargs))
         self.info("  Create instance of {} with args {}, {}".format(self.name, settings, kwargs))
         instance_properties = {}
@@ -432,24 +460,108 @@ class ObjectType(logging_object.LoggingObject):
             # child instance has been created
             parent_inst = instance_properties["parent"]
             del instance_properties["parent"]
-        new_instance = self.make_new_instance(screen, instance_properties)
+        if self.instance_pool:
+            # re-use a destroyed instance
+            new_instance = self.instance_pool.pop()
+            new_instance.recycle((screen.get_width(), screen.get_height()), self._id,
+                                 instance_properties)
+            self.add_instance(new_instance)
+            self.pool_hits += 1
+        else:
+            if self.pool_size > 0:
+                self.pool_misses += 1
+            new_instance = self.make_new_instance(screen, instance_properties)
         if parent_inst is not None:
             # connect parent and child instances
             new_instance.set_parent_instance(parent_inst)
         self._id += 1
-        # queue and transmit the creation event for the new instance
+        return new_instance, parent_inst
+
+    def queue_create_events(self, new_instance, parent_inst=None):
+        """
+        Queue the creation event for a new instance, and the create_child
+        event for its parent (if any).  The caller is responsible for
+        transmitting them.
+
+        :param new_instance: The newly created instance
+        :type new_instance: :py:class:`~pygame_maker.actors.simple_object_instance.SimpleObjectInstance`
+        :param parent_inst: The new instance's parent, or None
+        :type parent_inst: None | :py:class:`~pygame_maker.actors.simple_object_instance.SimpleObjectInstance`
+        """
         self.game_engine.event_engine.queue_event(
             self.EVENT_NAME_OBJECT_HASH["create"]("create", {"type": self,
                                                              "instance": new_instance}))
-        self.game_engine.event_engine.transmit_event('create')
         if parent_inst is not None:
-            # queue and transmit the create_child instance for the instance's parent
             self.game_engine.event_engine.queue_event(self.EVENT_NAME_OBJECT_HASH["create_child"](
                 "create_child", {"type": parent_inst.kind, "instance": parent_inst,
                                  "child_type": self}))
+
+    def create_instance(self, screen, settings=None, **kwargs):
+        """
+        Create a new instance of this object type.
+
+        Every instance is assigned a unique ID, and a create event is queued
+        and transmitted to the new instance.
+
+        :param screen: The surface the instance will be drawn upon.  The
+            instance can use this surface's width and height parameters to
+            detect boundary collision events, which are queued in the event
+            engine
+        :type screen: :py:class:`pygame.Surface`
+        :param settings: A hash of settings to be applied.  See kwargs entry
+            in :py:meth:`~pygame_maker.actors.object_instance.ObjectInstance.__init__`
+        :type settings: dict
+        :param kwargs: Named settings can be passed in, in addition to
+            the settings hash
+        """
+        self.debug("create_instance(screen={}, settings={}, kwargs={}):".
+                   format(screen, settings, kwargs))
+        new_instance, parent_inst = self.spawn_instance(screen, settings, **kwargs)
+        # queue and transmit the creation event for the new instance, and the
+        #  create_child event for the instance's parent
+        self.queue_create_events(new_instance, parent_inst)
+        self.game_engine.event_engine.transmit_event('create')
+        if parent_inst is not None:
             self.game_engine.event_engine.transmit_event('create_child')
         return new_instance
 
+    def add_instance(self, instance):
+        """
+        Add an existing instance (E.G. one taken from the pool) to this object
+        type's instances.
+
+        :param instance: The instance to add
+        :type instance: :py:class:`~pygame_maker.actors.simple_object_instance.SimpleObjectInstance`
+        """
+        self.instance_list.append(instance)
+
+    def release_to_pool(self, doomed_instances):
+        """
+        Keep removed instances for re-use, up to the pool size.
+
+        :param doomed_instances: Instances that were just removed
+        :type doomed_instances: iterable
+        """
+        for doomed_instance in doomed_instances:
+            if len(self.instance_pool) >= self.pool_size:
+                break
+            self.instance_pool.append(doomed_instance)
+
+    def get_pool_stats(self):
+        """
+        Report how well the instance pool is working.
+
+        :return: A dict with the pool's ``size``, ``available`` instance count,
+            ``hits`` and ``misses``
+        :rtype: dict
+        """
+        return {
+            "size": self.pool_size,
+            "available": len(self.instance_pool),
+            "hits": self.pool_hits,
+            "misses": self.pool_misses,
+        }
+
     def get_instances(self):
         """
         Return a list of all instances of the ObjectType.
@@ -482,8 +594,12 @@ class ObjectType(logging_object.LoggingObject):
         a subclass's update() method after updating its instances.
         """
         if len(self.instance_delete_list) > 0:
-            for doomed_instance in self.instance_delete_list:
-                self.instance_list.remove(doomed_instance)
+            # compact the list in one pass, instead of searching it once per
+            #  removed instance
+            self.instance_list = [inst for inst in self.instance_list
+                                  if inst not in self.instance_delete_list]
+            if self.pool_size > 0:
+                self.release_to_pool(self.instance_delete_list)
             self.instance_delete_list = set()
 
     def draw(self, in_event):
@@ -648,6 +764,18 @@ class ObjectType(logging_object.LoggingObject):
         self.debug("keys():")
         return list(self.event_action_sequences.keys())
 
+    def handles_event(self, event_name):
+        """
+        Return whether this object type has an action sequence for the named
+        event, so that events nobody handles needn't be queued.
+
+        :param event_name: Name of an event
+        :type event_name: str
+        :return: True if the event is handled by this object type
+        :rtype: bool
+        """
+        return event_name in self.event_action_sequences
+
     def __getitem__(self, itemname):
         """
         ObjectType instances support obj[event_name] to directly access the
@@ -758,6 +886,13 @@ class CollideableObjectType(ManagerObjectType):
             depth: <int>
             sprite: <sprite resource name>
             blend_mode: <int>
+            gravity: <float>
+            gravity_direction: <float>
+            friction: <float>
+            image_speed: <float>
+            animation_frames: [<int>, ...]
+            boundary_events: always|transition
+            pool_size: <int>
             events:
               <event1_name>:
                 <yaml representation for event action sequence>
@@ -780,6 +915,27 @@ class CollideableObjectType(ManagerObjectType):
     DEFAULT_SPRITE_RESOURCE = None
     #: Default blend mode
     DEFAULT_BLEND_MODE = 0
+    #: By default, new instances aren't pulled by gravity
+    DEFAULT_GRAVITY = 0.0
+    #: Default gravity direction (down)
+    DEFAULT_GRAVITY_DIRECTION = 180.0
+    #: By default, new instances don't slow down
+    DEFAULT_FRICTION = 0.0
+    #: By default, new instances aren't animated
+    DEFAULT_IMAGE_SPEED = 0.0
+    #: By default, animations show every subimage in order
+    DEFAULT_ANIMATION_FRAMES = None
+    #: Boundary events are sent on every frame an instance is at or beyond
+    #: the room's edge
+    BOUNDARY_EVENTS_ALWAYS = "always"
+    #: Boundary events are only sent on the frame an instance reaches or
+    #: leaves the room's edge
+    BOUNDARY_EVENTS_TRANSITION = "transition"
+    #: By default, boundary events are sent every frame
+    DEFAULT_BOUNDARY_EVENTS = BOUNDARY_EVENTS_ALWAYS
+    #: The fewest instances whose step event code blocks are run once for
+    #: all of them, instead of once per instance
+    BATCH_MIN_INSTANCES = 2
 
     @classmethod
     def gen_kwargs_from_yaml_obj(cls, obj_name, obj_yaml, game_engine):
@@ -791,6 +947,12 @@ class CollideableObjectType(ManagerObjectType):
             "depth": CollideableObjectType.DEFAULT_DEPTH,
             "sprite": CollideableObjectType.DEFAULT_SPRITE_RESOURCE,
             "blend_mode": CollideableObjectType.DEFAULT_BLEND_MODE,
+            "gravity": CollideableObjectType.DEFAULT_GRAVITY,
+            "gravity_direction": CollideableObjectType.DEFAULT_GRAVITY_DIRECTION,
+            "friction": CollideableObjectType.DEFAULT_FRICTION,
+            "image_speed": CollideableObjectType.DEFAULT_IMAGE_SPEED,
+            "animation_frames": CollideableObjectType.DEFAULT_ANIMATION_FRAMES,
+            "boundary_events": CollideableObjectType.DEFAULT_BOUNDARY_EVENTS,
         })
         if "visible" in list(obj_yaml.keys()):
             kwargs["visible"] = (obj_yaml["visible"] is True)
@@ -802,6 +964,15 @@ class CollideableObjectType(ManagerObjectType):
             kwargs["sprite"] = str(obj_yaml["sprite"])
         if "blend_mode" in obj_yaml.keys():
             kwargs["blend_mode"] = str(obj_yaml["blend_mode"])
+        for force in ("gravity", "gravity_direction", "friction"):
+            if force in obj_yaml.keys():
+                kwargs[force] = float(obj_yaml[force])
+        if "image_speed" in obj_yaml.keys():
+            kwargs["image_speed"] = float(obj_yaml["image_speed"])
+        if obj_yaml.get("animation_frames"):
+            kwargs["animation_frames"] = [int(frame) for frame in obj_yaml["animation_frames"]]
+        if "boundary_events" in obj_yaml.keys():
+            kwargs["boundary_events"] = str(obj_yaml["boundary_events"])
         return kwargs
 
     def __init__(self, object_name, game_engine, **kwargs):
@@ -823,6 +994,18 @@ class CollideableObjectType(ManagerObjectType):
               (e.g. a platform) [False]
             * depth (int): Which layer object instances will be placed into [0]
             * sprite (str): Name of a sprite resource used as the image [None]
+            * gravity (float): The gravity new instances start with [0.0]
+            * gravity_direction (float): The direction of new instances'
+              gravity in degrees [180.0]
+            * friction (float): The friction new instances start with [0.0]
+            * image_speed (float): The number of animation frames new
+              instances advance each game frame; negative speeds play the
+              animation backward [0.0]
+            * animation_frames (list): The subimage numbers shown by the
+              animation, in order [None, meaning every subimage]
+            * boundary_events (str): "always" to send intersect_boundary and
+              outside_room events every frame, or "transition" to send them
+              only when an instance's boundary state changes ["always"]
         """
         super(CollideableObjectType, self).__init__(object_name, game_engine, **kwargs)
         self.sprite_resource = self.DEFAULT_SPRITE_RESOURCE
@@ -833,7 +1016,27 @@ class CollideableObjectType(ManagerObjectType):
         self.solid = self.DEFAULT_SOLID
         self.depth = self.DEFAULT_DEPTH
         self.group = pygame.sprite.LayeredDirty()
+        #: Positions and velocities of all instances, for moving them at once
+        self.motion = motion.MotionArrays()
+        #: The parent/child trees below this type's instances, flattened
+        self.hierarchy = instance_hierarchy.InstanceHierarchy()
+        #: Finds this type's instances by location
+        self.spatial_grid = spatial_index.SpatialGrid(self.motion)
         self.blend_mode = self.DEFAULT_BLEND_MODE
+        #: The gravity new instances start with
+        self.gravity = self.DEFAULT_GRAVITY
+        #: The direction of new instances' gravity
+        self.gravity_direction = self.DEFAULT_GRAVITY_DIRECTION
+        #: The friction new instances start with
+        self.friction = self.DEFAULT_FRICTION
+        #: The image speed new instances start with
+        self.image_speed = self.DEFAULT_IMAGE_SPEED
+        #: The subimage numbers shown by the animation, or None to show every
+        #: subimage in order
+        self.animation_frames = self.DEFAULT_ANIMATION_FRAMES
+        #: Whether boundary events are sent every frame, or only when an
+        #: instance's boundary state changes
+        self.boundary_events = self.DEFAULT_BOUNDARY_EVENTS
         # default draw action sequence draws the object's sprite
         self["draw"] = action_sequence.ActionSequence()
         self["draw"].append_action(action.DrawAction("draw_self"))
@@ -853,6 +1056,23 @@ class CollideableObjectType(ManagerObjectType):
                         self.sprite_resource = assigned_sprite
                 if kwarg == "blend_mode":
                     self.blend_mode = int(kwargs["blend_mode"])
+                if kwarg == "gravity":
+                    self.gravity = float(kwargs["gravity"])
+                if kwarg == "gravity_direction":
+                    self.gravity_direction = float(kwargs["gravity_direction"]) % 360.0
+                if kwarg == "friction":
+                    self.friction = float(kwargs["friction"])
+                if kwarg == "image_speed":
+                    self.image_speed = float(kwargs["image_speed"])
+                if (kwarg == "animation_frames") and kwargs[kwarg]:
+                    self.animation_frames = [int(frame) for frame in kwargs[kwarg]]
+                if kwarg == "boundary_events":
+                    if kwargs[kwarg] not in (self.BOUNDARY_EVENTS_ALWAYS,
+                                             self.BOUNDARY_EVENTS_TRANSITION):
+                        raise ObjectTypeException(
+                            "Unknown boundary event mode '{}'".format(kwargs[kwarg]),
+                            self.error)
+                    self.boundary_events = kwargs[kwarg]
 
         # print("Finished setup of {}".format(self.name))
 
@@ -879,25 +1099,44 @@ class CollideableObjectType(ManagerObjectType):
         yaml_str += "    depth: {:d}\n".format(self.depth)
         yaml_str += "    sprite: {}\n".format(self.sprite_resource.name)
         yaml_str += "    blend_mode: {:d}\n".format(self.blend_mode)
+        if self.gravity != self.DEFAULT_GRAVITY:
+            yaml_str += "    gravity: {}\n".format(self.gravity)
+            yaml_str += "    gravity_direction: {}\n".format(self.gravity_direction)
+        if self.friction != self.DEFAULT_FRICTION:
+            yaml_str += "    friction: {}\n".format(self.friction)
+        if self.image_speed != self.DEFAULT_IMAGE_SPEED:
+            yaml_str += "    image_speed: {}\n".format(self.image_speed)
+        if self.animation_frames:
+            yaml_str += "    animation_frames: {}\n".format(self.animation_frames)
+        if self.boundary_events != self.DEFAULT_BOUNDARY_EVENTS:
+            yaml_str += "    boundary_events: {}\n".format(self.boundary_events)
+        if self.pool_size > 0:
+            yaml_str += "    pool_size: {:d}\n".format(self.pool_size)
         yaml_str += "    events:\n"
         for event_name in self.event_action_sequences:
             yaml_str += "      {}:\n".format(event_name)
             yaml_str += self.event_action_sequences[event_name].to_yaml(8)
         return yaml_str
 
-    def get_image(self, subimage_number=0):
+    def get_image(self, subimage_number=0, copy=False):
         """
-        Called by instances of this ObjectType, to get a new copy of
-        the sprite resource's image.
+        Called by instances of this ObjectType, to get one of the sprite
+        resource's subimages.
 
         Load the image when the first instance using this image is created.
         Also, handle the collision type and create a collision mask.
 
-        :param subimage_number: Which subimage to copy
+        The subimage is shared by every instance showing it, so it must not
+        be changed unless a copy was requested.
+
+        :param subimage_number: Which subimage to get
         :type subimage_number: int
-        :return: A tuple containing a new pygame image (copied from the
-            ObjectSprite resource), a collision mask, a bounding box, and
-            possibly an image radius (for disk collision masks)
+        :param copy: Return a new copy of the subimage, instead of the shared
+            subimage
+        :type copy: bool
+        :return: A tuple containing a pygame image (from the ObjectSprite
+            resource), a collision mask, a bounding box, and possibly an
+            image radius (for disk collision masks)
         :rtype: tuple(:py:class:`pygame.Surface`, :py:class:`pygame.Mask`,
             :py:class:`pygame.Rect`, None|int)
         """
@@ -913,8 +1152,8 @@ class CollideableObjectType(ManagerObjectType):
                                                                  "sprite": self.sprite_resource})
                 )
                 self.info("  Queued 'image_loaded' event")
-            # return an image (a copy of the subimage), a mask and possibly
-            # radius from the sprite resource
+            # return an image (the subimage, or a copy of it), a mask and
+            # possibly radius from the sprite resource
             snum = subimage_number
             if subimage_number >= self.sprite_resource.subimage_info["count"]:
                 self.warn("{}: An instance requested a subimage number ({}) out of range (max {})".
@@ -922,7 +1161,9 @@ class CollideableObjectType(ManagerObjectType):
                                  self.sprite_resource.subimage_info["count"]))
                 # select the last subimage (counting from 0)
                 snum = self.sprite_resource.subimage_info["count"] - 1
-            image = self.sprite_resource.subimages[snum].copy()
+            image = self.sprite_resource.subimages[snum]
+            if copy:
+                image = image.copy()
             mask = self.sprite_resource.subimage_info["masks"][snum]
             bounding_box = self.sprite_resource.subimage_info["bbox_rects"][snum]
             radius = self.sprite_resource.subimage_info["radii"][snum]
@@ -930,6 +1171,18 @@ class CollideableObjectType(ManagerObjectType):
         else:
             return None, None, None, None
 
+    def add_instance(self, instance):
+        """
+        Add an existing instance (E.G. one taken from the pool) to this object
+        type's sprite group.
+
+        :param instance: The instance to add
+        :type instance: :py:class:`~pygame_maker.actors.object_instance.ObjectInstance`
+        """
+        #pylint: disable=no-member
+        self.group.add(instance)
+        #pylint: enable=no-member
+
     def get_instances(self):
         """
         Return a list of all instances of the CollideableObjectType.
@@ -954,6 +1207,7 @@ class CollideableObjectType(ManagerObjectType):
         """
         self.debug("collision_check(other_obj_types={}):".format(other_obj_types))
         collision_types_queued = set()
+        self.sync_rects()
         for other_obj in other_obj_types:
             # other_obj.group = other_obj.group
             if  not other_obj.group:
@@ -961,6 +1215,7 @@ class CollideableObjectType(ManagerObjectType):
             if (len(self.group) == 1) and self.name == other_obj.name:
                 # skip self collision detection if there's only one sprite
                 continue
+            other_obj.sync_rects()
             collision_map = pygame.sprite.groupcollide(
                 self.group, other_obj.group, False, False, collided=sprite_collision_test)
             for collider in list(collision_map.keys()):
@@ -980,6 +1235,7 @@ class CollideableObjectType(ManagerObjectType):
                         adj_y = math.floor(distance * collision_normal[1] + 0.5)
                         collider.position.x += adj_x
                         collider.position.y += adj_y
+                        collider.sync_rect()
                 collision_name = "collision_{}".format(other_obj.name)
                 if collision_name not in collision_types_queued:
                     collision_types_queued.add(collision_name)
@@ -1030,15 +1286,151 @@ class CollideableObjectType(ManagerObjectType):
         """
         self.debug("update():")
         if self.group:
-            #pylint: disable=no-member
-            self.group.update()
-            #pylint: enable=no-member
+            self.update_motion()
+            self.update_animation()
         # after all instances update(), check the delete list to see which
         #  ones should be removed and remove them
         if self.instance_delete_list:
             self.group.remove(self.instance_delete_list)
+            if self.pool_size > 0:
+                self.release_to_pool(self.instance_delete_list)
+            for doomed_instance in self.instance_delete_list:
+                doomed_instance.detach_motion()
             self.instance_delete_list = set()
 
+    def update_motion(self):
+        """
+        Move all instances at once, using the motion arrays.
+
+        Instances without a parent are moved by their horizontal and vertical
+        speed and checked against the room boundaries, then child instances
+        are placed relative to their parents.  The resulting
+        ``intersect_boundary``, ``outside_room`` and child and parent boundary
+        events are each transmitted once, after every instance has moved.
+        Events are only queued for object types with an action sequence for
+        them, and in the "transition" :py:attr:`boundary_events` mode only
+        when an instance's boundary code changed.  Finally, gravity and
+        friction are applied for the next update.  Instances destroyed this
+        frame are left alone.
+        """
+        motion_arrays = self.motion
+        live = self._get_live_mask()
+        moved_slots = motion_arrays.integrate(live)
+        # place all descendants of parentless instances
+        hierarchy_version = simple_object_instance.SimpleObjectInstance.hierarchy_version
+        if self.hierarchy.version != hierarchy_version:
+            self.hierarchy.build(
+                [motion_arrays.instances[slot]
+                 for slot in motion_arrays.get_root_slots(live).tolist()
+                 if motion_arrays.instances[slot].symbols["children"]],
+                hierarchy_version)
+        boundary_codes = {}
+        queued_names = set()
+        # the boundary codes are needed for this type's own events, and
+        #  for the events passed on to child instances
+        if len(moved_slots) > 0 and (self.handles_event("intersect_boundary") or
+                                     self.handles_event("outside_room") or
+                                     self.hierarchy.instances):
+            rect_x, rect_y = motion_arrays.get_rect_positions(moved_slots)
+            codes = motion_arrays.get_boundary_codes(moved_slots, rect_x, rect_y)
+            if self.boundary_events == self.BOUNDARY_EVENTS_TRANSITION:
+                codes = motion_arrays.take_boundary_transitions(moved_slots, codes)
+            boundary_codes = dict([(slot, code) for slot, code
+                                   in zip(moved_slots.tolist(), codes.tolist())
+                                   if code != motion_arrays.NO_BOUNDARY])
+        # moved instances, and any whose position was set since the last
+        #  update, get their rects now
+        self.sync_rects()
+        for slot in sorted(boundary_codes):
+            if boundary_codes[slot] == motion_arrays.INTERSECT_BOUNDARY:
+                event_name = "intersect_boundary"
+            else:
+                event_name = "outside_room"
+            if not self.handles_event(event_name):
+                continue
+            self.game_engine.event_engine.queue_event(self.EVENT_NAME_OBJECT_HASH[event_name](
+                event_name, {"type": self, "instance": motion_arrays.instances[slot]}))
+            queued_names.add(event_name)
+        event_names_queued = self.hierarchy.update(self.game_engine.event_engine,
+                                                   boundary_codes)
+        # apply forces for next update
+        motion_arrays.apply_gravity(live)
+        motion_arrays.apply_friction(live)
+        for event_name in sorted(event_names_queued):
+            self.game_engine.event_engine.transmit_event(event_name)
+        # transmit outside_room or intersect_boundary events last
+        for event_name in ("intersect_boundary", "outside_room"):
+            if event_name in queued_names:
+                self.game_engine.event_engine.transmit_event(event_name)
+
+    def _get_live_mask(self):
+        # Return the mask of motion array slots in use, leaving out instances
+        #  destroyed this frame.
+        skip_slots = [inst.motion_slot for inst in self.instance_delete_list
+                      if inst.motion is self.motion]
+        return self.motion.get_live_mask(skip_slots)
+
+    def get_animation_frames(self):
+        """
+        Return the subimage numbers shown by this type's animation.
+
+        :return: The subimage numbers, in order, or an empty list if the
+            type has no sprite or its image isn't loaded yet
+        :rtype: list
+        """
+        if self.animation_frames:
+            return self.animation_frames
+        if self.sprite_resource is None or self.sprite_resource.image is None:
+            return []
+        return list(range(self.sprite_resource.subimage_info["count"]))
+
+    def update_animation(self):
+        """
+        Advance the animation of all instances at once, using the motion
+        arrays.
+
+        Each instance's image index moves forward by its image speed.  Only
+        instances reaching a new frame change their subimage, and
+        instances that play the whole animation receive an
+        ``animation_end`` event, transmitted once after all have advanced.
+        Instances destroyed this frame are left alone.
+        """
+        frames = self.get_animation_frames()
+        changed_slots, new_frames, ended_slots = self.motion.advance_animation(
+            self._get_live_mask(), len(frames))
+        for slot, frame in zip(changed_slots.tolist(), new_frames.tolist()):
+            self.motion.instances[slot].subimage_number = frames[frame]
+        if len(ended_slots) > 0:
+            for slot in ended_slots.tolist():
+                self.game_engine.event_engine.queue_event(
+                    self.EVENT_NAME_OBJECT_HASH["animation_end"](
+                        "animation_end", {"type": self,
+                                          "instance": self.motion.instances[slot]}))
+            self.game_engine.event_engine.transmit_event("animation_end")
+
+    def sync_rects(self):
+        """
+        Copy instance positions that changed since the last call into their
+        rects, rounded to the nearest pixel.
+
+        Position changes only mark an instance's rect as out of date, so that
+        repeated changes in the same frame cost nothing extra.  This brings
+        the rects up to date all at once, and is called before rects are
+        used: when instances are moved, checked for collisions, or drawn.
+        Child instances' rects are placed relative to their parent's when the
+        parent moves, so they're skipped.
+        """
+        motion_arrays = self.motion
+        dirty_slots = motion_arrays.take_dirty_root_slots(motion_arrays.get_live_mask())
+        if len(dirty_slots) == 0:
+            return
+        rect_x, rect_y = motion_arrays.get_rect_positions(dirty_slots)
+        for slot, new_x, new_y in zip(dirty_slots.tolist(), rect_x.tolist(),
+                                      rect_y.tolist()):
+            inst = motion_arrays.instances[slot]
+            inst.rect.x = new_x
+            inst.rect.y = new_y
+
     def draw(self, in_event):
         """
         Respond to draw events.
@@ -1048,6 +1440,7 @@ class CollideableObjectType(ManagerObjectType):
         """
         self.debug("draw():")
         if self.group and self.visible:
+            self.sync_rects()
             for an_action in self.event_action_sequences["draw"].get_next_action():
                 if an_action.name == "draw_self":
                     # The normal, default action: each object instance draws
@@ -1073,6 +1466,10 @@ class CollideableObjectType(ManagerObjectType):
 
         * intersect_boundary
         * outside_room
+        * child_intersect_boundary
+        * child_outside_room
+        * parent_intersect_boundary
+        * parent_outside_room
 
         :param in_event: The event generated by an ObjectInstance of this type
         :type in_event: :py:class:`~pygame_maker.events.event.Event`
@@ -1081,6 +1478,79 @@ class CollideableObjectType(ManagerObjectType):
         if (in_event["type"] == self) and (in_event["instance"] in self.get_instances()):
             in_event["instance"].execute_action_sequence(in_event)
 
+    def handle_step_event(self, in_event):
+        """
+        Execute the action sequence associated with the supplied step event
+        on every instance.
+
+        When the action sequence only runs code blocks that do arithmetic on
+        motion symbols (see
+        :py:meth:`~pygame_maker.logic.code_block.CodeBlock.to_python_batch`),
+        each code block runs once for all instances through the motion
+        arrays.  Otherwise, or from the first code block that can't run that
+        way, the actions run for each instance in turn.
+
+        :param in_event: The step event
+        :type in_event: :py:class:`~pygame_maker.events.event.Event`
+        """
+        self.debug("handle_step_event(in_event={}):".format(in_event))
+        instances = [inst for inst in self.get_instances()
+                     if inst not in self.instance_delete_list]
+        batch_actions = self._get_batch_actions(in_event, instances)
+        if batch_actions is None:
+            super(CollideableObjectType, self).handle_step_event(in_event)
+            return
+        batch_scope = motion.MotionBatchScope(
+            self.motion, np.array([inst.motion_slot for inst in instances], dtype=int),
+            self.game_engine.language_engine.global_symbol_table)
+        for action_idx, (_, batch_code) in enumerate(batch_actions):
+            if not batch_scope.run(*batch_code):
+                self.debug("  Running {} step actions for each instance".format(
+                    len(batch_actions) - action_idx))
+                for inst in instances:
+                    for an_action, _ in batch_actions[action_idx:]:
+                        inst.forward_action(an_action, in_event)
+                return
+
+    def _get_batch_actions(self, in_event, instances):
+        # Return the actions in an event's action sequence, with their code
+        #  blocks' run_batch() functions (see LanguageEngine.get_batch_code()),
+        #  or None unless every action runs a code block for each instance
+        #  that can run in batches.  Code blocks are registered as
+        #  execute_code() would.
+        #
+        # :param in_event: The event to be handled
+        # :type in_event: :py:class:`~pygame_maker.events.event.Event`
+        # :param instances: The instances receiving the event
+        # :type instances: list
+        # :return: A list of (action, batch code) tuples, or None
+        # :rtype: None | list
+        sequence = self.event_action_sequences.get(in_event.name)
+        if sequence is None or len(instances) < self.BATCH_MIN_INSTANCES:
+            return None
+        for inst in instances:
+            # subclasses may handle symbol changes differently
+            if type(inst) is not object_instance.ObjectInstance or inst.motion is not self.motion:
+                return None
+        batch_actions = []
+        for statement in sequence.main_block.contained_statements:
+            an_action = statement.action
+            if (statement.is_block or statement.is_conditional or
+                    an_action.name != "execute_code" or
+                    an_action.action_data.get("apply_to", "self") != "self"):
+                return None
+            code = an_action.action_data["code"]
+            if not code:
+                continue
+            if not isinstance(code, str) or code.startswith("="):
+                return None
+            handle = instances[0].register_code_block(an_action)
+            batch_code = self.game_engine.language_engine.get_batch_code(handle)
+            if batch_code is None:
+                return None
+            batch_actions.append((an_action, batch_code))
+        return batch_actions
+
     def handle_mouse_event(self, in_event):
         """
         Handle mouse events that intersect with any of this object type's
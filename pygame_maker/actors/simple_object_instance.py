@@ -24,6 +24,18 @@ class SimpleObjectInstance(logging_object.LoggingObject):
     access symbols, and supporting variable and code execution type actions.
     """
     INSTANCE_SYMBOLS = {}
+    #: Action names mapped to the names of the methods that handle them.
+    #: Subclasses extend this class variable to handle more actions.
+    ACTION_METHODS = {
+        'debug': 'print_debug',
+        'execute_code': 'execute_code',
+        'if_variable_value': 'if_variable_value',
+        'set_variable_value': 'set_variable_value',
+        'destroy_object': 'destroy_object',
+    }
+    #: Incremented whenever any instance's parent or children change, so
+    #: that flattened copies of the hierarchy know to rebuild
+    hierarchy_version = 0
     # Regex for searching for symbol interpolations in debug strings
     INTERPOLATION_REGEX = re.compile("{([^}]*)}")
 
@@ -51,8 +63,8 @@ class SimpleObjectInstance(logging_object.LoggingObject):
               integer [(0,0)]
 
         """
-        # call base class init
-        super(SimpleObjectInstance, self).__init__(type(self).__name__)
+        # all instances of a class share one logger
+        self.share_class_logger()
         #: Name the instance based on the ObjectType's name and the ID
         self.name = "{}{}".format(kind.name, new_id)
         #: The ObjectType this SimpleObjectInstance belongs to
@@ -65,73 +77,106 @@ class SimpleObjectInstance(logging_object.LoggingObject):
         self.inst_id = new_id
         # rect for storing the instance's position
         self.rect = pygame.Rect(0, 0, 0, 0)
-        # Symbols tracked by ObjectInstances
-        self._symbols = {
-            "parent": None,
-            "children": [],
-            "position": coordinate.Coordinate(0, 0,
-                                              self._update_position_x,
-                                              self._update_position_y)
-        }
-        #: Subclasses override this class variable to add their known symbols
-        self._symbols.update(self.INSTANCE_SYMBOLS)
+        self._init_symbols()
+
+        self._apply_settings(settings, kwargs)
+        # print("Initial symbols:")
+        # self.symbols.dumpVars()
+        self._code_block_id = 0
+
+    @classmethod
+    def get_default_symbols(cls):
+        """
+        Return the default symbol values shared by every instance of this
+        class.
+
+        Instance symbol tables read symbols that haven't been set from this
+        dict instead of copying it, so it must not be modified.  Subclasses
+        override INSTANCE_SYMBOLS to add their known symbols.
+
+        :return: Symbol names mapped to their default values
+        :rtype: dict
+        """
+        if "_default_symbols" not in cls.__dict__:
+            default_symbols = {
+                "parent": None,
+                # never changed in place; see add_child_instance()
+                "children": [],
+            }
+            default_symbols.update(cls.INSTANCE_SYMBOLS)
+            cls._default_symbols = default_symbols
+        return cls._default_symbols
+
+    def _init_symbols(self):
+        # Create the symbol table.  Only the position is stored in it; all
+        #  other symbols start with their shared default values.
         #: Symbol table
-        self.symbols = SymbolTable()
-        for sym in list(self._symbols.keys()):
-            self.symbols[sym] = self._symbols[sym]
+        self.symbols = self._make_symbol_table()
+        self.symbols["position"] = self._make_position()
+
+    def _make_position(self):
+        # Create the coordinate holding this instance's position.
+        return coordinate.Coordinate(0, 0, self._update_position_x, self._update_position_y)
+
+    def _make_symbol_table(self):
+        # Create the instance's symbol table, backed by the default symbols.
+        return SymbolTable(defaults=self.get_default_symbols())
 
+    def _apply_settings(self, settings, kwargs):
+        # Merge the settings dict and kwargs, and apply them.
         attr_values = {}
         if settings is not None:
             attr_values.update(settings)
         attr_values.update(kwargs)
         if list(attr_values.keys()):
             self._apply_kwargs(attr_values)
-        # print("Initial symbols:")
-        # self.symbols.dumpVars()
 
-        self.action_name_to_method_map = {
-            'debug': self.print_debug,
-            'execute_code': self.execute_code,
-            'if_variable_value': self.if_variable_value,
-            'set_variable_value': self.set_variable_value,
-            'destroy_object': self.destroy_object,
-        }
-        self._code_block_id = 0
+    def recycle(self, screen_dims, new_id, settings=None, **kwargs):
+        """
+        Reset a destroyed instance taken from its object type's pool, so it
+        can be re-used as a new instance.
 
-    def _update_position_x(self):
-        # Automatically called when the X coordinate of the position changes
-        self.debug("_update_position_x():")
-        self._round_position_x_to_rect_x()
-        #pylint: disable=no-member
-        self.symbols['position.x'] = self.position.x
-        #pylint: enable=no-member
+        The symbol table is returned to its initial state, while the rect
+        built by ``__init__()`` is kept.
 
-    def _update_position_y(self):
-        # Automatically called when the Y coordinate of the position changes
-        self.debug("_update_position_y():")
-        self._round_position_y_to_rect_y()
-        #pylint: disable=no-member
-        self.symbols['position.y'] = self.position.y
-        #pylint: enable=no-member
+        :param screen_dims: Width, height of the surface this instance will be
+            drawn to
+        :type screen_dims: [int, int]
+        :param new_id: A unique integer ID for this instance
+        :type new_id: int
+        :param settings: Attribute settings, the same as for ``__init__()``
+        :type settings: None or dict
+        :param kwargs: Attribute settings, the same as for ``__init__()``
+        """
+        self.debug("recycle(screen_dims={}, new_id={}, settings={}, kwargs={}):".format(
+            screen_dims, new_id, settings, kwargs))
+        self.name = "{}{}".format(self.kind.name, new_id)
+        self.screen_dims = list(screen_dims[0:2])
+        self.inst_id = new_id
+        self.rect.x = 0
+        self.rect.y = 0
+        self._init_symbols()
+        self._apply_settings(settings, kwargs)
 
-    def _round_position_x_to_rect_x(self):
-        # Called when the x coordinate of the position changes, to round
-        # the floating-point value to the nearest integer and place it
-        # in rect.x for the draw() method.
-        self.debug("_round_position_x_to_rect_x():")
+    def _update_position_x(self):
+        # Automatically called when the X coordinate of the position changes,
+        #  to round it to the nearest integer for rect.x and to keep the
+        #  position.x symbol up to date.
         #pylint: disable=no-member
-        self.rect.x = math.floor(self.position.x + 0.5)
+        new_x = self.position.x
         #pylint: enable=no-member
+        self.rect.x = math.floor(new_x + 0.5)
+        self.symbols['position.x'] = new_x
 
-    def _round_position_y_to_rect_y(self):
-        # _round_position_y_to_rect_y():
-        #  Called when the y coordinate of the position changes, to round
-        #  the floating-point value to the nearest integer and place it
-        #  in rect.y for the draw() method.
-        self.debug("_round_position_y_to_rect_y():")
+    def _update_position_y(self):
+        # Automatically called when the Y coordinate of the position changes,
+        #  to round it to the nearest integer for rect.y and to keep the
+        #  position.y symbol up to date.
         #pylint: disable=no-member
-        self.rect.y = math.floor(self.position.y + 0.5)
+        new_y = self.position.y
         #pylint: enable=no-member
+        self.rect.y = math.floor(new_y + 0.5)
+        self.symbols['position.y'] = new_y
 
     @property
     def code_block_id(self):
@@ -220,6 +265,26 @@ class SimpleObjectInstance(logging_object.LoggingObject):
             handled_change = True
         return handled_change
 
+    def register_code_block(self, an_action):
+        """
+        Register an execute_code action's code block with the language
+        engine, unless it was already registered.
+
+        :param an_action: The execute_code Action instance
+        :type an_action: :py:class:`~pygame_maker.actions.action.Action`
+        :return: The code block's handle in the language engine
+        :rtype: str
+        """
+        if 'language_engine_handle' not in an_action.runtime_data:
+            instance_handle_name = "obj_{}_block{}".format(self.kind.name,
+                                                           self.code_block_id)
+            an_action['language_engine_handle'] = instance_handle_name
+            # print("an_action {} runtime: '{}'".format(an_action, an_action.runtime_data))
+            self.game_engine.language_engine.register_code_block(
+                instance_handle_name, an_action.action_data['code']
+            )
+        return an_action['language_engine_handle']
+
     def execute_code(self, an_action, an_event, keep_code_block=True):
         """
         Handle the execute_code action.
@@ -238,15 +303,11 @@ class SimpleObjectInstance(logging_object.LoggingObject):
         self.debug("execute_code(an_action={}, an_event={}, keep_code_block={}):".format(
             an_action, an_event, keep_code_block))
         if an_action.action_data['code']:
-            instance_handle_name = "obj_{}_block{}".format(self.kind.name, self.code_block_id)
-            if 'language_engine_handle' not in an_action.runtime_data:
-                an_action['language_engine_handle'] = instance_handle_name
-                # print("an_action {} runtime: '{}'".format(an_action, an_action.runtime_data))
-                self.game_engine.language_engine.register_code_block(
-                    instance_handle_name, an_action.action_data['code']
-                )
-            local_symbols = SymbolTable(self.symbols,
-                                        lambda s, v: self._symbol_change_callback(s, v))
+            self.register_code_block(an_action)
+            # a scope over the instance's symbols, whose changes are passed
+            #  on to the instance
+            local_symbols = SymbolTable(sym_change_callback=self._symbol_change_callback,
+                                        defaults=self.symbols)
             # Allow references to this instance and event in user-callable
             #  action helper methods, so that they can call forward_action().
             local_symbols.set_constant("self", self)
@@ -399,6 +460,7 @@ class SimpleObjectInstance(logging_object.LoggingObject):
         """Remove the parent instance, for example when it is destroyed"""
         self.debug("remove_parent_instance():")
         self.symbols["parent"] = None
+        SimpleObjectInstance.hierarchy_version += 1
 
     def add_child_instance(self, child):
         """Add a child instance to this one, for forwarding 'parent' events"""
@@ -409,9 +471,12 @@ class SimpleObjectInstance(logging_object.LoggingObject):
         #pylint: disable=unsupported-membership-test
         if child not in self.symbols["children"]:
             #pylint: enable=unsupported-membership-test
+            # replace the list instead of changing it, since the empty list
+            #  is shared by all instances without children
             #pylint: disable=no-member
-            self.symbols["children"].append(child)
+            self.symbols["children"] = self.symbols["children"] + [child]
             #pylint: enable=no-member
+            SimpleObjectInstance.hierarchy_version += 1
         else:
             self.info("add_child_instance() called with already existing child instance")
 
@@ -428,9 +493,11 @@ class SimpleObjectInstance(logging_object.LoggingObject):
         #pylint: disable=unsupported-membership-test
         if child in self.symbols["children"]:
             #pylint: enable=unsupported-membership-test
-            #pylint: disable=no-member
-            self.symbols["children"].remove(child)
-            #pylint: enable=no-member
+            #pylint: disable=not-an-iterable
+            self.symbols["children"] = [inst for inst in self.symbols["children"]
+                                        if inst is not child]
+            #pylint: enable=not-an-iterable
+            SimpleObjectInstance.hierarchy_version += 1
         else:
             self.info("remove_child_instance() called with non-existent child instance")
 
@@ -501,13 +568,14 @@ class SimpleObjectInstance(logging_object.LoggingObject):
                 continue
             action_params[param] = action.get_parameter_expression_result(
                 param, self.symbols, self.game_engine.language_engine)
-        if action.name in list(self.action_name_to_method_map.keys()):
+        method_name = self.ACTION_METHODS.get(action.name)
+        if method_name is not None:
             if action.name == "execute_code":
                 # Make it possible for user code to execute actions that need
                 #  event information (E.G., for collision handling).
-                self.action_name_to_method_map[action.name](action, an_event)
+                getattr(self, method_name)(action, an_event)
             else:
-                self.action_name_to_method_map[action.name](action)
+                getattr(self, method_name)(action)
             handled_action = True
             self.debug("  {} inst {} execute_action {} handled".format(
                 self.kind.name, self.inst_id, action.name))
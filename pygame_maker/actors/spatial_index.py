@@ -0,0 +1,296 @@
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Pygame maker spatial index module, for finding object instances by location.
+"""
+
+import math
+import numpy as np
+from pygame_maker.support import logging_object
+
+
+class SpatialGrid(logging_object.LoggingObject):
+    """
+    A uniform grid over the instances of one object type, for finding
+    instances near a point or inside a rectangle without checking every
+    instance.
+
+    Instances are sorted by the grid cell containing the center of their
+    rect, so the instances in a row of cells are found with two binary
+    searches.  The grid reads the type's motion arrays, and is rebuilt the
+    first time it is queried after any position changed, whether by the
+    object type's motion update or by an instance being moved directly.
+    """
+    #: The default width and height of each grid cell, in pixels
+    DEFAULT_CELL_SIZE = 64
+    # Cell coordinates are offset to stay positive, then combined into
+    #  a single sort key: row * stride + column
+    CELL_OFFSET = 1 << 20
+    CELL_STRIDE = 1 << 21
+
+    def __init__(self, motion_arrays, cell_size=DEFAULT_CELL_SIZE):
+        """
+        Create the grid.
+
+        :param motion_arrays: The motion arrays holding the instances'
+            positions and sizes
+        :type motion_arrays: :py:class:`~pygame_maker.actors.motion.MotionArrays`
+        :param cell_size: The width and height of each grid cell
+        :type cell_size: int
+        """
+        super(SpatialGrid, self).__init__(type(self).__name__)
+        #: The motion arrays the grid is built from
+        self.motion = motion_arrays
+        #: The width and height of each grid cell
+        self.cell_size = max(1, int(cell_size))
+        #: The motion arrays' position version the grid was built from, or
+        #: None if it was never built
+        self.version = None
+        #: The slot of each instance, sorted by cell
+        self.slots = np.zeros(0, dtype=int)
+        #: The sort key of each instance's cell
+        self.keys = np.zeros(0, dtype=np.int64)
+        #: Each instance's rect, as arrays of left, top, right and bottom
+        #: edges.  Instances without an image are treated as a single pixel.
+        self.edges = (np.zeros(0),) * 4
+        #: The center of each instance's rect, as x and y arrays
+        self.centers = (np.zeros(0), np.zeros(0))
+        #: The largest distance from any center to the edge of its rect
+        self.max_extent = 0.0
+        #: The lowest and highest occupied cell columns and rows, or None if
+        #: the grid is empty
+        self.cell_bounds = None
+
+    def __len__(self):
+        self.refresh()
+        return len(self.slots)
+
+    def refresh(self):
+        """Rebuild the grid if any position changed since it was built."""
+        if self.version == self.motion.position_version:
+            return
+        motion = self.motion
+        slots = np.flatnonzero(motion.in_use[:motion.slot_count])
+        left, top = motion.get_rect_positions(slots)
+        # child instances are placed relative to their parent, so their
+        #  rects already hold their location in the room
+        for idx in np.flatnonzero(~motion.root[slots]).tolist():
+            rect = motion.instances[slots[idx]].rect
+            left[idx] = rect.x
+            top[idx] = rect.y
+        width = np.maximum(motion.fields["width"][slots], 1)
+        height = np.maximum(motion.fields["height"][slots], 1)
+        center_x = left + width / 2.0
+        center_y = top + height / 2.0
+        cell_x = np.floor(center_x / self.cell_size).astype(np.int64)
+        cell_y = np.floor(center_y / self.cell_size).astype(np.int64)
+        keys = (cell_y + self.CELL_OFFSET) * self.CELL_STRIDE + cell_x + self.CELL_OFFSET
+        order = np.argsort(keys, kind="mergesort")
+        self.slots = slots[order]
+        self.keys = keys[order]
+        self.edges = (left[order], top[order], (left + width)[order], (top + height)[order])
+        self.centers = (center_x[order], center_y[order])
+        if len(slots) > 0:
+            self.max_extent = max(width.max(), height.max()) / 2.0
+            self.cell_bounds = (cell_x.min(), cell_y.min(), cell_x.max(), cell_y.max())
+        else:
+            self.max_extent = 0.0
+            self.cell_bounds = None
+        self.version = motion.position_version
+        self.debug("Rebuilt grid with {:d} instances".format(len(slots)))
+
+    def _get_candidates(self, min_x, min_y, max_x, max_y):
+        # Return the indices of instances whose centers lie in the cells
+        #  covering the given area.
+        if self.cell_bounds is None:
+            return np.zeros(0, dtype=int)
+        low_col, low_row, high_col, high_row = self.cell_bounds
+        first_col = max(int(math.floor(min_x / self.cell_size)), low_col)
+        last_col = min(int(math.floor(max_x / self.cell_size)), high_col)
+        first_row = max(int(math.floor(min_y / self.cell_size)), low_row)
+        last_row = min(int(math.floor(max_y / self.cell_size)), high_row)
+        if first_col > last_col or first_row > last_row:
+            return np.zeros(0, dtype=int)
+        ranges = []
+        for row in range(first_row, last_row + 1):
+            row_key = (row + self.CELL_OFFSET) * self.CELL_STRIDE + self.CELL_OFFSET
+            start = np.searchsorted(self.keys, row_key + first_col, side="left")
+            end = np.searchsorted(self.keys, row_key + last_col, side="right")
+            if end > start:
+                ranges.append(np.arange(start, end))
+        if not ranges:
+            return np.zeros(0, dtype=int)
+        return np.concatenate(ranges)
+
+    def _get_instances(self, indices):
+        # Return the instances at the given sorted positions.
+        return [self.motion.instances[slot] for slot in self.slots[indices].tolist()]
+
+    def instances_in_rect(self, rect):
+        """
+        Find the instances whose rect overlaps the given rectangle.
+
+        :param rect: The area to search, as a :py:class:`pygame.Rect` or an
+            (x, y, width, height) sequence
+        :type rect: :py:class:`pygame.Rect` | sequence
+        :return: The overlapping instances
+        :rtype: list
+        """
+        self.refresh()
+        left, top, width, height = [float(val) for val in rect[0:4]]
+        right = left + width
+        bottom = top + height
+        extent = self.max_extent
+        found = self._get_candidates(left - extent, top - extent,
+                                     right + extent, bottom + extent)
+        inst_left, inst_top, inst_right, inst_bottom = self.edges
+        overlapping = ((inst_left[found] < right) & (inst_right[found] > left) &
+                       (inst_top[found] < bottom) & (inst_bottom[found] > top))
+        return self._get_instances(found[overlapping])
+
+    def _get_distances_squared(self, found, point):
+        # Return the squared distances from the point to the centers of the
+        #  instances at the given sorted positions.
+        center_x, center_y = self.centers
+        delta_x = center_x[found] - point[0]
+        delta_y = center_y[found] - point[1]
+        return delta_x * delta_x + delta_y * delta_y
+
+    def instances_within(self, point, radius):
+        """
+        Find the instances whose rect center is within a distance of a point.
+
+        :param point: The x, y location to measure from
+        :type point: sequence
+        :param radius: The largest distance to include
+        :type radius: int | float
+        :return: The instances within the radius
+        :rtype: list
+        """
+        self.refresh()
+        found = self._get_candidates(point[0] - radius, point[1] - radius,
+                                     point[0] + radius, point[1] + radius)
+        within = self._get_distances_squared(found, point) <= radius * radius
+        return self._get_instances(found[within])
+
+    def nearest(self, point):
+        """
+        Find the instance whose rect center is closest to a point.
+
+        The search starts with the cells around the point, and widens until
+        an instance is found.
+
+        :param point: The x, y location to measure from
+        :type point: sequence
+        :return: The closest instance, or None if there are no instances
+        """
+        self.refresh()
+        if self.cell_bounds is None:
+            return None
+        radius = float(self.cell_size)
+        while True:
+            found = self._get_candidates(point[0] - radius, point[1] - radius,
+                                         point[0] + radius, point[1] + radius)
+            if len(found) == 0:
+                radius *= 2
+                continue
+            distances = self._get_distances_squared(found, point)
+            best = np.argmin(distances)
+            if distances[best] <= radius * radius:
+                return self._get_instances(found[best:best + 1])[0]
+            # a closer instance can only be in the square that just
+            #  contains the closest one found so far
+            radius = math.sqrt(distances[best]) + 1.0
+
+
+class SpatialIndex(logging_object.LoggingObject):
+    """
+    Find instances of the game's object types by location.
+
+    Each object type with moving instances keeps its own
+    :py:class:`SpatialGrid`; object types without one (E.G. managers) never
+    match.
+    """
+
+    def __init__(self, game_engine):
+        """
+        Create the spatial index.
+
+        :param game_engine: The game engine, for access to the object types
+        :type game_engine: GameEngine
+        """
+        super(SpatialIndex, self).__init__(type(self).__name__)
+        #: A reference to the game engine, for finding object types
+        self.game_engine = game_engine
+
+    def get_grid(self, type_name):
+        """
+        Return the spatial grid of the named object type.
+
+        :param type_name: An object type name
+        :type type_name: str
+        :return: The object type's grid, or None if the type is unknown or
+            has no grid
+        :rtype: None | SpatialGrid
+        """
+        obj_type = self.game_engine.resources['objects'].get(type_name)
+        return getattr(obj_type, "spatial_grid", None)
+
+    def _get_grids(self, type_names):
+        # Return the grids of the named object types, or of all object types
+        #  if no names are given.
+        if type_names is None:
+            type_names = list(self.game_engine.resources['objects'].keys())
+        grids = [self.get_grid(type_name) for type_name in type_names]
+        return [grid for grid in grids if grid is not None]
+
+    def instances_in_rect(self, rect, type_names=None):
+        """
+        Find the instances whose rect overlaps the given rectangle.
+
+        :param rect: The area to search
+        :type rect: :py:class:`pygame.Rect` | sequence
+        :param type_names: The object types to search, or None for all
+        :type type_names: None | list
+        :return: The overlapping instances
+        :rtype: list
+        """
+        found = []
+        for grid in self._get_grids(type_names):
+            found.extend(grid.instances_in_rect(rect))
+        return found
+
+    def instances_within(self, point, radius, type_names=None):
+        """
+        Find the instances whose rect center is within a distance of a point.
+
+        :param point: The x, y location to measure from
+        :type point: sequence
+        :param radius: The largest distance to include
+        :type radius: int | float
+        :param type_names: The object types to search, or None for all
+        :type type_names: None | list
+        :return: The instances within the radius
+        :rtype: list
+        """
+        found = []
+        for grid in self._get_grids(type_names):
+            found.extend(grid.instances_within(point, radius))
+        return found
+
+    def nearest(self, type_name, point):
+        """
+        Find the named object type's instance closest to a point.
+
+        :param type_name: An object type name
+        :type type_name: str
+        :param point: The x, y location to measure from
+        :type point: sequence
+        :return: The closest instance, or None if the type has no instances
+        """
+        grid = self.get_grid(type_name)
+        if grid is None:
+            return None
+        return grid.nearest(point)
@@ -526,6 +526,9 @@ class KeyEvent(Event):
         pygame.K_F12:           "kb_F12"
     }
     #pylint: enable=no-member
+    #: Look up the pygame key code for a key event name
+    KEY_EVENT_TO_PYGAME_KEY_MAP = dict(
+        (ev_name, kcode) for kcode, ev_name in PYGAME_KEY_TO_KEY_EVENT_MAP.items())
 
     #: Append this string to the event name, to specify key release
     KEYBOARD_UP_SUFFIX = "_keyup"
@@ -533,12 +536,17 @@ class KeyEvent(Event):
     #: Append this string to the event name, to specify key press
     KEYBOARD_DOWN_SUFFIX = "_keydn"
     KEYBOARD_DOWN_SUFFIX_RE = re.compile("(.*)({})$".format(KEYBOARD_DOWN_SUFFIX))
+    #: Append this string to the event name, to specify a key that is being
+    #: held down (sent every frame until the key is released)
+    KEYBOARD_HELD_SUFFIX = "_held"
+    KEYBOARD_HELD_SUFFIX_RE = re.compile("(.*)({})$".format(KEYBOARD_HELD_SUFFIX))
     HANDLED_EVENTS = KEY_EVENTS
 
     @classmethod
     def find_key_event(cls, event_name):
         """
-        Given a full key event name (possibly including _keyup or _keydn),
+        Given a full key event name (possibly including _keyup, _keydn or
+        _held),
         search for the event's base name to make sure it exists.  Used by
         find_event_by_name() and __init__().
         """
@@ -546,10 +554,13 @@ class KeyEvent(Event):
         base_event_name = str(event_name)
         up_minfo = cls.KEYBOARD_UP_SUFFIX_RE.search(event_name)
         dn_minfo = cls.KEYBOARD_DOWN_SUFFIX_RE.search(event_name)
+        held_minfo = cls.KEYBOARD_HELD_SUFFIX_RE.search(event_name)
         if up_minfo:
             base_event_name = up_minfo.group(1)
         elif dn_minfo:
             base_event_name = dn_minfo.group(1)
+        elif held_minfo:
+            base_event_name = held_minfo.group(1)
         if base_event_name not in cls.HANDLED_EVENTS:
             raise UnknownEventError("KeyEvent: key named '{}' unknown".format(base_event_name))
         if not base_event_name:
@@ -560,8 +571,8 @@ class KeyEvent(Event):
     def find_event_by_name(cls, event_name):
         """
         Override the base class method
-        :py:meth:`Event.find_event_by_name`, which doesn't handle the keyup or
-        keydown suffixes.
+        :py:meth:`Event.find_event_by_name`, which doesn't handle the keyup,
+        keydown or held suffixes.
 
         :param event_name: The name of a keyboard event
         :type event_name: str
@@ -63,6 +63,17 @@ class EventEngine(logging_object.LoggingObject):
                     self.info("  delete last event handler for {}".format(event_name))
                     del self.event_handlers[event_name]
 
+    def has_handlers(self, event_name):
+        """
+        Answer whether any handlers are registered for the named event.
+
+        :param event_name: The name of an event
+        :type event_name: str
+        :return: True if at least one handler is registered, False otherwise
+        :rtype: bool
+        """
+        return event_name in self.event_handlers
+
     def queue_event(self, an_event):
         """
         Add the given event to the event queue.
@@ -86,7 +97,8 @@ class EventEngine(logging_object.LoggingObject):
         Forward queued events matching the named event (if handlers exist for
         it), to each registered handler.
 
-        Delete the queued events after handling them.
+        Delete the queued events after handling them.  Queued events with no
+        handlers are discarded, so they don't pile up frame after frame.
 
         :param event_name: The name of the event to transmit to its handlers
         :type event_name: str
@@ -95,11 +107,13 @@ class EventEngine(logging_object.LoggingObject):
         self.debug("transmit_event({}):".format(event_name))
         if event_name in list(self.event_handlers.keys()):
             # print("found. check for event queues..")
-            queue_len = len(self.event_queues[event_name])
+            # the events may already have been transmitted
+            queued_events = self.event_queues.setdefault(event_name, [])
+            queue_len = len(queued_events)
             if queue_len > 0:
                 self.debug("  found {:d} queued {} events".format(queue_len,
                                                                   event_name))
-            for queued in self.event_queues[event_name]:
+            for queued in queued_events:
                 # print("handle queue item {}".format(queued))
                 for idx, handler in enumerate(self.event_handlers[event_name]):
                     self.debug("    call handler #{:d}".format(idx+1))
@@ -107,6 +121,9 @@ class EventEngine(logging_object.LoggingObject):
             # clear the queue
             self.debug("  delete queued {} events".format(event_name))
             del self.event_queues[event_name]
+        elif event_name in self.event_queues:
+            self.debug("  discard unhandled {} events".format(event_name))
+            del self.event_queues[event_name]
 
     def transmit_event_type(self, event_type):
         """
@@ -14,14 +14,18 @@ import yaml
 import pygame
 from pygame_maker.support import logging_object
 from pygame_maker.support import css_to_style
+from pygame_maker.support import frame_profiler
 from pygame_maker.actors import object_sprite
 from pygame_maker.sounds import sound
 from pygame_maker.actors import object_type
+from pygame_maker.actors import instance_lifecycle
+from pygame_maker.actors import spatial_index
 from pygame_maker.scenes import background
 from pygame_maker.scenes import room
 from pygame_maker.events import event
 from pygame_maker.events import event_engine
 from pygame_maker.logic import language_engine
+from pygame_maker.logic import code_cache
 
 
 class GameEngineException(Exception):
@@ -82,6 +86,15 @@ class GameEngine(logging_object.LoggingObject):
         "screen_dimensions": (640, 480),
         "frames_per_second": 60,
         "stylesheet": "",
+        "code_cache_dir": "",
+        "code_block_step_limit": language_engine.LanguageEngine.STEP_LIMIT,
+        "frame_step_limit": 0,
+        "frame_profiler": {
+            "enabled": False,
+            "window_size": 120,
+            "log_interval": 0,
+            "overlay": False
+        },
         "logging_config": {
             "version": 1,
             "formatters": {
@@ -140,6 +153,10 @@ class GameEngine(logging_object.LoggingObject):
                     "level": "INFO",
                     "handlers": ["console", "file"]
                 },
+                "FrameProfiler": {
+                    "level": "INFO",
+                    "handlers": ["console", "file"]
+                },
             },
         },
     }
@@ -182,12 +199,17 @@ class GameEngine(logging_object.LoggingObject):
         self.done = False
         #: The mouse coordinate saved each time a mouse motion event occurs
         self.mouse_pos = [0, 0]
+        #: The names of the keys currently held down (E.G. 'kb_A'), updated
+        #: as key up and down events arrive
+        self.pressed_keys = set()
         #: The list where pygame events get stored, so that the pygame event
         #: FIFO doesn't fill up
         self.current_events = []
-        #: The list containing new objects whose creation was triggered by
+        #: Creates (in bulk) new objects whose creation was triggered by
         #: create_object type events
-        self.new_object_queue = []
+        self.instance_lifecycle = instance_lifecycle.InstanceLifecycle(self)
+        #: Finds object instances by location
+        self.spatial_index = spatial_index.SpatialIndex(self)
         #: The index into the ``resources['rooms']`` list, updated when a new
         #: room is loaded
         self.room_index = 0
@@ -206,6 +228,31 @@ class GameEngine(logging_object.LoggingObject):
         # base class.
         super(GameEngine, self).__init__(type(self).__name__)
 
+        if self.game_settings.get('code_cache_dir'):
+            self.language_engine.code_cache = code_cache.CodeBlockCache(
+                self.game_settings['code_cache_dir'])
+        self.language_engine.budget.step_limit = \
+            self.game_settings['code_block_step_limit'] or None
+        self.language_engine.budget.frame_step_limit = \
+            self.game_settings['frame_step_limit'] or None
+
+        # Hidden from user code (identifiers can't start with '_'); read by
+        #  the key_pressed() language function.
+        self.language_engine.global_symbol_table.set_constant('_pressed_keys',
+                                                              self.pressed_keys)
+        # Read by the nearest_instance() and count_in_radius() functions.
+        self.language_engine.global_symbol_table.set_constant('_spatial_index',
+                                                              self.spatial_index)
+
+        profiler_settings = dict(self.DEFAULT_GAME_SETTINGS['frame_profiler'])
+        if self.game_settings.get('frame_profiler'):
+            profiler_settings.update(self.game_settings['frame_profiler'])
+        if 'frame_budget_ms' not in profiler_settings:
+            profiler_settings['frame_budget_ms'] = \
+                1000.0 / self.game_settings['frames_per_second']
+        #: The profiler that times each phase of the main loop
+        self.profiler = frame_profiler.FrameProfiler(**profiler_settings)
+
         self.info("Loading game resources..")
         self.global_style_settings = None
         if "stylesheet" in self.game_settings and self.game_settings["stylesheet"]:
@@ -230,6 +277,19 @@ class GameEngine(logging_object.LoggingObject):
             screen_dimensions: [<width>, <height>]
             frames_per_second: <positive integer>
             stylesheet: <name of CSS-formatted file>
+            code_cache_dir: <directory to keep compiled code blocks in between
+                             runs, so later runs start faster; empty to disable>
+            code_block_step_limit: <the most steps (lines run, function and
+                                    action calls) one code block execution
+                                    may take before it's stopped; 0 to
+                                    disable>
+            frame_step_limit: <the most steps all code blocks may take in a
+                               frame; 0 to disable>
+            frame_profiler:
+              enabled: <True to time each phase of the main loop>
+              window_size: <number of recent frames used for percentiles>
+              log_interval: <frames between summary log lines, 0 to disable>
+              overlay: <True to draw the timing summary on screen>
             logging_config:
               version: 1
               formatters:
@@ -277,6 +337,9 @@ class GameEngine(logging_object.LoggingObject):
                 CSSStyleParser:
                   level: INFO
                   handlers: [console]
+                FrameProfiler:
+                  level: INFO
+                  handlers: [console]
         """
         if os.path.exists(self.GAME_SETTINGS_FILE):
             with open(self.GAME_SETTINGS_FILE, "r") as yaml_f:
@@ -377,47 +440,87 @@ class GameEngine(logging_object.LoggingObject):
             if (self.screen and action_params['object'] and
                     (action_params['object'] in list(self.resources['objects'].keys()))):
                 self.info("Creating object '{}'".format(action_params['object']))
-                self.new_object_queue.append(
-                    (self.resources['objects'][action_params['object']], action_params))
+                self.instance_lifecycle.queue_create(
+                    self.resources['objects'][action_params['object']], action_params)
             else:
                 self.debug("Object '{}' not created".format(action_params['object']))
         else:
             self.debug("No handler for action '{}'".format(action.name))
         self.drop_indent_level()
 
+    def queue_key_event(self, key_event):
+        """
+        Queue the KeyEvent matching a keyboard event received from pygame,
+        without transmitting it.
+
+        Pygame key codes will be translated into KeyEvents with _keyup or
+        _keydn appended to the name based on the pygame event received.  The
+        set of pressed keys is updated to match.
+
+        :param key_event: The pygame keyboard event
+        :type key_event: :py:class:`pygame.event.EventType`
+        :return: The name of the queued event, or None if the key is unknown
+        :rtype: None | str
+        """
+        pk_map = event.KeyEvent.PYGAME_KEY_TO_KEY_EVENT_MAP
+        if key_event.key not in pk_map:
+            return None
+        key_name = str(pk_map[key_event.key])
+        #pylint: disable=no-member
+        if key_event.type == pygame.KEYDOWN:
+            self.pressed_keys.add(key_name)
+            key_event_name = "{}{}".format(key_name, event.KeyEvent.KEYBOARD_DOWN_SUFFIX)
+        else:
+            self.pressed_keys.discard(key_name)
+            key_event_name = "{}{}".format(key_name, event.KeyEvent.KEYBOARD_UP_SUFFIX)
+        #pylint: enable=no-member
+        self.event_engine.queue_event(event.KeyEvent(key_event_name))
+        return key_event_name
+
     def send_key_event(self, key_event):
         """
         Handle a keyboard event received from pygame.
 
-        Pygame key codes will be translated into KeyEvents with _keyup or
-        _keydn appended to the name based on the pygame event received.  If no
-        keyboard event was received during the frame, fire off the kb_no_key
-        event.
+        The event is queued by :py:meth:`queue_key_event` and transmitted
+        immediately.  If no keyboard event was received during the frame,
+        fire off the kb_no_key event, unless nothing is listening for it.
 
         :param key_event: The pygame keyboard event, or None to
             signal that no button event occurred during the frame.
         :type key_event: None | :py:class:`~pygame_maker.events.event.Event`
         """
-        pk_map = event.KeyEvent.PYGAME_KEY_TO_KEY_EVENT_MAP
-        key_event_init_name = None
-        key_event_name = None
-        #pylint: disable=no-member
         if not key_event:
-            key_event_init_name = "kb_no_key"
-            key_event_name = key_event_init_name
-        elif key_event.key in pk_map:
-            key_event_name = str(pk_map[key_event.key])
-            if key_event.type == pygame.KEYDOWN:
-                key_event_init_name = "{}_keydn".format(pk_map[key_event.key])
-            elif key_event.type == pygame.KEYUP:
-                key_event_init_name = "{}_keyup".format(pk_map[key_event.key])
-        #pylint: enable=no-member
-        kev = event.KeyEvent(key_event_init_name)
-        # print("queue event: {}".format(kev))
-        self.event_engine.queue_event(kev)
-        # print("xmit event: {}".format(key_event_name))
-        self.event_engine.transmit_event(key_event_init_name)
-        self.debug("Event '{}' queued and transmitted".format(key_event_init_name))
+            key_event_name = "kb_no_key"
+            if not self.event_engine.has_handlers(key_event_name):
+                return
+            self.event_engine.queue_event(event.KeyEvent(key_event_name))
+        else:
+            key_event_name = self.queue_key_event(key_event)
+            if key_event_name is None:
+                return
+        self.event_engine.transmit_event(key_event_name)
+        self.debug("Event '{}' queued and transmitted".format(key_event_name))
+
+    def send_key_held_events(self):
+        """
+        Fire off <key>_held events for keys that are currently down.
+
+        Only keys with a registered ``_held`` event handler are checked, and
+        the keyboard state is only polled when at least one such handler
+        exists.
+        """
+        held_suffix = event.KeyEvent.KEYBOARD_HELD_SUFFIX
+        held_event_names = [ev_name for ev_name in list(self.event_engine.event_handlers.keys())
+                            if ev_name.endswith(held_suffix)]
+        if not held_event_names:
+            return
+        key_states = pygame.key.get_pressed()
+        key_map = event.KeyEvent.KEY_EVENT_TO_PYGAME_KEY_MAP
+        for held_event_name in held_event_names:
+            key_name = held_event_name[:-len(held_suffix)]
+            if key_name in key_map and key_states[key_map[key_name]]:
+                self.event_engine.queue_event(event.KeyEvent(held_event_name))
+                self.event_engine.transmit_event(held_event_name)
 
     def send_mouse_event(self, mouse_event):
         """
@@ -426,7 +529,7 @@ class GameEngine(logging_object.LoggingObject):
         Motion events will simply capture the x, y of the mouse cursor.  Button
         events will trigger MouseEvents of the appropriate global and instance
         press or release types.  If no button event was received, fire off the
-        nobutton global and instance events.
+        nobutton global and instance events that have handlers.
 
         :param mouse_event: The pygame mouse event, or None to signal that no
             button event occurred during the frame.
@@ -434,14 +537,48 @@ class GameEngine(logging_object.LoggingObject):
         """
         #pylint: disable=no-member
         if mouse_event:
-            self.mouse_pos[0] = mouse_event.pos[0]
-            self.mouse_pos[1] = mouse_event.pos[1]
-            self.language_engine.global_symbol_table.set_constant(
-                'mouse.x', self.mouse_pos[0])
-            self.language_engine.global_symbol_table.set_constant(
-                'mouse.y', self.mouse_pos[1])
+            self.set_mouse_position(mouse_event.pos)
             if mouse_event.type == pygame.MOUSEMOTION:
                 return
+        #pylint: enable=no-member
+        # transmit all queued event types
+        for ev_name in self.queue_mouse_event(mouse_event):
+            self.event_engine.transmit_event(ev_name)
+            if ev_name not in ['mouse_nobutton', 'mouse_global_nobutton']:
+                self.debug("Event '{}' queued and transmitted".format(ev_name))
+
+    def set_mouse_position(self, pos):
+        """
+        Record the mouse cursor position, and make it available to user code
+        in the ``mouse.x`` and ``mouse.y`` constants.
+
+        :param pos: The mouse cursor's x, y coordinate
+        :type pos: tuple
+        """
+        self.mouse_pos[0] = pos[0]
+        self.mouse_pos[1] = pos[1]
+        self.language_engine.global_symbol_table.set_constant(
+            'mouse.x', self.mouse_pos[0])
+        self.language_engine.global_symbol_table.set_constant(
+            'mouse.y', self.mouse_pos[1])
+
+    def queue_mouse_event(self, mouse_event):
+        """
+        Queue the MouseEvents matching a mouse button event received from
+        pygame, without transmitting them.
+
+        Button events will queue MouseEvents of the appropriate global and
+        instance press or release types.  If no button event was received,
+        queue whichever of the nobutton global and instance events have
+        handlers.
+
+        :param mouse_event: The pygame mouse button event, or None to signal
+            that no button event occurred during the frame.
+        :type mouse_event: None | :py:class:`~pygame_maker.events.event.Event`
+        :return: The names of the queued events
+        :rtype: list
+        """
+        #pylint: disable=no-member
         event_names = []
         if mouse_event:
             mouse_button = mouse_event.button
@@ -505,18 +642,14 @@ class GameEngine(logging_object.LoggingObject):
                         event_names.append(ev_table_entry["global_released_name"])
                         # print("queue {}".format(event_names[-1]))
         else:
-            self.event_engine.queue_event(
-                event.MouseEvent("mouse_nobutton", {"position": self.mouse_pos}))
-            event_names.append("mouse_nobutton")
-            self.event_engine.queue_event(
-                event.MouseEvent("mouse_global_nobutton", {"position": self.mouse_pos}))
-            event_names.append("mouse_global_nobutton")
-        # transmit all queued event types
-        for ev_name in event_names:
-            self.event_engine.transmit_event(ev_name)
-            if ev_name not in ['mouse_nobutton', 'mouse_global_nobutton']:
-                self.debug("Event '{}' queued and transmitted".format(ev_name))
+            for nobutton_name in ("mouse_nobutton", "mouse_global_nobutton"):
+                if not self.event_engine.has_handlers(nobutton_name):
+                    continue
+                self.event_engine.queue_event(
+                    event.MouseEvent(nobutton_name, {"position": self.mouse_pos}))
+                event_names.append(nobutton_name)
         #pylint: enable=no-member
+        return event_names
 
     def setup(self, screen):
         """
@@ -617,21 +750,26 @@ class GameEngine(logging_object.LoggingObject):
         #  received this frame
         key_pressed = False
         mouse_button = False
-        # create any new objects that were queued by create_object* events
-        for new_obj, params in self.new_object_queue:
-            # This will transmit a 'create' event that will be received by the
-            #  new instance; I.E., all 'create' events happen here
-            new_obj.create_instance(self.draw_surface, params)
-        # clear the queue for next frame
-        self.new_object_queue = []
+        # input is coalesced: distinct key and mouse button event names are
+        #  each transmitted once (delivering every queued event of that name),
+        #  and only the latest mouse position is kept
+        key_event_names = []
+        mouse_event_names = []
+        mouse_pos = None
+        # create any new objects that were queued by create_object* events.
+        #  This will transmit the 'create' events that will be received by
+        #  the new instances; I.E., all 'create' events happen here
+        self.instance_lifecycle.create_queued(self.draw_surface)
+        self.profiler.mark("create")
         # begin_step happens before other events, but after create (new
         #  instances receive all events)
         sev = event.StepEvent('begin_step')
         self.event_engine.queue_event(sev)
         self.event_engine.transmit_event(sev.name)
+        self.profiler.mark("begin_step")
         #pylint: disable=no-member
-        while self.current_events:
-            cev = self.current_events.pop()
+        # handle events in the order they were received
+        for cev in self.current_events:
             if cev.type == pygame.QUIT:
                 self.done = True
                 break
@@ -640,27 +778,44 @@ class GameEngine(logging_object.LoggingObject):
                 if cev.key == pygame.K_ESCAPE:
                     self.done = True
                     break
-                else:
-                    self.send_key_event(cev)
-            elif cev.type in [pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
-                              pygame.MOUSEMOTION]:
-                self.send_mouse_event(cev)
-                if cev.type in [pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP]:
-                    mouse_button = True
+                key_event_name = self.queue_key_event(cev)
+                if key_event_name and key_event_name not in key_event_names:
+                    key_event_names.append(key_event_name)
+            elif cev.type == pygame.MOUSEMOTION:
+                mouse_pos = cev.pos
+            elif cev.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+                mouse_button = True
+                mouse_pos = cev.pos
+                for mouse_event_name in self.queue_mouse_event(cev):
+                    if mouse_event_name not in mouse_event_names:
+                        mouse_event_names.append(mouse_event_name)
         #pylint: enable=no-member
+        self.current_events = []
+        if mouse_pos is not None:
+            self.set_mouse_position(mouse_pos)
+        for key_event_name in key_event_names:
+            self.event_engine.transmit_event(key_event_name)
+            self.debug("Event '{}' queued and transmitted".format(key_event_name))
+        for mouse_event_name in mouse_event_names:
+            self.event_engine.transmit_event(mouse_event_name)
+            self.debug("Event '{}' queued and transmitted".format(mouse_event_name))
+        self.send_key_held_events()
         if not key_pressed:
             # no key events, so send the kb_no_key event
             self.send_key_event(None)
         if not mouse_button:
             # no mouse button events, so send the nobutton events
             self.send_mouse_event(None)
+        self.profiler.mark("input")
         # normal_step happens before updating object instance positions
         sev = event.StepEvent('normal_step')
         self.event_engine.queue_event(sev)
         self.event_engine.transmit_event(sev.name)
+        self.profiler.mark("normal_step")
         # perform position updates on all objects
         for obj_name in list(self.resources['objects'].keys()):
             self.resources['objects'][obj_name].update()
+        self.profiler.mark("motion")
         # check for object instance collisions
         obj_types = list(self.resources['objects'].values())
         collision_types = set()
@@ -669,6 +824,7 @@ class GameEngine(logging_object.LoggingObject):
         if collision_types:
             for coll_type in collision_types:
                 self.event_engine.transmit_event(coll_type)
+        self.profiler.mark("collision")
 
     def draw_objects(self):
         """Called by :py:meth:`run` to draw the foreground items."""
@@ -676,18 +832,26 @@ class GameEngine(logging_object.LoggingObject):
         sev = event.StepEvent('end_step')
         self.event_engine.queue_event(sev)
         self.event_engine.transmit_event(sev.name)
+        self.profiler.mark("end_step")
         drev = event.DrawEvent('draw')
         self.event_engine.queue_event(drev)
         self.event_engine.transmit_event(drev.name)
+        self.profiler.mark("draw")
 
     def draw_background(self):
         """Called by :py:meth:`run` to draw the room background."""
         if self.room_index < len(self.resources['rooms']):
             self.resources['rooms'][self.room_index].draw_room_background(self.draw_surface)
+        self.profiler.mark("background")
 
     def final_pass(self):
-        """Copy the room's pixels onto the display."""
+        """
+        Copy the room's pixels onto the display, adding the frame profiler
+        overlay if it is enabled.
+        """
         self.screen.blit(self.draw_surface, (0, 0))
+        self.profiler.draw_overlay(self.screen)
+        self.profiler.mark("final_pass")
 
     def is_done(self):
         """Report game's 'done' state."""
@@ -711,8 +875,11 @@ class GameEngine(logging_object.LoggingObject):
 
         # --- Main Loop ---
         while not self.done:
+            self.profiler.start_frame()
+            self.language_engine.start_frame()
             for an_event in pygame.event.get():
                 self.collect_event(an_event)
+            self.profiler.mark("events")
 
             # --- Game Logic ---
             self.update()
@@ -725,6 +892,8 @@ class GameEngine(logging_object.LoggingObject):
             # update screen
             self.final_pass()
             pygame.display.flip()
+            self.profiler.mark("flip")
+            self.profiler.end_frame()
 
             # limit frame rate
             self.clock.tick(self.game_settings['frames_per_second'])
@@ -67,6 +67,22 @@ class OpStackUnderflowError(logging_object.LoggingException):
     pass
 
 
+class ExpressionError(logging_object.LoggingException):
+    """
+    Raised when an expression's source contains anything other than a single
+    expression.
+    """
+    pass
+
+
+class CodeBlockTypeError(logging_object.LoggingException):
+    """
+    Raised when a code block applies an operator or function to a value of a
+    type it can't accept, E.G. subtracting a string.
+    """
+    pass
+
+
 class CodeBlock(logging_object.LoggingObject):
     """
     Helper class that is created by the CodeBlockGenerator class method, which
@@ -95,6 +111,29 @@ class CodeBlock(logging_object.LoggingObject):
         "operator.ne": ["number", "number"],
         "math.pow": ["number", "number"]
     }
+    #: The function performing each operator, for folding operations on
+    #: constants while compiling
+    OPERATOR_CALLABLES = {
+        "operator.add": operator.add,
+        "operator.sub": operator.sub,
+        "operator.mul": operator.mul,
+        "operator.truediv": operator.truediv,
+        "operator.mod": operator.mod,
+        "operator.not_": operator.not_,
+        "operator.lt": operator.lt,
+        "operator.le": operator.le,
+        "operator.gt": operator.gt,
+        "operator.ge": operator.ge,
+        "operator.eq": operator.eq,
+        "operator.ne": operator.ne,
+        "math.pow": math.pow
+    }
+    #: Language engine constants that never change, replaced by their values
+    #: while compiling
+    FOLDED_CONSTANTS = {
+        "pi": math.pi,
+        "e": math.e
+    }
     OPERATOR_REPLACEMENTS = {
         "+": "operator.add",
         "-": "operator.sub",
@@ -141,6 +180,7 @@ class CodeBlock(logging_object.LoggingObject):
     #                    which will match one of {action_params})
     ACTION_CODE_BOILERPLATE = """
 def userfunc_{action_name}(_symbols, {action_params}, count=0):
+    spend_steps(_symbols, 1)
     success = 0
     if 'self' in list(_symbols['locals'].keys()):
         if 'in_event' in list(_symbols['locals'].keys()):
@@ -160,7 +200,33 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
     return success
 
 """
+    #: Operators replaced in ``run_batch()`` functions by versions from
+    #: :py:mod:`~pygame_maker.logic.run_time_support` that accept arrays;
+    #: the others work on arrays as they are
+    BATCH_OPERATORS = {
+        "operator.not_": "batch_not",
+        "math.pow": "batch_pow",
+        "and": "batch_and",
+        "or": "batch_or"
+    }
+    #: Operators whose boolean array operands are converted to integers in
+    #: ``run_batch()`` functions
+    BATCH_ARITHMETIC = ("operator.add", "operator.sub", "operator.mul", "operator.truediv",
+                        "operator.mod")
+    #: Symbols that only exist while the code block runs for one instance
+    INSTANCE_CONSTANTS = ("self", "in_event")
+    #: The game language operator for each Python operator, for messages
+    SOURCE_OPERATORS = dict([(py_op, op) for op, py_op in OPERATOR_REPLACEMENTS.items()])
+    #: Operators that fail on strings, whatever the other operand
+    NUMBER_OPERATORS = ("operator.sub", "operator.truediv", "math.pow")
+    #: Operators that fail when comparing strings with numbers
+    ORDER_OPERATORS = ("operator.lt", "operator.le", "operator.gt", "operator.ge")
     SYMBOL_RE = re.compile("_[a-zA-Z][a-zA-Z0-9._]*$")
+    #: Marks operands whose value isn't known until the code runs
+    NOT_CONSTANT = object()
+    #: The symbol an expression is assigned to while it's parsed (see
+    #: :py:meth:`CodeBlockGenerator.wrap_expression`)
+    EXPRESSION_SYMBOL = "intern_expression"
     GLOBAL_RE = re.compile("^__")
     RETURN_RE = re.compile("  return ")
 
@@ -201,6 +267,42 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         if funcmap is not None:
             self.functionmap.update(funcmap)
         self.astree = astree
+        #: The Python code objects executed in the module by :py:meth:`load`,
+        #: in order
+        self.compiled_code = []
+        # while converting the outer block to Python, the symbols it can
+        #  read from Python locals (with whether each read comes before any
+        #  assignment), and whether it calls functions that can change symbols
+        self.symbols_read = None
+        self.calls_symbol_functions = False
+        # the Python local variable holding each symbol read by the outer
+        #  block, or None when symbols are looked up on every read
+        self.symbol_locals = None
+        # while converting the outer block, whether an assignment may have
+        #  run, and the symbols certain to have been assigned.  Assignments
+        #  run the symbol change callback, which may change other symbols,
+        #  so after one only assigned symbols are still known to match their
+        #  Python locals.
+        self.symbols_changed = False
+        self.symbols_assigned = set()
+        #: Whether the code block holds a single expression, converted into
+        #: an ``evaluate()`` function instead of ``run()``
+        self.is_expression = False
+        # while converting the outer block into run_batch(), the symbols it
+        #  reads and assigns, in order, and the number of masks created
+        self.batch_reads = None
+        self.batch_stores = None
+        self.batch_mask_count = 0
+        #: The type ("number", "boolean" or "string") of each symbol the
+        #: outer block assigns, after it runs, found by
+        #: :py:meth:`infer_types`; symbols whose type depends on the branches
+        #: taken are left out
+        self.symbol_types = {}
+        # the types of the values each token of a code line leaves on the
+        #  stack (None where unknown), by the line's id
+        self.value_types = {}
+        # while inferring a function's types, the types of its return values
+        self.return_types = None
 
     def add_to_func_map(self, func_map):
         """
@@ -382,8 +484,7 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         only important for functions that have more than 1 arg, since the arg
         count is based on how many ','s are found).
 
-        TODO: Argument type-checking. Assume this is as simple as number vs.
-        string, and strings aren't supported yet.
+        Argument types are checked later, by :py:meth:`get_call_type`.
 
         :param parsestr: The entire string parsed by pyparsing
         :type parsestr: str
@@ -549,6 +650,7 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         self.debug("push_func_block(<code str>, parsestr=.., loc={}, toks={}):".
                    format(loc, toks))
         self.reduce_block(self.frame)
+        self.infer_function_types(self.function_name)
         func_loc = [0, 0]
         param_list = [fparam["name"] for fparam in self.functionmap[self.function_name]["arglist"]]
         function_body = self.to_python_block(self.frame, func_loc, self.function_name)
@@ -558,7 +660,8 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         func_lines += [
             "  if (count > 100):",
             "    raise CodeBlockRuntimeError(\"{}: Call stack depth limit exceeded\")".
-            format(self.function_name)
+            format(self.function_name),
+            "  spend_steps(_symbols, {:d})".format(self.count_steps(self.frame))
         ]
         func_lines += function_body
         ret_minfo = self.RETURN_RE.match(func_lines[-1])
@@ -690,75 +793,199 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         self.stack.append(list(self.scratch) + ["_return"])
         self.scratch = []
 
+    def _get_operand_value(self, token):
+        # Return the constant value of an operand token, or NOT_CONSTANT.
+        if isinstance(token, numbers.Number):
+            return token
+        if token.startswith("_"):
+            name = token[1:]
+            if name in self.FOLDED_CONSTANTS:
+                # function parameters may hide the constants
+                func_info = self.functionmap.get(self.function_name)
+                if func_info is None or \
+                        name not in [arg["name"] for arg in func_info["arglist"]]:
+                    return self.FOLDED_CONSTANTS[name]
+        return self.NOT_CONSTANT
+
+    def _get_arg_count(self, token):
+        # Return the number of operands a postfix token takes, or None if
+        #  the token isn't recognized.
+        if isinstance(token, numbers.Number) or token.startswith("str("):
+            return 0
+        if token in self.OPERATOR_FUNCTIONS:
+            return len(self.OPERATOR_FUNCTIONS[token])
+        if token == "unary -":
+            return 1
+        if token in ("and", "or"):
+            return 2
+        if self.SYMBOL_RE.match(token):
+            if token[1:] in self.functionmap:
+                return len(self.functionmap[token[1:]]["arglist"])
+            return 0
+        return None
+
     def reduce_line(self, code_line):
         """
-        Iterate over a list containing an expression, pre-calculating
-        simple numeric operations and replacing the operands and operator
-        with the result.  Repeat until no more changes are made.
-
-        :param code_line: The list of the terms in an expression
+        Fold operations on constants in a postfix expression, replacing the
+        operands and operator with the result.
+
+        The expression is evaluated once from left to right, keeping track of
+        where each operand starts and whether its value is known.  Numbers
+        and the :py:attr:`FOLDED_CONSTANTS` are known, as are the results of
+        operators applied only to known values.  An ``and`` or ``or`` whose
+        left operand is known is replaced by whichever operand it would
+        produce.  Lines containing anything unexpected are left unchanged.
+
+        Folding keeps the results the code would produce when run: operations
+        on number literals alone keep the type of their operands (see
+        :py:meth:`execute_operation`), as they always have, and negating a
+        comparison or boolean operation has no effect, as in
+        :py:meth:`to_python_line`.
+
+        :param code_line: The list of the terms in an expression, possibly
+            an assignment or return
         :type code_line: list
         """
         self.debug("    reduce_line(code_line={}):".format(str(code_line)))
-        changed_line = True
-        while changed_line:
-            line_idx = 0
-            changed_line = False
-            while line_idx < len(code_line):
-                check_op = "{}".format(code_line[line_idx])
-                # print("check op: {}".format(check_op))
-                if check_op in self.OPERATOR_FUNCTIONS:
-                    # print("found op: {}".format(check_op))
-                    op_len = len(self.OPERATOR_FUNCTIONS[check_op])
-                    if line_idx >= op_len:
-                        all_numbers = True
-                        for rev in range(line_idx - op_len, line_idx):
-                            rev_item = code_line[rev]
-                            # print("check if num: {}".format(rev_item))
-                            if not isinstance(rev_item, numbers.Number):
-                                all_numbers = False
-                                break
-                        if all_numbers:
-                            op_result = self.execute_operation(
-                                check_op, code_line[line_idx - op_len:line_idx])
-                            code_line[line_idx - op_len] = op_result
-                            for _ in range(op_len):
-                                del code_line[line_idx - op_len + 1]
-                            changed_line = True
-                            break
-                elif check_op == "unary -":
-                    # the special case
-                    if line_idx > 0:
-                        if isinstance(code_line[line_idx - 1], numbers.Number):
-                            code_line[line_idx - 1] *= -1
-                            del code_line[line_idx]
-                            changed_line = True
-                            break
-                line_idx += 1
+        start = 0
+        end = len(code_line)
+        if end > 0 and code_line[-1] == '=':
+            # skip the assigned symbol
+            start = 1
+            end -= 1
+        elif end > 0 and code_line[-1] == "_return":
+            end -= 1
+        reduced = []
+        # for each operand: its starting position in reduced, its value,
+        #  whether it's calculated only from number literals, and whether
+        #  it's a comparison or boolean operation
+        operands = []
+        for token in code_line[start:end]:
+            arg_count = self._get_arg_count(token)
+            if arg_count is None or arg_count > len(operands):
+                return
+            if isinstance(token, numbers.Number) or token.startswith("str(") or \
+                    (arg_count == 0 and token[1:] not in self.functionmap):
+                value = self._get_operand_value(token)
+                operands.append((len(reduced), value, isinstance(token, numbers.Number), False))
+                reduced.append(token if value is self.NOT_CONSTANT else value)
+                continue
+            args = operands[len(operands) - arg_count:]
+            del operands[len(operands) - arg_count:]
+            op_start = args[0][0] if args else len(reduced)
+            values = [arg[1] for arg in args]
+            literal = bool(args) and all([arg[2] for arg in args])
+            value = self.NOT_CONSTANT
+            if token == "unary -":
+                if args[0][3]:
+                    # negating a comparison does nothing
+                    operands.append(args[0])
+                    continue
+                if values[0] is not self.NOT_CONSTANT:
+                    value = values[0] * -1
+                is_bool = False
+            elif token in ("and", "or"):
+                literal = False
+                is_bool = True
+                left_value, right_value = values
+                if left_value is not self.NOT_CONSTANT:
+                    if bool(left_value) == (token == "or"):
+                        # the left operand decides the result
+                        del reduced[args[1][0]:]
+                        operands.append((op_start, left_value, False, True))
+                    else:
+                        del reduced[op_start]
+                        operands.append((op_start, right_value, False, True))
+                    continue
+            elif token in self.OPERATOR_CALLABLES:
+                if self.NOT_CONSTANT not in values:
+                    if literal:
+                        value = self.execute_operation(token, values)
+                    else:
+                        try:
+                            value = self.OPERATOR_CALLABLES[token](*values)
+                        except (ArithmeticError, ValueError):
+                            pass
+                literal = literal and value is not self.NOT_CONSTANT
+                # folded comparisons of literals are numbers, like any other
+                #  literal
+                is_bool = token in self.CONDITIONALS and not literal
+            else:
+                # function call
+                literal = False
+                is_bool = False
+            if value is self.NOT_CONSTANT:
+                reduced.append(token)
+            else:
+                del reduced[op_start:]
+                reduced.append(value)
+            operands.append((op_start, value, literal, is_bool))
+        if len(operands) == 1:
+            code_line[start:end] = reduced
 
     def reduce_block(self, block):
         """
-        Iterate through each line within the given block of postfix expressions
-        and recursively through sub-blocks, reducing numeric operations when
-        found.
+        Reduce each line within the given block of postfix expressions and,
+        recursively, within its conditionals.
+
+        Conditions that reduce to a constant remove dead branches: a false
+        branch is dropped, and a true one replaces itself and every later
+        branch of its conditional, its lines joining the enclosing block if
+        no earlier branch remains.
 
         :param block: A list of code lines, which are either lists themselves,
-            or the marker strings '_if', '_elseif', or '_else'
+            or the marker strings '_if', '_elseif', or '_else' each followed
+            by a list holding the condition (unless '_else') and the lines of
+            the branch
         :type block: list containing lists and/or strings
         """
         self.debug("  reduce_block(block={}):".format(block))
+        reduced = []
+        # whether the current conditional still has a branch, and whether
+        #  one of its branches is always taken
+        branch_kept = False
+        branch_taken = False
         block_idx = 0
         while block_idx < len(block):
             code_line = block[block_idx]
-            if isinstance(code_line, str) and code_line in ['_if', '_elseif', '_else']:
-                # handle the conditional block here, it's a list inside a list
-                self.reduce_block(block[block_idx + 1])
-                block_idx += 2
+            if not (isinstance(code_line, str) and code_line in ['_if', '_elseif', '_else']):
+                if isinstance(code_line, list):
+                    self.reduce_line(code_line)
+                reduced.append(code_line)
+                block_idx += 1
                 continue
-            if isinstance(code_line, list):
-                # print("Reduce line: {}".format(code_line))
-                self.reduce_line(code_line)
-            block_idx += 1
+            branch = block[block_idx + 1]
+            block_idx += 2
+            if code_line == '_if':
+                branch_kept = False
+                branch_taken = False
+            if branch_taken:
+                continue
+            if code_line == '_else':
+                condition = []
+                lines = list(branch)
+                always_taken = True
+            else:
+                condition = branch[0]
+                self.reduce_line(condition)
+                lines = branch[1:]
+                always_taken = None
+                if len(condition) == 1 and isinstance(condition[0], numbers.Number):
+                    always_taken = bool(condition[0])
+            if always_taken is False:
+                continue
+            self.reduce_block(lines)
+            if always_taken is None:
+                reduced.append('_elseif' if branch_kept else '_if')
+                reduced.append([condition] + lines)
+                branch_kept = True
+            else:
+                branch_taken = True
+                if branch_kept:
+                    reduced.extend(['_else', lines])
+                else:
+                    reduced.extend(lines)
+        block[:] = reduced
 
     def reduce(self):
         """
@@ -768,7 +995,278 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         self.debug("reduce():")
         self.reduce_block(self.outer_block)
 
-    def to_python_line(self, code_line, loc=(0, 0), func_name=None):
+    @staticmethod
+    def join_types(types):
+        """
+        Return the type shared by all of a list of value types.
+
+        :param types: Value types, which may include None for unknown types
+        :type types: list
+        :return: The shared type, or None if the types differ or are unknown
+        :rtype: None | str
+        """
+        if len(set(types)) == 1:
+            return types[0]
+        return None
+
+    def infer_types(self):
+        """
+        Infer the type of each value in the outer block: "number",
+        "boolean", "string", or unknown.
+
+        Number and string literals, operator results and function return
+        values have known types, and so do symbols once the code block has
+        assigned them.  Symbols read before being assigned could hold
+        anything, as could the results of operators applied to them, since
+        the game language lets a symbol hold any type.  The types found are
+        used while converting the code block to Python.
+
+        Operations that would fail once the code block runs, such as
+        subtracting a string or comparing a string with a number, are
+        reported now instead.
+
+        :raise: CodeBlockTypeError if an operator or function is given a
+            value it can't accept
+        """
+        self.debug("infer_types():")
+        self.symbol_types = self.infer_block_types(self.outer_block, {})
+
+    def infer_function_types(self, func_name):
+        """
+        Infer the types of the values in a function defined by the code
+        block, and keep the type it returns in the function map as its
+        ``return_type``.  Functions that can reach their end without a
+        ``return`` return a number.
+
+        :param func_name: The function's name
+        :type func_name: str
+        :raise: CodeBlockTypeError if an operator or function is given a
+            value it can't accept
+        """
+        self.debug("infer_function_types(func_name={}):".format(func_name))
+        block = self.functionmap[func_name]["block"]
+        self.return_types = []
+        try:
+            self.infer_block_types(block, {}, func_name)
+            if not (block and isinstance(block[-1], list) and block[-1][-1] == "_return"):
+                self.return_types.append("number")
+            self.functionmap[func_name]["return_type"] = self.join_types(self.return_types)
+        finally:
+            self.return_types = None
+
+    def infer_block_types(self, block, symbol_types, func_name=None):
+        """
+        Infer the types of the values in a block of code lines and,
+        recursively, in its conditionals.
+
+        :param block: A list of code lines, which are either lists
+            themselves, or the marker strings '_if', '_elseif', or '_else'
+            each followed by a list
+        :type block: list
+        :param symbol_types: The types of the symbols assigned before the
+            block runs
+        :type symbol_types: dict
+        :param func_name: If the block is inside a function definition, the
+            function's name
+        :type func_name: None | str
+        :raise: CodeBlockTypeError if an operator or function is given a
+            value it can't accept
+        :return: The types of the symbols assigned after the block runs
+        :rtype: dict
+        """
+        symbol_types = dict(symbol_types)
+        # the symbol types before the current conditional, and after each
+        #  of its branches
+        before_types = None
+        branch_types = []
+        block_idx = 0
+        while block_idx <= len(block):
+            code_line = block[block_idx] if block_idx < len(block) else None
+            if before_types is not None and code_line not in ("_elseif", "_else"):
+                # the conditional is over; symbols keep a type only if every
+                #  way through it gives them the same one
+                symbol_types = {}
+                for symbol in branch_types[0]:
+                    sym_type = self.join_types([types.get(symbol) for types in branch_types])
+                    if sym_type is not None:
+                        symbol_types[symbol] = sym_type
+                before_types = None
+            if code_line is None:
+                break
+            if code_line in ("_if", "_elseif", "_else"):
+                branch = block[block_idx + 1]
+                block_idx += 2
+                if code_line == "_if":
+                    before_types = symbol_types
+                    # until an else branch, the conditional may be skipped
+                    branch_types = [before_types]
+                if code_line == "_else":
+                    del branch_types[0]
+                else:
+                    self.infer_line_types(branch[0], before_types, func_name)
+                    branch = branch[1:]
+                branch_types.append(self.infer_block_types(branch, before_types, func_name))
+                continue
+            self.infer_line_types(code_line, symbol_types, func_name)
+            block_idx += 1
+        return symbol_types
+
+    def infer_line_types(self, code_line, symbol_types, func_name=None):
+        """
+        Infer the types of the values in a line of code, keeping them for
+        converting the line to Python.  An assignment sets the assigned
+        symbol's type.
+
+        :param code_line: A list of postfix expression tokens
+        :type code_line: list
+        :param symbol_types: The types of the symbols assigned so far, which
+            an assignment updates
+        :type symbol_types: dict
+        :param func_name: If the line is inside a function definition, the
+            function's name
+        :type func_name: None | str
+        :raise: CodeBlockTypeError if an operator or function is given a
+            value it can't accept
+        """
+        type_stack = []
+        value_types = [None] * len(code_line)
+        arg_types = {}
+        if func_name is not None:
+            for func_arg in self.functionmap[func_name]["arglist"]:
+                arg_types[func_arg["name"]] = func_arg.get("type")
+        for op_idx, an_op in enumerate(code_line):
+            if op_idx == 0 and code_line[-1] == '=':
+                continue
+            if isinstance(an_op, numbers.Number):
+                value_type = "number"
+            elif an_op.startswith("str("):
+                value_type = "string"
+            elif an_op == '=':
+                # global assignments don't change symbols with the same name
+                #  that the code block reads
+                read_name = code_line[0][1:]
+                if not read_name.startswith("_") and type_stack and \
+                        type_stack[-1] is not None:
+                    symbol_types[read_name] = type_stack[-1]
+                else:
+                    symbol_types.pop(read_name.lstrip("_"), None)
+                break
+            elif an_op == "_return":
+                if self.return_types is not None and type_stack:
+                    self.return_types.append(type_stack[-1])
+                break
+            else:
+                arg_count = self._get_arg_count(an_op)
+                if arg_count is None or arg_count > len(type_stack):
+                    # the conversion to Python reports malformed lines
+                    return
+                args = type_stack[len(type_stack) - arg_count:]
+                del type_stack[len(type_stack) - arg_count:]
+                if an_op in self.OPERATOR_FUNCTIONS:
+                    value_type = self.get_operation_type(an_op, args, func_name)
+                elif an_op == "unary -":
+                    # negating a string leaves it unchanged
+                    value_type = args[0] if args[0] == "string" else "number"
+                elif an_op in ("and", "or"):
+                    # the result is one of the operands
+                    value_type = self.join_types(args)
+                elif an_op[1:] in self.functionmap:
+                    value_type = self.get_call_type(an_op[1:], args, func_name)
+                elif an_op[1:] in arg_types:
+                    value_type = arg_types[an_op[1:]]
+                else:
+                    value_type = symbol_types.get(an_op[1:])
+            type_stack.append(value_type)
+            value_types[op_idx] = value_type
+        self.value_types[id(code_line)] = value_types
+
+    def _type_error(self, message, func_name):
+        # Raise a CodeBlockTypeError naming the code block and function.
+        where = "'{}'".format(self.name)
+        if func_name is not None:
+            where = "{} function '{}'".format(where, func_name)
+        raise CodeBlockTypeError("In code block {}: {}".format(where, message), self.error)
+
+    def get_operation_type(self, op_name, arg_types, func_name=None):
+        """
+        Return the type of an operator's result, given the types of its
+        operands.
+
+        :param op_name: The operator's Python name, E.G. "operator.add"
+        :type op_name: str
+        :param arg_types: The operands' types, each None if unknown
+        :type arg_types: list
+        :param func_name: If the operator is inside a function definition,
+            the function's name
+        :type func_name: None | str
+        :raise: CodeBlockTypeError if the operator fails on the operand types
+        :return: The result's type, or None if it's unknown
+        :rtype: None | str
+        """
+        if op_name in self.CONDITIONALS or op_name == "operator.not_":
+            if op_name in self.ORDER_OPERATORS and "string" in arg_types and \
+                    None not in arg_types and len(set(arg_types)) > 1:
+                self._type_error("Can't compare a string with a {} using '{}'".format(
+                    [arg for arg in arg_types if arg != "string"][0],
+                    self.SOURCE_OPERATORS[op_name]), func_name)
+            return "boolean"
+        left_type, right_type = arg_types
+        known = None not in arg_types
+        strings = arg_types.count("string")
+        if op_name in self.NUMBER_OPERATORS:
+            if strings:
+                self._type_error("Can't use '{}' on a string".format(
+                    self.SOURCE_OPERATORS[op_name]), func_name)
+            return "number"
+        if op_name == "operator.add":
+            if known and strings == 1:
+                self._type_error("Can't add a string and a {}".format(
+                    [arg for arg in arg_types if arg != "string"][0]), func_name)
+            if strings == 2:
+                return "string"
+        elif op_name == "operator.mul":
+            if strings == 2:
+                self._type_error("Can't multiply a string by a string", func_name)
+        elif op_name == "operator.mod":
+            if right_type == "string" and left_type != "string" and left_type is not None:
+                self._type_error("Can't use '%' on a {} and a string".format(left_type),
+                                 func_name)
+            if left_type != "number" and left_type != "boolean":
+                # a string on the left formats the right operand into it
+                return None
+            return "number"
+        if known and not strings:
+            return "number"
+        return None
+
+    def get_call_type(self, func_name, arg_types, caller_name=None):
+        """
+        Return the type of the value a function call returns, after checking
+        its arguments' types against the function's declaration.  Strings
+        can't be passed for number or boolean arguments, while anything can
+        be passed for a string argument.
+
+        :param func_name: The function's name
+        :type func_name: str
+        :param arg_types: The arguments' types, each None if unknown
+        :type arg_types: list
+        :param caller_name: If the call is inside a function definition, the
+            calling function's name
+        :type caller_name: None | str
+        :raise: CodeBlockTypeError if a string is passed for an argument that
+            needs a number or boolean
+        :return: The function's return type, or None if it's unknown
+        :rtype: None | str
+        """
+        func_info = self.functionmap[func_name]
+        for func_arg, arg_type in zip(func_info["arglist"], arg_types):
+            if arg_type == "string" and func_arg.get("type") in ("number", "boolean"):
+                self._type_error("Argument '{}' of function '{}' must be a {}, not a string".
+                                 format(func_arg.get("name"), func_name, func_arg["type"]),
+                                 caller_name)
+        return func_info.get("return_type")
+
+    def to_python_line(self, code_line, loc=(0, 0), func_name=None, value_types=None):
         """
         Convert a line of game language into Python code.
 
@@ -786,6 +1284,9 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         :param func_name: If this line is part of a function definition, the
             function's name
         :type func_name: None | str
+        :param value_types: The types of the values each token leaves on the
+            stack, if the line isn't one :py:meth:`infer_types` was given
+        :type value_types: None | list
         :raise: OpStackOverflowError if tokens were left over, or
             OpStackUnderflowError if expected tokens were missing
         :return: A line of Python code
@@ -796,16 +1297,18 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         op_stack = []
         symbol = None
         start_pos = 0
-        type_upgrade = False
+        if value_types is None:
+            value_types = self.value_types.get(id(code_line), [None] * len(code_line))
         if code_line[-1] == '=':
             symbol = code_line[0][1:]
             start_pos = 1
         for op_idx in range(start_pos, len(code_line)):
             an_op = code_line[op_idx]
+            value_type = value_types[op_idx]
             if isinstance(an_op, int):
-                op_stack.append({"type": "int", "val": str(an_op)})
+                op_stack.append({"type": value_type, "val": str(an_op)})
             elif isinstance(an_op, float):
-                op_stack.append({"type": "float", "val": str(an_op)})
+                op_stack.append({"type": value_type, "val": repr(an_op)})
             else:
                 sym_minfo = self.SYMBOL_RE.match(an_op)
                 if sym_minfo:
@@ -824,29 +1327,15 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
                         arg_count = len(self.functionmap[opname]["arglist"])
                         opcall = "userfunc_{}".format(opname)
                         func_params = ["_symbols"]
+                        if self.can_change_symbols(opname):
+                            self.calls_symbol_functions = True
                     id_start = len(op_stack) - arg_count
                     id_end = len(op_stack)
                     if id_start < 0:
                         raise OpStackUnderflowError(
                             "Stack underflow at line {} when assembling the line:\n{}".
                             format(loc[0], code_line), self.error)
-                    res_type = "int"
-                    last_type = None
-                    type_upgrade = False
                     params = list(op_stack[id_start:id_end])
-                    if opcall not in self.CONDITIONALS:
-                        for arghash in params:
-                            # track argument types
-                            if arghash["type"] == "float":
-                                res_type = "float"
-                            elif arghash["type"] == "string":
-                                res_type = "str"
-                            if not last_type:
-                                last_type = res_type
-                            elif last_type != res_type:
-                                type_upgrade = True
-                    else:
-                        res_type = "bool"
                     # replace args and function call/operator with python
                     #  code string, keeping track of the result type
                     for _ in range(arg_count):
@@ -857,21 +1346,17 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
                         #  a count+1 arg to limit recursion depth (this is to
                         #  prevent user code from crashing the game engine)
                         param_list.append("count+1")
-                    op_stack.append({"type": res_type,
+                    op_stack.append({"type": value_type,
                                      "val": "{}({})".format(opcall, ",".join(param_list))})
-                    if type_upgrade:
-                        prev_val = op_stack[-1]["val"]
-                        prev_val = "{}({})".format(res_type, prev_val)
                 elif opname == "unary -":
-                    # the special case
+                    # the special case: negating a string has no effect
+                    #  (reduce_line() already dropped the negation of
+                    #  comparisons and boolean operations)
                     if op_stack:
                         last_op_val = op_stack[-1]["val"]
-                        last_op_type = op_stack[-1]["type"]
-                        if last_op_type in ["int", "float"]:
-                            op_stack.insert(-1,
-                                            {"type": last_op_type,
-                                             "val": "operator.mul(-1, {})".format(last_op_val)})
-                            del op_stack[-1]
+                        if op_stack[-1]["type"] != "string":
+                            op_stack[-1] = {"type": value_type,
+                                            "val": "operator.mul(-1, {})".format(last_op_val)}
                 elif opname in ["and", "or"]:
                     id_start = len(op_stack) - 2
                     id_end = len(op_stack)
@@ -883,18 +1368,29 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
                     for _ in range(2):
                         del op_stack[-1]
                     op_stack.append(
-                        {"type": "bool",
+                        {"type": value_type,
                          "val": "(({}) {} ({}))".format(params[0]['val'],
                                                         opname, params[1]['val'])})
                 elif opname == '=':
                     # '=' must always be the last token for an assignment.
                     #  Time to store the value in the symbol table
                     last_op_val = op_stack[-1]["val"]
-                    last_op_val = "update_symbol(_symbols, '{}', {})".format(symbol, last_op_val)
+                    # global assignments name the symbol with a leading '_'
+                    read_name = symbol[1:] if symbol.startswith("_") else symbol
+                    if func_name is None and self.symbol_locals and \
+                            read_name in self.symbol_locals:
+                        last_op_val = "{} = store_symbol(_symbols, '{}', {})".format(
+                            self.symbol_locals[read_name], symbol, last_op_val)
+                    else:
+                        last_op_val = "update_symbol(_symbols, '{}', {})".format(
+                            symbol, last_op_val)
+                    if func_name is None:
+                        self.symbols_changed = True
+                        self.symbols_assigned.add(read_name)
                     op_stack[-1]['val'] = last_op_val
                     break
                 elif opname.startswith("str("):
-                    op_stack.append({"type": "str", "val": opname})
+                    op_stack.append({"type": value_type, "val": opname})
                 elif opname == 'return':
                     last_op_val = op_stack[-1]["val"]
                     last_op_val = "return {}".format(last_op_val)
@@ -907,17 +1403,28 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
                             for narg in self.functionmap[func_name]["arglist"]]
                         if opname in func_arg_names:
                             func_arg = True
-                    if not func_arg:
-                        op_stack.append({"type": "int",
+                    # a symbol's Python local may be out of date once an
+                    #  assignment to a different symbol has run
+                    local_read = (not func_arg and func_name is None and
+                                  (not self.symbols_changed or
+                                   opname in self.symbols_assigned))
+                    if local_read and self.symbol_locals and opname in self.symbol_locals:
+                        op_stack.append({"type": value_type,
+                                         "val": self.symbol_locals[opname]})
+                    elif not func_arg:
+                        if local_read and self.symbols_read is not None:
+                            # symbols read before any assignment are loaded
+                            #  when run() starts
+                            self.symbols_read.append((opname, not self.symbols_changed))
+                        op_stack.append({"type": value_type,
                                          "val": "get_symbol(_symbols, '{}')".format(opname)})
                     else:
-                        op_stack.append({"type": "int",
+                        op_stack.append({"type": value_type,
                                          "val": "{}".format(opname)})
                         # print("New op_stack: {}".format(op_stack))
         if len(op_stack) > 1:
             raise OpStackOverflowError("Stack overflow at line {} when assembling the line:\n{}".
                                        format(loc[0], code_line), self.error)
-        # apply the (possibly upgraded) result type to the remaining item
         self.debug("      Result of {}: {}".format(str(code_line), op_stack))
         python_code_line = "{}{}".format(' ' * loc[1], op_stack[-1]['val'])
         loc[0] += 1
@@ -945,21 +1452,47 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         loc[1] += 2
         # print("block start: col is now: {}".format(loc[1]))
         block_idx = 0
+        # the symbol state before the current conditional, followed by the
+        #  state after each of its branches
+        branch_states = None
         while block_idx < len(block):
             code_line = block[block_idx]
             if code_line in ["_if", "_elseif", "_else"]:
+                if code_line == "_if":
+                    self._join_branch_states(branch_states)
+                    branch_states = [(self.symbols_changed, set(self.symbols_assigned))]
+                # every branch starts from the state before the conditional
+                self.symbols_changed = branch_states[0][0]
+                self.symbols_assigned = set(branch_states[0][1])
                 cond_name = code_line[1:]
                 python_code_lines += self.to_python_conditional(
                     cond_name, block[block_idx + 1], loc, func_name)
+                if code_line == "_else":
+                    # some branch always runs
+                    del branch_states[0]
+                branch_states.append((self.symbols_changed, self.symbols_assigned))
                 block_idx += 2
                 continue
             else:
+                self._join_branch_states(branch_states)
+                branch_states = None
                 python_code_lines.append(self.to_python_line(code_line, loc, func_name))
                 block_idx += 1
+        self._join_branch_states(branch_states)
+        if not python_code_lines:
+            # every line was removed as unreachable
+            python_code_lines.append("{}pass".format(' ' * loc[1]))
         loc[1] -= 2
         # print("block end: col is now: {}".format(loc[1]))
         return python_code_lines
 
+    def _join_branch_states(self, branch_states):
+        # Set the symbol state after a conditional from the states its
+        #  branches may leave behind.
+        if branch_states:
+            self.symbols_changed = any([state[0] for state in branch_states])
+            self.symbols_assigned = set.intersection(*[state[1] for state in branch_states])
+
     def to_python_conditional(self, conditional_name, block, loc=(0, 0), func_name=None):
         """
         When a conditional is found in a code block, produce an executable line
@@ -984,12 +1517,12 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         self.debug("  to_python_conditional(conditional_name={}, loc={}, func_name={}):".
                    format(conditional_name, loc, func_name))
         python_code_lines = []
-        conditional_code = self.to_python_line(block[0], [loc[0], 0], func_name)
         py_cond_name = str(conditional_name)
         block_start_idx = 1
         if conditional_name == "elseif":
             py_cond_name = "elif"
         if py_cond_name in ["if", "elif"]:
+            conditional_code = self.to_python_line(block[0], [loc[0], 0], func_name)
             python_code_lines.append("{}{} ({}):".format(' ' * loc[1],
                                                          py_cond_name, conditional_code))
         else:
@@ -1000,47 +1533,341 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
                                                   func_name)
         return python_code_lines
 
+    def can_change_symbols(self, func_name):
+        """
+        Report whether calling a function may change symbol values: actions
+        and functions defined in game language code can, while the built-in
+        functions from :py:mod:`~pygame_maker.logic.run_time_support` only
+        read constants.
+
+        :param func_name: The name of a known function
+        :type func_name: str
+        :rtype: bool
+        """
+        return (func_name in self.action_names or func_name in self.external_functions or
+                'compiled' in self.functionmap[func_name])
+
+    def count_steps(self, block):
+        """
+        Count the steps charged to the execution budget for running a block
+        (see :py:class:`~pygame_maker.logic.run_time_support.ExecutionBudget`):
+        one for each line and condition, including those in every branch of
+        its conditionals.
+
+        :param block: A list of code lines, which are either lists
+            themselves, or the marker strings '_if', '_elseif', or '_else'
+            each followed by a list
+        :type block: list
+        :return: The most lines the block can run
+        :rtype: int
+        """
+        steps = 0
+        block_idx = 0
+        while block_idx < len(block):
+            if block[block_idx] in ["_if", "_elseif", "_else"]:
+                steps += self.count_steps(block[block_idx + 1])
+                block_idx += 2
+            else:
+                steps += 1
+                block_idx += 1
+        return steps
+
     def to_python(self):
         """
         Convert the postfix code representation into executable Python code.
 
+        Symbols read by the code block are normally looked up each time
+        they're read.  Unless the code block calls functions that may change
+        symbols behind its back, each symbol it reads is instead looked up
+        once when ``run()`` starts and kept in a Python local variable, which
+        assignments update along with the symbol table.  Since an assignment
+        runs the symbol table's change callback, which may change other
+        symbols, a symbol read after an assignment only comes from its Python
+        local if the code block has certainly assigned it by then.
+
+        ``run()`` starts by charging the execution budget for the lines the
+        code block may run (see :py:meth:`count_steps`).
+
         :return: The Python source code, inside a single string
         :rtype: str
         """
         self.debug("to_python():")
-        code_loc = [0, 0]
+        if self.is_expression:
+            return self.to_python_expression()
         python_code = ""
         # the code block has to have SOMETHING in it, but if it only contains
         #  function definitions, don't construct the run() method
         if self.outer_block:
-            python_lines = ["def run(_symbols):"]
-            python_lines += self.to_python_block(self.outer_block, code_loc)
+            self.symbols_read = []
+            self.calls_symbol_functions = False
+            try:
+                body_lines = self.to_python_block(self.outer_block, [0, 0])
+                self.symbols_changed = False
+                self.symbols_assigned = set()
+                if self.symbols_read and not self.calls_symbol_functions:
+                    # convert the block again, reading symbols from locals
+                    self.symbol_locals = {}
+                    load_lines = []
+                    loaded = set()
+                    for symbol, needs_load in self.symbols_read:
+                        if symbol not in self.symbol_locals:
+                            self.symbol_locals[symbol] = "_v{:d}_{}".format(
+                                len(self.symbol_locals), re.sub(r"\W", "_", symbol))
+                        if needs_load and symbol not in loaded:
+                            loaded.add(symbol)
+                            load_lines.append("  {} = get_symbol(_symbols, '{}')".format(
+                                self.symbol_locals[symbol], symbol))
+                    body_lines = load_lines + self.to_python_block(self.outer_block, [0, 0])
+            finally:
+                self.symbols_read = None
+                self.symbol_locals = None
+                self.symbols_changed = False
+                self.symbols_assigned = set()
+            python_lines = ["def run(_symbols):",
+                            "  spend_steps(_symbols, {:d})".format(
+                                self.count_steps(self.outer_block))]
+            python_lines += body_lines
             python_code = "\n".join(python_lines)
         return python_code
 
+    def to_python_expression(self):
+        """
+        Convert an expression into an executable Python function,
+        ``evaluate(local_symbol_table, global_symbol_table)``, returning the
+        expression's value.
+
+        The function reads symbols straight from the symbol tables it's
+        given, since an expression can't change them.
+
+        :return: The Python source code, inside a single string
+        :rtype: str
+        """
+        self.debug("to_python_expression():")
+        code_line = self.outer_block[0]
+        value_types = self.value_types.get(id(code_line), [None] * len(code_line))
+        python_lines = [
+            "def evaluate(_locals, _globals):",
+            "  _symbols = {'locals': _locals, 'globals': _globals}",
+            "  return {}".format(self.to_python_line(code_line[1:-1], [0, 0],
+                                                     value_types=value_types[1:-1]))]
+        return "\n".join(python_lines)
+
+    def to_python_batch_line(self, code_line, mask):
+        """
+        Convert a line of game language into a Python expression for a
+        ``run_batch()`` function, where each symbol may hold one value per
+        instance.
+
+        :param code_line: A list of postfix expression tokens for conversion
+        :type code_line: list
+        :param mask: The name of the Python variable holding the mask of
+            instances running the line
+        :type mask: str
+        :return: A tuple of the Python expression and the symbol it's
+            assigned to (or None), or None if the line can't run in batches
+        :rtype: None | tuple
+        """
+        op_stack = []
+        # the type of each value on op_stack
+        type_stack = []
+        symbol = None
+        value_types = self.value_types.get(id(code_line), [None] * len(code_line))
+        start = 0
+        end = len(code_line)
+        if code_line[-1] == '=':
+            symbol = code_line[0][1:]
+            start = 1
+            end -= 1
+            if symbol.startswith("_"):
+                # global symbols are shared by every instance
+                return None
+        for op_idx in range(start, end):
+            an_op = code_line[op_idx]
+            if isinstance(an_op, int):
+                op_stack.append(str(an_op))
+            elif isinstance(an_op, float):
+                op_stack.append(repr(an_op))
+            elif an_op in self.OPERATOR_FUNCTIONS or an_op in ("and", "or"):
+                arg_count = 2
+                if an_op in self.OPERATOR_FUNCTIONS:
+                    arg_count = len(self.OPERATOR_FUNCTIONS[an_op])
+                if len(op_stack) < arg_count:
+                    return None
+                args = op_stack[len(op_stack) - arg_count:]
+                arg_types = type_stack[len(op_stack) - arg_count:]
+                del op_stack[len(op_stack) - arg_count:]
+                if an_op in ("and", "or") and None not in arg_types and \
+                        len(set(arg_types)) > 1:
+                    # the result couldn't keep each instance's type
+                    return None
+                if an_op in self.BATCH_ARITHMETIC:
+                    # numbers need no conversion
+                    args = [arg if arg_type == "number" else "batch_number({})".format(arg)
+                            for arg, arg_type in zip(args, arg_types)]
+                op_stack.append("{}({})".format(self.BATCH_OPERATORS.get(an_op, an_op),
+                                                ",".join(args)))
+            elif an_op == "unary -":
+                # as in to_python_line(), negating a string has no effect
+                if op_stack and type_stack[-1] != "string":
+                    op_stack[-1] = "operator.mul(-1, {})".format(op_stack[-1])
+            elif self.SYMBOL_RE.match(an_op) and an_op[1:] not in self.functionmap:
+                opname = an_op[1:]
+                if opname.startswith("_") or opname in self.INSTANCE_CONSTANTS:
+                    return None
+                if opname not in self.batch_reads:
+                    self.batch_reads.append(opname)
+                op_stack.append("_batch.read('{}', {})".format(opname, mask))
+            else:
+                # function calls can run actions or change symbols, and
+                #  strings aren't numbers
+                return None
+            if op_stack:
+                type_stack[len(op_stack) - 1:] = [value_types[op_idx]]
+        if len(op_stack) != 1:
+            return None
+        return op_stack[0], symbol
+
+    def to_python_batch_block(self, block, mask, indent):
+        """
+        Convert a block of code lines for a ``run_batch()`` function, where
+        each assignment only changes the instances selected by a mask.
+
+        The instances reaching each branch of a conditional are found by
+        splitting the mask with the branch's condition, and a branch only
+        runs if it selects any of them.
+
+        :param block: A list of code lines, which are either lists
+            themselves, or the marker strings '_if', '_elseif', or '_else'
+            each followed by a list
+        :type block: list
+        :param mask: The name of the Python variable holding the mask of
+            instances running the block
+        :type mask: str
+        :param indent: The number of spaces to indent the lines by
+        :type indent: int
+        :return: The list of Python source code lines, or None if the block
+            can't run in batches
+        :rtype: None | list
+        """
+        python_code_lines = []
+        indent_str = ' ' * indent
+        # the mask of instances that haven't taken any branch of the
+        #  current conditional
+        rest_mask = mask
+        block_idx = 0
+        while block_idx < len(block):
+            code_line = block[block_idx]
+            if code_line in ["_if", "_elseif", "_else"]:
+                branch = block[block_idx + 1]
+                block_idx += 2
+                if code_line == "_if":
+                    rest_mask = mask
+                if code_line == "_else":
+                    branch_mask = rest_mask
+                else:
+                    reaching_mask = rest_mask
+                    condition = self.to_python_batch_line(branch[0], reaching_mask)
+                    if condition is None or condition[1] is not None:
+                        return None
+                    branch = branch[1:]
+                    self.batch_mask_count += 1
+                    branch_mask = "_mask{:d}".format(self.batch_mask_count)
+                    if code_line == "_if":
+                        self.batch_mask_count += 1
+                        rest_mask = "_mask{:d}".format(self.batch_mask_count)
+                    python_code_lines.append("{}{}, {} = batch_branch({}, {})".format(
+                        indent_str, branch_mask, rest_mask, reaching_mask, condition[0]))
+                branch_lines = self.to_python_batch_block(branch, branch_mask, indent + 2)
+                if branch_lines is None:
+                    return None
+                python_code_lines.append("{}if {}.any():".format(indent_str, branch_mask))
+                python_code_lines += branch_lines
+                continue
+            batch_line = self.to_python_batch_line(code_line, mask)
+            if batch_line is None:
+                return None
+            expression, symbol = batch_line
+            if symbol is None:
+                python_code_lines.append("{}{}".format(indent_str, expression))
+            else:
+                if symbol not in self.batch_stores:
+                    self.batch_stores.append(symbol)
+                python_code_lines.append("{}_batch.store('{}', {}, {})".format(
+                    indent_str, symbol, expression, mask))
+            block_idx += 1
+        if not python_code_lines:
+            python_code_lines.append("{}pass".format(indent_str))
+        return python_code_lines
+
+    def to_python_batch(self):
+        """
+        Convert the postfix code representation into a Python function,
+        ``run_batch(batch_scope)``, that runs the code block once for many
+        instances.
+
+        Symbols are read with ``batch_scope.read(name, mask)``, which may
+        return an array holding each instance's value (only the values of
+        the instances selected by the mask are used), and assigned with
+        ``batch_scope.store(name, value, mask)`` for the instances selected
+        by a boolean mask.  The names of the symbols read and assigned are
+        kept in the module's ``BATCH_READS`` and ``BATCH_STORES`` tuples, so
+        the caller can check that it supports them before running the code
+        block.
+
+        Only code blocks that do arithmetic on symbols can run in batches:
+        ones that call functions (which can run actions), use strings,
+        assign global symbols, or refer to the instance or event are left
+        out.
+
+        :return: The Python source code, inside a single string, or an empty
+            string if the code block can't run in batches
+        :rtype: str
+        """
+        self.debug("to_python_batch():")
+        if self.is_expression or not self.outer_block:
+            return ""
+        self.batch_reads = []
+        self.batch_stores = []
+        self.batch_mask_count = 0
+        try:
+            body_lines = self.to_python_batch_block(self.outer_block, "_mask0", 2)
+            if body_lines is None:
+                self.debug("  {} can't run in batches".format(self.name))
+                return ""
+            python_lines = [
+                "BATCH_READS = {!r}".format(tuple(self.batch_reads)),
+                "BATCH_STORES = {!r}".format(tuple(self.batch_stores)),
+                "def run_batch(_batch):",
+                "  _mask0 = _batch.mask"]
+        finally:
+            self.batch_reads = None
+            self.batch_stores = None
+        return "\n".join(python_lines + body_lines)
+
     def execute_operation(self, op_name, args):
         """
-        Given a valid Python operation and a list containing its args, convert
-        them into a string and eval() it.
+        Given a valid Python operation and a list containing its args, return
+        the result, with the type of the last non-int argument (or int).
 
         :param op_name: The name of the operator
         :type op_name: str
         :param args: The list of arguments to the operator
         :type args: list
+        :return: The result, or :py:attr:`NOT_CONSTANT` if the operation
+            is unknown or fails (E.G. division by zero), leaving the error
+            to be raised when the code runs
         """
         self.debug("execute_operation(op_name={}, args={}):".format(op_name, args))
-        res = None
-        stargs = [str(a) for a in args]
         result_type = int
         for arg in args:
             if not isinstance(arg, int):
                 result_type = type(arg)
-        if op_name in self.OPERATOR_FUNCTIONS:
-            # print("eval {} {}".format(op_name, stargs))
-            eval_str = "{}({})".format(op_name, ",".join(stargs))
-            res = eval(eval_str)
-            res = result_type(res)
-        return res
+        if op_name not in self.OPERATOR_CALLABLES:
+            return self.NOT_CONSTANT
+        try:
+            return result_type(self.OPERATOR_CALLABLES[op_name](*args))
+        except (ArithmeticError, ValueError):
+            return self.NOT_CONSTANT
 
     def define_action_methods(self):
         """
@@ -1073,23 +1900,45 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         :param import_list: The list of modules that need to be imported into
             the module
         :type import_list: None | list
+        :raise: CodeBlockTypeError if an operator or function is given a
+            value it can't accept (see :py:meth:`infer_types`)
         """
         self.debug("load(import_list={}):".format(str(import_list)))
+        compiled_code = []
         for userfunc in self.functionmap:
-            # print("exec {}".format(userfunc))
             if 'compiled' in self.functionmap[userfunc]:
-                exec(self.functionmap[userfunc]['compiled'], self.module_context.__dict__)
+                compiled_code.append(self.functionmap[userfunc]['compiled'])
         import_lines = "from pygame_maker.logic.run_time_support import *\n"
         if import_list:
             import_lines += "import {}\n".format(",".join(import_list))
-        exec_code = self.to_python()
+        try:
+            self.infer_types()
+            exec_code = self.to_python()
+            batch_code = self.to_python_batch()
+        finally:
+            self.value_types = {}
+        if batch_code:
+            exec_code = "{}\n{}".format(exec_code, batch_code)
         if self.external_functions:
             import_lines += "from pygame_maker.actions.action import Action\n"
             import_lines += self.define_action_methods()
         if exec_code:
             pyth_code = import_lines + exec_code
             self.info("  Run program:\n{}".format(pyth_code))
-            exec(pyth_code, self.module_context.__dict__)
+            compiled_code.append(compile(pyth_code, "<{}>".format(self.name), 'exec'))
+        self.load_compiled(compiled_code)
+
+    def load_compiled(self, compiled_code):
+        """
+        Execute already compiled Python code in the source code module, E.G.
+        the :py:attr:`compiled_code` of an earlier load of the same source.
+
+        :param compiled_code: The code objects to execute, in order
+        :type compiled_code: list
+        """
+        self.compiled_code = list(compiled_code)
+        for code_obj in self.compiled_code:
+            exec(code_obj, self.module_context.__dict__)
 
     def run(self, sym_tables):
         """
@@ -1103,6 +1952,21 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         if "run" in self.module_context.__dict__:
             return self.module_context.run(sym_tables)
 
+    def get_batch_code(self):
+        """
+        Return the code block's ``run_batch()`` function (see
+        :py:meth:`to_python_batch`), with the symbols it reads and assigns.
+
+        :return: A tuple of the function and the tuples of symbol names it
+            reads and assigns, or None if the code block can't run in batches
+        :rtype: None | tuple
+        """
+        module_dict = self.module_context.__dict__
+        if "run_batch" not in module_dict:
+            return None
+        return (module_dict["run_batch"], module_dict["BATCH_READS"],
+                module_dict["BATCH_STORES"])
+
     def copy_to(self, other):
         """
         Perform a deep copy to another code block object.
@@ -1139,6 +2003,7 @@ def userfunc_{action_name}(_symbols, {action_params}, count=0):
         self.func_name = None
         self.functionmap = {}
         self.astree = None
+        self.value_types = {}
 
 
 class CodeBlockGenerator(object):
@@ -1147,6 +2012,8 @@ class CodeBlockGenerator(object):
     supplied source code string. A class member holds a code block object that
     is copied to a new code object, which is returned to the caller.
     """
+    #: The parser for the game language, built by the first wrap_code_block()
+    #: call and re-used for every code block after that
     bnf = None
     #: The fixed code block every source code string is converted into.  A copy
     #: is returned to the wrap_code_block() caller before it is cleared for
@@ -1170,13 +2037,16 @@ class CodeBlockGenerator(object):
         :return: A new executable code block
         :rtype: :py:class:`CodeBlock`
         """
+        # name the code block for messages from functions it defines
+        cls.code_block.name = program_name
         if action_names:
             cls.code_block.action_names = set(action_names)
         if module_context:
             cls.code_block.module_context = module_context
         if funcmap is not None:
             cls.code_block.add_to_func_map(funcmap)
-        cls.bnf = bnf_interpret(cls.code_block)
+        if cls.bnf is None:
+            cls.bnf = bnf_interpret(cls.code_block)
         try:
             astree = cls.bnf.parseString(source_code_str)
             cls.code_block.reduce()
@@ -1187,9 +2057,58 @@ class CodeBlockGenerator(object):
             cls.code_block.clear()
         return new_block
 
+    @classmethod
+    def wrap_expression(cls, program_name, module_context, expression_str, funcmap=None,
+                        action_names=()):
+        """
+        Create a new code block that calculates the value of an expression.
+
+        The expression is parsed as an assignment to
+        :py:attr:`CodeBlock.EXPRESSION_SYMBOL`, which the code block's
+        ``evaluate()`` function returns instead.
+
+        :param program_name: The name of the program
+        :type program_name: str
+        :param module_context: The module to place the code into
+        :type module_context: imp.new_module
+        :param expression_str: A string containing a game language expression
+        :type expression_str: str
+        :param funcmap: A dict mapping function names to argument type info
+        :type funcmap: dict
+        :raise: ExpressionError if the source isn't a single expression
+        :return: A new executable code block
+        :rtype: :py:class:`CodeBlock`
+        """
+        new_block = cls.wrap_code_block(
+            program_name, module_context,
+            "{} = {}".format(CodeBlock.EXPRESSION_SYMBOL, expression_str),
+            funcmap, action_names)
+        outer_block = new_block.outer_block
+        if (len(outer_block) != 1 or not isinstance(outer_block[0], list) or
+                outer_block[0][0] != "_{}".format(CodeBlock.EXPRESSION_SYMBOL) or
+                outer_block[0][-1] != '='):
+            raise ExpressionError("'{}' is not a single expression".format(expression_str))
+        new_block.is_expression = True
+        return new_block
+
 
 BNF = None
 
+def keyword_regex(*keywords):
+    """
+    Return a parser element matching any of the given keywords, like a
+    :py:class:`pyparsing.MatchFirst` of :py:class:`pyparsing.Keyword`
+    elements in the same order.
+
+    :param keywords: The keywords to match, tried in order
+    :type keywords: str
+    :return: A regular expression parser element
+    :rtype: :py:class:`pyparsing.Regex`
+    """
+    ident_chars = re.escape(Keyword.DEFAULT_KEYWORD_CHARS)
+    return Regex(r"(?<![{0}])(?:{1})(?![{0}])".format(
+        ident_chars, "|".join([re.escape(keyword) for keyword in keywords])))
+
 def bnf_interpret(code_block_obj):
     """
     See https://en.wikipedia.org/wiki/Backus%E2%80%93Naur_Form
@@ -1223,6 +2142,11 @@ def bnf_interpret(code_block_obj):
     * conditional   :: conditional_keyword '(' comparison ')' block
     * block         :: '{' assignment | conditional '}'
 
+    The grammar is only built once; later calls return the same parser.
+    Packrat parsing isn't enabled, since the grammar rarely retries an
+    element at the same location, and the parse actions build the code block
+    as a side effect, so they must run every time an element matches.
+
     :param code_block_obj: A code block object supplying parse methods
     :type code_block_obj: :py:class:`CodeBlock`
     """
@@ -1234,27 +2158,25 @@ def bnf_interpret(code_block_obj):
         # ~ Optional( e + Word( "+-"+nums, nums ) ) )
         fnumber = Regex(r"[+-]?\d+(:?\.\d*)?(:?[eE][+-]?\d+)?")
         ident = Word(alphas, alphas + nums + "._$")
+        # an identifier followed by '(', so that plain identifiers fail the
+        #  function call alternative in a single parse attempt
+        func_ident = Regex(r"[{0}][{0}{1}._$]*(?=\s*\()".format(alphas, nums))
         quote = Literal("\"")
         string = quote + Regex(r"[^\"]+") + quote
 
-        uptolineend = Regex(r".*{}".format(os.linesep))
-        comment_sym = Literal("#")
+        # single regexes match the same text as the equivalent literals and
+        #  keywords, with one parse attempt instead of one per alternative
+        comments = Regex(r"#.*{}".format(os.linesep))
         boolean_true = Literal("true")
         boolean_false = Literal("false")
         booltype = Literal("boolean")
-        plus = Literal("+")
         minus = Literal("-")
-        mult = Literal("*")
-        div = Literal("/")
-        mod = Literal("%")
         lpar = Literal("(").suppress()
         rpar = Literal(")").suppress()
         lbrack = Literal("{").suppress()
         rbrack = Literal("}").suppress()
         glbl = Keyword("global")
         boolnot = Keyword("not")
-        boolor = Keyword("or")
-        booland = Keyword("and")
         ifcond = Keyword("if")
         elseifcond = Keyword("elseif")
         elsecond = Keyword("else")
@@ -1263,25 +2185,18 @@ def bnf_interpret(code_block_obj):
         strn = Keyword("string")
         void = Keyword("void")
         ret = Keyword("return")
-        is_equal = Keyword("==")
-        is_nequal = Keyword("!=")
-        is_lt = Keyword("<")
-        is_lte = Keyword("<=")
-        is_gt = Keyword(">")
-        is_gte = Keyword(">=")
         assignop = Keyword("=")
         boolean = boolean_true | boolean_false
-        compareop = is_equal | is_nequal | is_lte | is_lt | is_gte | is_gt
-        boolop = boolor | booland
-        addop = plus | minus
-        multop = mult | div | mod
+        compareop = keyword_regex("==", "!=", "<=", "<", ">=", ">")
+        boolop = keyword_regex("or", "and")
+        addop = Regex(r"[+\-]")
+        multop = Regex(r"[*/%]")
         typestring = num | strn | booltype
         expop = Literal("^")
 
-        comments = comment_sym + uptolineend
         combinatorial = Forward()
         expr = Forward()
-        atom = ((0, None) * minus + (((ident + lpar + Optional(
+        atom = ((0, None) * minus + (((func_ident + lpar + Optional(
             combinatorial + ZeroOrMore("," + combinatorial)) + rpar).setParseAction(
                 code_block_obj.count_function_args) | \
                     fnumber | ident | boolean | string).setParseAction(
@@ -0,0 +1,117 @@
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Pygame maker code cache module, for keeping compiled code blocks between
+game runs.
+"""
+
+import os
+import imp
+import marshal
+import tempfile
+import pygame_maker.support.logging_object as logging_object
+
+
+class CodeBlockCache(logging_object.LoggingObject):
+    """
+    A directory of compiled code blocks, so that a game started again can
+    load its code blocks without parsing them.
+
+    Each file holds the marshalled Python code objects that a
+    :py:class:`~pygame_maker.logic.code_block.CodeBlock` executes when it's
+    loaded, named after the key the language engine gives the code block's
+    source (see
+    :py:meth:`~pygame_maker.logic.language_engine.LanguageEngine.get_code_block_key`).
+    Marshalled code is only readable by the Python version that wrote it, so
+    each file starts with a header naming the cache format and the Python
+    bytecode version; files with any other header are ignored and replaced.
+    """
+    #: The file name extension of cached code blocks
+    SUFFIX = ".pmc"
+    #: Increase this when the Python code generated for code blocks changes,
+    #: so older cache files are ignored
+    FORMAT_VERSION = 7
+
+    def __init__(self, cache_dir):
+        """
+        Create the cache.  The directory is created when the first code block
+        is stored.
+
+        :param cache_dir: The directory to keep cached code blocks in
+        :type cache_dir: str
+        """
+        super(CodeBlockCache, self).__init__(type(self).__name__)
+        #: The directory holding the cached code blocks
+        self.cache_dir = cache_dir
+        #: The header every cache file starts with
+        self.header = "PMC{:d}:".format(self.FORMAT_VERSION).encode("ascii") + imp.get_magic()
+
+    def get_path(self, key):
+        """
+        Return the path to a code block's cache file.
+
+        :param key: The code block's key
+        :type key: str
+        :return: The cache file path
+        :rtype: str
+        """
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def load(self, key):
+        """
+        Read a code block's compiled code from the cache.
+
+        :param key: The code block's key
+        :type key: str
+        :return: The code objects stored for the key, or None if the cache
+            has no usable copy
+        :rtype: None | list
+        """
+        try:
+            with open(self.get_path(key), "rb") as cache_file:
+                if cache_file.read(len(self.header)) != self.header:
+                    self.debug("Ignoring outdated cache file for {}".format(key))
+                    return None
+                compiled_code = marshal.load(cache_file)
+        except (IOError, OSError):
+            return None
+        except (EOFError, ValueError, TypeError):
+            self.warn("Ignoring unreadable cache file for {}".format(key))
+            return None
+        if not isinstance(compiled_code, list):
+            return None
+        self.debug("Loaded code block {} from the cache".format(key))
+        return compiled_code
+
+    def store(self, key, compiled_code):
+        """
+        Write a code block's compiled code into the cache.
+
+        The file is written under a temporary name first, so other games
+        sharing the directory never read a partly-written file.  Failures
+        are logged and otherwise ignored, since the code block was already
+        compiled.
+
+        :param key: The code block's key
+        :type key: str
+        :param compiled_code: The code objects to store
+        :type compiled_code: list
+        """
+        temp_path = None
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            temp_fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+            with os.fdopen(temp_fd, "wb") as cache_file:
+                cache_file.write(self.header)
+                marshal.dump(compiled_code, cache_file)
+            os.rename(temp_path, self.get_path(key))
+            temp_path = None
+            self.debug("Stored code block {} in the cache".format(key))
+        except (IOError, OSError) as err:
+            self.warn("Unable to store code block {} in the cache: {}".format(key, err))
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
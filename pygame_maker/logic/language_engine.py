@@ -8,9 +8,14 @@ Language engine classes.
 
 import imp
 import math
+import numbers
 import sys
+import hashlib
+import collections
 import pygame_maker.support.logging_object as logging_object
-from pygame_maker.logic.code_block import CodeBlockGenerator
+from pygame_maker.logic.code_block import CodeBlock, CodeBlockGenerator
+from pygame_maker.logic.code_cache import CodeBlockCache
+from pygame_maker.logic.run_time_support import ExecutionBudget, CodeBlockBudgetError
 
 
 class DuplicateCodeBlockError(logging_object.LoggingException):
@@ -34,11 +39,30 @@ class SymbolTable(object):
     if specified in sym_change_callback, will be called whenever a symbol
     changes.  The callback will be expected to have the signature
     callback(sym_name, new_value).
+
+    A dict of default variable values can be shared by many symbol tables.
+    Variables that haven't been set read their value from the defaults, and
+    setting a variable only stores it in this table's own variables, leaving
+    the shared defaults untouched.
+
+    The defaults can also be another symbol table, making this table a scope
+    layered over it without copying any symbols.  Code blocks run with such a
+    scope over an instance's symbols: their assignments are kept in the
+    scope and reported to the callback, while everything else is read from
+    the instance.  The callback is skipped when a symbol is set to the
+    number or string it already holds.
     """
     #: Any unknown symbol receives this value, to help with debugging
     DEFAULT_UNINITIALIZED_VALUE = -sys.maxsize - 1
-
-    def __init__(self, initial_symbols=None, sym_change_callback=None):
+    #: The defaults of symbol tables created without any (never modified)
+    NO_DEFAULTS = {}
+    #: Values of these types are compared with the current value when set,
+    #: to skip the change callback if they're equal
+    COMPARABLE_TYPES = (numbers.Number, str)
+    # every object instance has a symbol table, so keep them small
+    __slots__ = ("vars", "sym_change_callback", "consts", "defaults")
+
+    def __init__(self, initial_symbols=None, sym_change_callback=None, defaults=None):
         """
         Initialize a new symbol table.
 
@@ -48,12 +72,19 @@ class SymbolTable(object):
         :param sym_change_callback: An optional callback to execute whenever
             the interpreted language changes a symbol's value
         :type sym_change_callback: callable
+        :param defaults: Default variable values, which may be shared with
+            other symbol tables and must not be modified, or a symbol table
+            to read unset symbols from
+        :type defaults: None | dict | :py:class:`SymbolTable`
         """
         self.vars = {}
         if initial_symbols is not None:
             self.vars.update(initial_symbols)
         self.sym_change_callback = sym_change_callback
         self.consts = {}
+        if defaults is None:
+            defaults = self.NO_DEFAULTS
+        self.defaults = defaults
 
     def dump_vars(self):
         """
@@ -66,10 +97,12 @@ class SymbolTable(object):
         for const in constlist:
             print("{} = {}".format(const, self.consts[const]))
         varlist = list(self.vars.keys())
+        varlist.extend([var for var in self.defaults if var not in self.vars])
         varlist.sort()
         print("variables:")
         for var in varlist:
-            print("{} = {}".format(var, self.vars[var]))
+            print("{} = {}".format(var, self.vars[var] if var in self.vars else
+                                   self.defaults[var]))
 
     def keys(self):
         """
@@ -78,7 +111,24 @@ class SymbolTable(object):
         :return: Symbol list
         :rtype: list
         """
-        return list(self.vars.keys()) + list(self.consts.keys())
+        symbols = list(self.vars)
+        symbols.extend([sym for sym in self.defaults if sym not in self.vars])
+        symbols.extend(self.consts)
+        return symbols
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, item):
+        """
+        Report whether a symbol is known, whether a constant or a variable.
+
+        :param item: The symbol to find
+        :type item: str
+        :return: True if the symbol has a value
+        :rtype: bool
+        """
+        return item in self.consts or item in self.vars or item in self.defaults
 
     def __setitem__(self, item, val):
         """
@@ -89,12 +139,18 @@ class SymbolTable(object):
         :type item: str
         :param val: The symbol's new value
         """
-        # print("Setting {} to {}".format(item, val))
         # don't allow constants to be written this way
         if item not in self.consts:
+            callback = self.sym_change_callback
+            if callback:
+                old_val = self[item]
+                if old_val is val or (type(old_val) is type(val) and
+                                      isinstance(val, self.COMPARABLE_TYPES) and
+                                      old_val == val):
+                    callback = None
             self.vars[item] = val
-            if self.sym_change_callback:
-                self.sym_change_callback(item, val)
+            if callback:
+                callback(item, val)
 
     def __getitem__(self, item):
         """
@@ -110,6 +166,8 @@ class SymbolTable(object):
             new_val = self.consts[item]
         elif item in self.vars:
             new_val = self.vars[item]
+        elif item in self.defaults:
+            new_val = self.defaults[item]
         # print("Retrieve item {}: {}".format(item, new_val))
         return new_val
 
@@ -134,26 +192,57 @@ class LanguageEngine(logging_object.LoggingObject):
     the code block.
     """
 
-    #: A dict containing known function signatures
+    #: A dict containing known function signatures, with the type of value
+    #: each function returns where known
     functionmap = {
         'distance': {"arglist":
                      [{"type": "number", "name": "start"}, {"type": "number", "name": "end"}],
-                     'block': ["_start", "_end", "operator.sub", "operator.abs", "_return"]
+                     'block': ["_start", "_end", "operator.sub", "operator.abs", "_return"],
+                     'return_type': "number"
                     },
         'randint': {"arglist":
                     [{"type": "number", "name": "max"}],
-                    'block': [0, "_max", "random.randint", "_return"]
+                    'block': [0, "_max", "random.randint", "_return"],
+                    'return_type': "number"
                    },
         'time': {"arglist": [],
-                 'block': ["time.time", "_return"]
+                 'block': ["time.time", "_return"],
+                 'return_type': "number"
                 },
         'print': {"arglist":
                   [{"type": "string", "name": "print_str"}],
                   'block': []
-                 }
+                 },
+        'key_pressed': {"arglist":
+                        [{"type": "string", "name": "key_name"}],
+                        'block': [],
+                        'return_type': "number"
+                       },
+        'nearest_instance': {"arglist":
+                             [{"type": "string", "name": "type_name"},
+                              {"type": "number", "name": "x"},
+                              {"type": "number", "name": "y"}],
+                             'block': [],
+                             'return_type': "number"
+                            },
+        'count_in_radius': {"arglist":
+                            [{"type": "string", "name": "type_name"},
+                             {"type": "number", "name": "x"},
+                             {"type": "number", "name": "y"},
+                             {"type": "number", "name": "radius"}],
+                            'block': [],
+                            'return_type': "number"
+                           }
     }
     #: A list of user-callable action methods.
     action_methods = []
+    #: The most compiled code blocks kept after their last handle is
+    #: unregistered, so that one-shot code blocks (E.G. instance creation
+    #: code in rooms) aren't compiled again each time they're registered
+    RELEASED_BLOCK_LIMIT = 32
+    #: The most steps a single code block execution may take by default
+    #: (see :py:class:`~pygame_maker.logic.run_time_support.ExecutionBudget`)
+    STEP_LIMIT = 100000
 
     @classmethod
     def add_new_function_call(cls, function_name, arg_list, param_names):
@@ -171,13 +260,18 @@ class LanguageEngine(logging_object.LoggingObject):
         :type param_names: list
         """
         if function_name not in cls.functionmap.keys():
+            # actions return 1 if they ran, or 0
             cls.functionmap[function_name] = {"arglist": arg_list, "param_names": param_names,
-                                              "block": []}
+                                              "block": [], "return_type": "number"}
             cls.action_methods.append(function_name)
 
-    def __init__(self):
+    def __init__(self, cache_dir=None):
         """
         Initialize a new language engine.
+
+        :param cache_dir: The directory to keep compiled code blocks in
+            between runs, or None to compile every code block
+        :type cache_dir: None | str
         """
         super(LanguageEngine, self).__init__(type(self).__name__)
         #: The language engine's global symbol table
@@ -186,13 +280,65 @@ class LanguageEngine(logging_object.LoggingObject):
         self.global_symbol_table.set_constant('e', math.e)
         #: Code blocks registered in the language engine
         self.code_blocks = {}
+        #: Compiled code blocks, keyed by :py:meth:`get_code_block_key`.
+        #: Every handle registered with the same source shares one.
+        self.compiled_blocks = {}
+        #: The number of handles sharing each compiled code block
+        self.compiled_block_handles = {}
+        #: The key of each registered handle's compiled code block
+        self.code_block_keys = {}
+        #: Compiled code blocks without handles, oldest first
+        self.released_blocks = collections.OrderedDict()
+        #: Compiled expressions, keyed by :py:meth:`get_code_block_key`
+        self.expressions = {}
+        #: The on-disk cache of compiled code blocks, or None
+        self.code_cache = None
+        if cache_dir:
+            self.code_cache = CodeBlockCache(cache_dir)
+        #: Counts the steps taken by code blocks, each execution and each
+        #: frame, and stops code blocks that go over its limits
+        self.budget = ExecutionBudget(self.STEP_LIMIT)
+        # the function signatures part of code block keys, and the number of
+        #  known functions it was made from
+        self._signature = (None, "")
+
+    def get_code_block_key(self, code_string):
+        """
+        Return the key identifying a code block's compiled form.
+
+        The source alone isn't enough, since the functions and action
+        methods known to the parser change how it's compiled.  Since the key
+        also names the code block in the on-disk cache, it changes whenever
+        a function's parameter names do.
+
+        :param code_string: The game language source code block
+        :type code_string: str
+        :return: A hash of the source and the callable function signatures
+        :rtype: str
+        """
+        # functions are only ever added, so the signatures only need to be
+        #  collected again when there are more of them
+        if self._signature[0] != len(self.functionmap):
+            signature = []
+            for func_name in sorted(self.functionmap):
+                func_info = self.functionmap[func_name]
+                signature.append((func_name,
+                                  [arg["name"] for arg in func_info["arglist"]],
+                                  func_info.get("param_names")))
+            self._signature = (len(self.functionmap),
+                               repr((signature, self.action_methods)))
+        key_source = repr(code_string) + self._signature[1]
+        return hashlib.sha1(key_source.encode("utf-8")).hexdigest()
 
     def register_code_block(self, block_name, code_string):
         """
         Register a block of game language code with the language engine.
 
         The executable code block will be placed in the code block hash,
-        using its name as the key.
+        using its name as the key.  Code blocks with the same source are only
+        compiled once, and shared by all of their handles.  With an on-disk
+        cache, code blocks compiled by an earlier run are loaded from it
+        instead of being parsed again.
 
         :param block_name: The name to register the code block with
         :type block_name: str
@@ -202,14 +348,71 @@ class LanguageEngine(logging_object.LoggingObject):
         """
         self.info("Register handle '{}'".format(block_name))
         self.debug("  code block:\n{}".format(code_string))
-        if block_name in list(self.code_blocks.keys()):
+        if block_name in self.code_blocks:
             raise DuplicateCodeBlockError("Attempt to register another code block named '{}':\n{}".
                                           format(block_name, self.error))
+        block_key = self.get_code_block_key(code_string)
+        code_block_runnable = self.compiled_blocks.get(block_key)
+        if code_block_runnable is None:
+            code_block_runnable = self.released_blocks.pop(block_key, None)
+        if code_block_runnable is None:
+            code_block_runnable = self._compile_code_block(block_name, block_key,
+                                                           code_string)
+        self.compiled_blocks[block_key] = code_block_runnable
+        self.compiled_block_handles[block_key] = \
+            self.compiled_block_handles.get(block_key, 0) + 1
+        self.code_block_keys[block_name] = block_key
+        self.code_blocks[block_name] = code_block_runnable
+
+    def get_expression(self, expression):
+        """
+        Return a game language expression compiled into a Python function,
+        for calculating action parameters whose value starts with '='.
+
+        The function is called as ``evaluate(local_symbol_table,
+        global_symbol_table)`` and returns the expression's value, reading
+        symbols directly from the given tables.  Each expression is only
+        compiled once, and is also kept in the on-disk cache, if there is one.
+
+        :param expression: The game language expression, without the '='
+        :type expression: str
+        :raise: ExpressionError if the source isn't a single expression
+        :return: The compiled expression
+        :rtype: callable
+        """
+        # expressions never start with '=', so their keys can't match a code
+        #  block's
+        block_key = self.get_code_block_key("={}".format(expression))
+        code_block_runnable = self.expressions.get(block_key)
+        if code_block_runnable is None:
+            self.info("Compile expression '{}'".format(expression))
+            code_block_runnable = self._compile_code_block(
+                "expression_{:d}".format(len(self.expressions)), block_key, expression,
+                is_expression=True)
+            self.expressions[block_key] = code_block_runnable
+        return code_block_runnable.module_context.evaluate
+
+    def _compile_code_block(self, block_name, block_key, code_string, is_expression=False):
+        # Return a new code block for the source, loaded from the on-disk
+        #  cache if possible.
         module_context = imp.new_module('{}_module'.format(block_name))
-        code_block_runnable = CodeBlockGenerator.wrap_code_block(
-            block_name, module_context, code_string, self.functionmap, self.action_methods)
+        compiled_code = None
+        if self.code_cache is not None:
+            compiled_code = self.code_cache.load(block_key)
+        if compiled_code is not None:
+            code_block_runnable = CodeBlock(block_name, module_context)
+            code_block_runnable.is_expression = is_expression
+            code_block_runnable.load_compiled(compiled_code)
+            return code_block_runnable
+        wrap = CodeBlockGenerator.wrap_code_block
+        if is_expression:
+            wrap = CodeBlockGenerator.wrap_expression
+        code_block_runnable = wrap(block_name, module_context, code_string, self.functionmap,
+                                   self.action_methods)
         code_block_runnable.load(['operator', 'math'])
-        self.code_blocks[block_name] = code_block_runnable
+        if self.code_cache is not None:
+            self.code_cache.store(block_key, code_block_runnable.compiled_code)
+        return code_block_runnable
 
     def execute_code_block(self, block_name, local_symbol_table):
         """
@@ -219,6 +422,11 @@ class LanguageEngine(logging_object.LoggingObject):
         execution.  Symbols changed or created in the local symbol table will
         trigger a symbol change callback associated with the symbol table.
 
+        The code block's steps are counted by :py:attr:`budget`.  A code
+        block that goes over budget is stopped where it is, leaving any
+        changes it already made, and its handle is logged and added to the
+        budget's ``over_budget`` list.
+
         :param block_name: The name of a registered code block
         :type block_name: str
         :param local_symbol_table: The local symbols to make available to the
@@ -231,16 +439,64 @@ class LanguageEngine(logging_object.LoggingObject):
             raise UnknownCodeBlockError("Attempt to execute unknown code block named '{}':\n{}".
                                         format(block_name, self.error))
         symtables = {'globals': self.global_symbol_table,
-                     'locals': local_symbol_table}
-        self.code_blocks[block_name].module_context.run(symtables)
+                     'locals': local_symbol_table,
+                     'budget': self.budget}
+        outer_state = self.budget.begin(block_name)
+        try:
+            self.code_blocks[block_name].run(symtables)
+        except CodeBlockBudgetError as err:
+            self.budget.over_budget.append(block_name)
+            self.warn("Stopped code block '{}': {}".format(block_name, err))
+        finally:
+            self.budget.end(outer_state)
+
+    def start_frame(self):
+        """
+        Start counting a new frame's code block steps, logging the totals
+        for the frame that just ended.
+        """
+        if self.budget.frame_steps:
+            self.debug("Code blocks took {:d} steps last frame: {}".format(
+                self.budget.frame_steps, self.budget.block_steps))
+        self.budget.start_frame()
+
+    def get_batch_code(self, block_name):
+        """
+        Return the version of a registered code block that runs once for
+        many instances (see
+        :py:meth:`~pygame_maker.logic.code_block.CodeBlock.to_python_batch`).
+
+        :param block_name: The name of a registered code block
+        :type block_name: str
+        :raise: UnknownCodeBlockError if the block name is not found
+        :return: A tuple of the code block's ``run_batch()`` function and the
+            names of the symbols it reads and assigns, or None if the code
+            block can't run in batches
+        :rtype: None | tuple
+        """
+        if block_name not in self.code_blocks:
+            raise UnknownCodeBlockError("Attempt to execute unknown code block named '{}':\n{}".
+                                        format(block_name, self.error))
+        return self.code_blocks[block_name].get_batch_code()
 
     def unregister_code_block(self, block_name):
         """
         Remove a code block that is no longer needed.
 
+        The compiled code block is released when its last handle is
+        unregistered, though the most recently released ones are kept for
+        re-use (see :py:attr:`RELEASED_BLOCK_LIMIT`).
+
         :param block_name: The name of a registered code block
         :type block_name: str
         """
         self.info("Unregister code block handle '{}'".format(block_name))
-        if block_name in list(self.code_blocks.keys()):
+        if block_name in self.code_blocks:
             del self.code_blocks[block_name]
+            block_key = self.code_block_keys.pop(block_name)
+            self.compiled_block_handles[block_key] -= 1
+            if self.compiled_block_handles[block_key] == 0:
+                del self.compiled_block_handles[block_key]
+                self.released_blocks[block_key] = self.compiled_blocks.pop(block_key)
+                if len(self.released_blocks) > self.RELEASED_BLOCK_LIMIT:
+                    self.released_blocks.popitem(last=False)
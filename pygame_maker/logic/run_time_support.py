@@ -6,9 +6,11 @@ Licensed under LGPL v2.1 (see file COPYING for details)
 Support module for code block generation.
 """
 
+import math
 import random
 import time
 import sys
+import numpy as np
 
 #: The default value used for uninitialized symbols
 DEFAULT_UNINITIALIZED_VALUE = -sys.maxsize - 1
@@ -19,6 +21,11 @@ class CodeBlockRuntimeError(RuntimeError):
     pass
 
 
+class CodeBlockBudgetError(CodeBlockRuntimeError):
+    """Raised when a code block takes more steps than its budget allows."""
+    pass
+
+
 def update_symbol(_symbols, symname, value):
     """
     Define the update_symbol function that changes symbol values (or creates
@@ -34,8 +41,7 @@ def update_symbol(_symbols, symname, value):
     if symname[0] == "_":
         _symbols["globals"][symname[1:]] = value
     else:
-        if symname in list(_symbols["locals"].keys()) or \
-           symname not in list(_symbols["globals"].keys()):
+        if symname in _symbols["locals"] or symname not in _symbols["globals"]:
             _symbols["locals"][symname] = value
         else:
             _symbols["globals"][symname] = value
@@ -57,14 +63,267 @@ def get_symbol(_symbols, symname):
     :return: The symbol's value
     """
     symval = DEFAULT_UNINITIALIZED_VALUE
-    if symname in list(_symbols["locals"].keys()):
+    if symname in _symbols["locals"]:
         # local variables can override globals
         symval = _symbols["locals"][symname]
-    elif symname in list(_symbols["globals"].keys()):
+    elif symname in _symbols["globals"]:
         symval = _symbols["globals"][symname]
     return symval
 
 
+def store_symbol(_symbols, symname, value):
+    """
+    Define the store_symbol function that changes a symbol's value like
+    :py:func:`update_symbol`, for generated code blocks that keep the
+    symbol's value in a Python local variable.
+
+    The value is read back, so the variable holds what later reads of the
+    symbol would find: constants keep their value, and symbol tables may
+    convert the value they store.
+
+    :param _symbols: The symbols dict containing ``locals`` and ``globals``
+        keys, which each point to a :py:class:`SymbolTable`
+    :type _symbols: dict
+    :param symname: The symbol name to change, with a leading '_' for global
+        symbols
+    :type symname: str
+    :param value: The symbol's new value
+    :return: The symbol's value after the change
+    """
+    update_symbol(_symbols, symname, value)
+    if symname[0] == "_":
+        symname = symname[1:]
+    return get_symbol(_symbols, symname)
+
+
+class ExecutionBudget(object):
+    """
+    Count the steps taken by running code blocks, and stop any code block
+    that takes too many.
+
+    Generated code charges steps through :py:func:`spend_steps`: ``run()``
+    and each game language function charge the number of lines they
+    contain when they start, and each action call charges one step.  Since
+    the game language has no loops, this bounds the work a code block can
+    do, however many functions it calls.
+    """
+
+    def __init__(self, step_limit=None, frame_step_limit=None):
+        """
+        Create an execution budget.
+
+        :param step_limit: The most steps a single code block execution may
+            take, or None for no limit
+        :type step_limit: None | int
+        :param frame_step_limit: The most steps all code blocks may take
+            between calls to :py:meth:`start_frame`, or None for no limit
+        :type frame_step_limit: None | int
+        """
+        #: The most steps a single code block execution may take
+        self.step_limit = step_limit
+        #: The most steps all code blocks may take in a frame
+        self.frame_step_limit = frame_step_limit
+        #: The handle of the code block running now, or None
+        self.block_name = None
+        #: The steps taken so far by the code block running now
+        self.steps = 0
+        #: The steps taken by all code blocks this frame
+        self.frame_steps = 0
+        #: The steps taken this frame, keyed by code block handle
+        self.block_steps = {}
+        #: The handles of code blocks stopped this frame for going over
+        #: budget, in the order they were stopped
+        self.over_budget = []
+
+    def start_frame(self):
+        """Clear the frame totals at the start of a new frame."""
+        self.frame_steps = 0
+        self.block_steps = {}
+        self.over_budget = []
+
+    def begin(self, block_name):
+        """
+        Start counting steps for a code block execution.  Code blocks may
+        run others (E.G. through actions), so the state of the code block
+        that was running is returned, to pass to :py:meth:`end`.
+
+        :param block_name: The code block's handle
+        :type block_name: str
+        :return: The state of the outer code block execution
+        :rtype: tuple
+        """
+        outer_state = (self.block_name, self.steps)
+        self.block_name = block_name
+        self.steps = 0
+        return outer_state
+
+    def end(self, outer_state):
+        """
+        Add a finished code block execution's steps to the frame totals,
+        and go back to counting the outer code block's steps.
+
+        :param outer_state: The value returned by :py:meth:`begin`
+        :type outer_state: tuple
+        """
+        self.block_steps[self.block_name] = \
+            self.block_steps.get(self.block_name, 0) + self.steps
+        self.block_name, self.steps = outer_state
+
+    def spend(self, steps):
+        """
+        Charge steps to the running code block.
+
+        :param steps: The number of steps taken
+        :type steps: int
+        :raise: CodeBlockBudgetError if the code block or the frame is over
+            budget
+        """
+        self.steps += steps
+        self.frame_steps += steps
+        if self.step_limit is not None and self.steps > self.step_limit:
+            raise CodeBlockBudgetError("{}: Step limit of {:d} exceeded".format(
+                self.block_name, self.step_limit))
+        if self.frame_step_limit is not None and self.frame_steps > self.frame_step_limit:
+            raise CodeBlockBudgetError("{}: Frame step limit of {:d} exceeded".format(
+                self.block_name, self.frame_step_limit))
+
+
+def spend_steps(_symbols, steps):
+    """
+    Charge steps to the execution budget in generated code blocks, if the
+    symbols dict has one (see :py:class:`ExecutionBudget`).
+
+    :param _symbols: The symbols dict, which may hold an
+        :py:class:`ExecutionBudget` in its ``budget`` key
+    :type _symbols: dict
+    :param steps: The number of steps taken
+    :type steps: int
+    """
+    budget = _symbols.get("budget")
+    if budget is not None:
+        budget.spend(steps)
+
+
+def batch_truth(value):
+    """
+    Return whether a value is true, for the ``run_batch()`` functions of
+    generated code blocks (see
+    :py:meth:`~pygame_maker.logic.code_block.CodeBlock.to_python_batch`).
+
+    :param value: A single value shared by every instance, or an array with
+        one value per instance
+    :return: A boolean, or a boolean array
+    :rtype: :py:class:`numpy.bool_` | :py:class:`numpy.ndarray`
+    """
+    if isinstance(value, np.ndarray):
+        return value != 0
+    return np.bool_(value)
+
+
+def batch_branch(mask, condition):
+    """
+    Split the instances running a conditional branch in a generated
+    ``run_batch()`` function.
+
+    :param mask: The instances reaching the branch
+    :type mask: :py:class:`numpy.ndarray`
+    :param condition: The branch's condition
+    :return: A tuple of masks: the instances taking the branch, and the rest
+    :rtype: tuple
+    """
+    truth = batch_truth(condition)
+    return mask & truth, mask & ~truth
+
+
+def batch_number(value):
+    """
+    Prepare an operand of an arithmetic operator in generated ``run_batch()``
+    functions.  Python's booleans take part in arithmetic as integers, while
+    NumPy treats adding boolean arrays as a logical operation.
+
+    :param value: A single value, or an array
+    :return: The value, with boolean arrays converted to integers
+    """
+    if isinstance(value, np.ndarray) and value.dtype.kind == "b":
+        return value.astype(int)
+    return value
+
+
+def batch_type(value):
+    """
+    Return the Python type of a value in generated ``run_batch()``
+    functions, or the type each value in an array would have in Python.
+
+    :param value: A single value, or an array
+    :return: The type
+    :rtype: type
+    """
+    if isinstance(value, np.ndarray):
+        return {"b": bool, "f": float}.get(value.dtype.kind, int)
+    return type(value)
+
+
+def batch_not(value):
+    """
+    Perform the ``not`` operator in generated ``run_batch()`` functions.
+
+    :param value: A single value, or an array
+    :return: The opposite truth value
+    """
+    if isinstance(value, np.ndarray):
+        return value == 0
+    return not value
+
+
+def batch_and(left, right):
+    """
+    Perform the ``and`` operator in generated ``run_batch()`` functions,
+    giving each instance the same result as Python's ``and``.
+
+    :param left: A single value, or an array
+    :param right: A single value, or an array
+    :raise: TypeError if the values have different types, since the result
+        couldn't keep each instance's type
+    :return: The right value where the left is true, and the left elsewhere
+    """
+    if isinstance(left, np.ndarray) or isinstance(right, np.ndarray):
+        if batch_type(left) is not batch_type(right):
+            raise TypeError("Mixed operand types for 'and'")
+        return np.where(batch_truth(left), right, left)
+    return left and right
+
+
+def batch_or(left, right):
+    """
+    Perform the ``or`` operator in generated ``run_batch()`` functions,
+    giving each instance the same result as Python's ``or``.
+
+    :param left: A single value, or an array
+    :param right: A single value, or an array
+    :raise: TypeError if the values have different types, since the result
+        couldn't keep each instance's type
+    :return: The left value where it's true, and the right elsewhere
+    """
+    if isinstance(left, np.ndarray) or isinstance(right, np.ndarray):
+        if batch_type(left) is not batch_type(right):
+            raise TypeError("Mixed operand types for 'or'")
+        return np.where(batch_truth(left), left, right)
+    return left or right
+
+
+def batch_pow(base, exponent):
+    """
+    Perform the ``^`` operator in generated ``run_batch()`` functions.
+
+    :param base: A single value, or an array
+    :param exponent: A single value, or an array
+    :return: The base raised to the exponent, as floats
+    """
+    if isinstance(base, np.ndarray) or isinstance(exponent, np.ndarray):
+        return np.power(np.asarray(base, dtype=float), exponent)
+    return math.pow(base, exponent)
+
+
 def userfunc_distance(_symbols, start, end, count=0):
     """
     Make a ``distance`` function that calculates the distance between two
@@ -118,6 +377,77 @@ def userfunc_time(_symbols, count=0):
     """
     return int(time.time())
 
+
+def userfunc_key_pressed(_symbols, key_name, count=0):
+    """
+    Make a ``key_pressed`` function that reports whether a key is currently
+    held down available to game language code.
+
+    :param _symbols: The symbols dict
+    :type _symbols: dict
+    :param key_name: The name of a key event without the _keyup, _keydn or
+        _held suffix, with or without its ``kb_`` prefix (E.G. "kb_A" or "A")
+    :type key_name: str
+    :return: 1 if the key is down, 0 otherwise
+    :rtype: int
+    """
+    pressed_keys = _symbols["globals"]["_pressed_keys"]
+    if pressed_keys == DEFAULT_UNINITIALIZED_VALUE:
+        # no game engine is tracking key presses
+        return 0
+    key_name = str(key_name)
+    if not key_name.startswith("kb_"):
+        key_name = "kb_{}".format(key_name)
+    return int(key_name in pressed_keys)
+
+def userfunc_nearest_instance(_symbols, type_name, x, y, count=0):
+    """
+    Make a ``nearest_instance`` function that finds the instance of an object
+    type closest to a point available to game language code.
+
+    :param _symbols: The symbols dict
+    :type _symbols: dict
+    :param type_name: The object type name
+    :type type_name: str
+    :param x: The point's X coordinate
+    :type x: Number
+    :param y: The point's Y coordinate
+    :type y: Number
+    :return: The closest instance's ID, or -1 if there are no instances
+    :rtype: int
+    """
+    spatial_index = _symbols["globals"]["_spatial_index"]
+    if spatial_index == DEFAULT_UNINITIALIZED_VALUE:
+        # no game engine is tracking instance locations
+        return -1
+    closest = spatial_index.nearest(str(type_name), (x, y))
+    if closest is None:
+        return -1
+    return closest.inst_id
+
+def userfunc_count_in_radius(_symbols, type_name, x, y, radius, count=0):
+    """
+    Make a ``count_in_radius`` function that counts the instances of an
+    object type within a distance of a point available to game language code.
+
+    :param _symbols: The symbols dict
+    :type _symbols: dict
+    :param type_name: The object type name
+    :type type_name: str
+    :param x: The point's X coordinate
+    :type x: Number
+    :param y: The point's Y coordinate
+    :type y: Number
+    :param radius: The largest distance from the point to an instance's center
+    :type radius: Number
+    :return: The number of instances within the radius
+    :rtype: int
+    """
+    spatial_index = _symbols["globals"]["_spatial_index"]
+    if spatial_index == DEFAULT_UNINITIALIZED_VALUE:
+        return 0
+    return len(spatial_index.instances_within((x, y), radius, [str(type_name)]))
+
 def userfunc_print(_symbols, print_str, count=0):
     """
     Make a ``print`` function that displays a string to stderr.
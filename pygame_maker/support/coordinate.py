@@ -15,6 +15,9 @@ class Coordinate(object):
 
     Allows for running callback methods when x and/or y are changed.
     """
+    # every object instance has a position, so keep them small
+    __slots__ = ("_xcoord", "_ycoord", "x_callback", "y_callback")
+
     def __init__(self, x=0, y=0, x_change_callback=None, y_change_callback=None):
         """
         Store an x, y coordinate.
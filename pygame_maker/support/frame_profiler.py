@@ -0,0 +1,238 @@
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Pygame maker frame profiler, for measuring the time spent in each phase of
+the main game loop.
+"""
+
+import collections
+import math
+try:
+    from time import perf_counter as default_timer
+except ImportError:
+    from timeit import default_timer
+import pygame
+from pygame_maker.support import logging_object
+
+
+class FrameProfiler(logging_object.LoggingObject):
+    """
+    Collect per-phase frame timings in rolling windows.
+
+    The game engine calls :py:meth:`start_frame` at the top of each frame,
+    :py:meth:`mark` at the end of each phase, and :py:meth:`end_frame` once
+    the frame has been displayed.  Each mark records the time elapsed since
+    the previous mark under the given phase name.  When the profiler is
+    disabled, these methods return immediately.
+    """
+    #: The main loop phases, in the order they occur in a frame
+    PHASES = [
+        "events",
+        "create",
+        "begin_step",
+        "input",
+        "normal_step",
+        "motion",
+        "collision",
+        "background",
+        "end_step",
+        "draw",
+        "final_pass",
+        "flip",
+    ]
+    #: The name under which whole-frame timings are stored
+    FRAME_TOTAL = "frame"
+    #: The percentiles reported by :py:meth:`get_percentiles` and the
+    #: periodic log line
+    DEFAULT_PERCENTILES = (50, 95, 99)
+    #: The color of the overlay text
+    OVERLAY_COLOR = (255, 255, 0)
+
+    def __init__(self, enabled=False, window_size=120, log_interval=0,
+                 overlay=False, frame_budget_ms=None, timer=None):
+        """
+        Create a frame profiler.
+
+        :param enabled: Set True to collect timings
+        :type enabled: bool
+        :param window_size: The number of most recent frames kept for each
+            phase
+        :type window_size: int
+        :param log_interval: Log a summary line every log_interval frames (0
+            disables the log line)
+        :type log_interval: int
+        :param overlay: Set True to draw the summary onto the screen each frame
+        :type overlay: bool
+        :param frame_budget_ms: Frames taking longer than this many
+            milliseconds are counted as over budget (None disables counting)
+        :type frame_budget_ms: None | float
+        :param timer: A callable returning the current time in seconds
+            (defaults to the highest resolution timer available)
+        :type timer: callable
+        """
+        super(FrameProfiler, self).__init__(type(self).__name__)
+        #: Whether timings are being collected
+        self.enabled = enabled
+        #: The number of frames kept in each phase's rolling window
+        self.window_size = max(1, int(window_size))
+        #: The number of frames between summary log lines
+        self.log_interval = int(log_interval)
+        #: Whether to draw the summary overlay
+        self.overlay = overlay
+        #: The per-frame time budget in milliseconds
+        self.frame_budget_ms = frame_budget_ms
+        #: The number of frames measured since the profiler was created
+        self.frame_count = 0
+        #: The number of frames that exceeded the frame budget
+        self.over_budget_count = 0
+        self._timer = timer if timer is not None else default_timer
+        self._frame_start = 0.0
+        self._last_mark = 0.0
+        self._font = None
+        #: Rolling windows of phase durations in seconds, keyed by phase name
+        self.samples = {}
+        self.reset()
+
+    def reset(self):
+        """Discard all collected timings."""
+        self.samples = {}
+        for phase in self.PHASES + [self.FRAME_TOTAL]:
+            self.samples[phase] = collections.deque(maxlen=self.window_size)
+        self.frame_count = 0
+        self.over_budget_count = 0
+
+    def start_frame(self):
+        """Begin timing a new frame."""
+        if not self.enabled:
+            return
+        now = self._timer()
+        self._frame_start = now
+        self._last_mark = now
+
+    def mark(self, phase):
+        """
+        Record the time elapsed since the previous mark as belonging to the
+        named phase.
+
+        :param phase: The name of the phase that just ended
+        :type phase: str
+        """
+        if not self.enabled:
+            return
+        now = self._timer()
+        if phase not in self.samples:
+            self.samples[phase] = collections.deque(maxlen=self.window_size)
+        self.samples[phase].append(now - self._last_mark)
+        self._last_mark = now
+
+    def end_frame(self):
+        """
+        Record the whole frame's duration, and log a summary line if the log
+        interval has been reached.
+        """
+        if not self.enabled:
+            return
+        frame_time = self._timer() - self._frame_start
+        self.samples[self.FRAME_TOTAL].append(frame_time)
+        self.frame_count += 1
+        if self.frame_budget_ms is not None and frame_time * 1000.0 > self.frame_budget_ms:
+            self.over_budget_count += 1
+        if self.log_interval > 0 and (self.frame_count % self.log_interval) == 0:
+            self.info(self.summary_line())
+
+    def percentile(self, phase, pct):
+        """
+        Return the given percentile of a phase's recent durations.
+
+        :param phase: The phase name
+        :type phase: str
+        :param pct: The percentile, from 0 to 100
+        :type pct: int | float
+        :return: The duration in milliseconds, or None if the phase has no
+            samples
+        :rtype: None | float
+        """
+        if phase not in self.samples or not self.samples[phase]:
+            return None
+        ordered = sorted(self.samples[phase])
+        # nearest-rank percentile
+        rank = int(math.ceil(len(ordered) * pct / 100.0)) - 1
+        rank = min(max(rank, 0), len(ordered) - 1)
+        return ordered[rank] * 1000.0
+
+    def get_percentiles(self, percentiles=None):
+        """
+        Return percentiles for every phase that has samples.
+
+        :param percentiles: The percentiles to calculate
+        :type percentiles: None | list
+        :return: A dict of phase names, each mapped to a dict of percentiles
+            and their durations in milliseconds
+        :rtype: dict
+        """
+        if percentiles is None:
+            percentiles = self.DEFAULT_PERCENTILES
+        results = {}
+        for phase in list(self.samples.keys()):
+            if not self.samples[phase]:
+                continue
+            results[phase] = {}
+            for pct in percentiles:
+                results[phase][pct] = self.percentile(phase, pct)
+        return results
+
+    def summary_lines(self):
+        """
+        Describe the most recent timings as a list of text lines, one per
+        phase, in loop order.
+
+        :return: A list of strings
+        :rtype: list
+        """
+        lines = []
+        stats = self.get_percentiles()
+        phases = self.PHASES + sorted(
+            [ph for ph in list(stats.keys())
+             if ph not in self.PHASES and ph != self.FRAME_TOTAL]) + [self.FRAME_TOTAL]
+        for phase in phases:
+            if phase not in stats:
+                continue
+            lines.append("{}: {}".format(phase, " ".join(
+                ["p{}={:.2f}".format(pct, stats[phase][pct])
+                 for pct in self.DEFAULT_PERCENTILES])))
+        return lines
+
+    def summary_line(self):
+        """
+        Describe the most recent timings in a single line, suitable for the
+        log.
+
+        :return: A summary string
+        :rtype: str
+        """
+        summary = "frame {:d} (ms) {}".format(self.frame_count,
+                                              "; ".join(self.summary_lines()))
+        if self.frame_budget_ms is not None:
+            summary += "; over budget: {:d}".format(self.over_budget_count)
+        return summary
+
+    def draw_overlay(self, surface):
+        """
+        Draw the timing summary onto a surface, if the overlay is enabled.
+
+        :param surface: The surface to draw onto
+        :type surface: :py:class:`pygame.Surface`
+        """
+        if not (self.enabled and self.overlay):
+            return
+        if self._font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._font = pygame.font.Font(None, 16)
+        ypos = 0
+        for line in self.summary_lines():
+            text = self._font.render(line, True, self.OVERLAY_COLOR)
+            surface.blit(text, (0, ypos))
+            ypos += text.get_height()
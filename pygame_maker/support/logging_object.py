@@ -39,6 +39,22 @@ class LoggingObject(object):
     Log messages will include a suffix [``name``] for any subclass instance
     that has a ``name`` attribute.
     """
+    #: The current indent level, until an instance changes its own
+    log_indent = 0
+    #: The number of spaces to indent by
+    indent_size = 2
+
+    @classmethod
+    def share_class_logger(cls):
+        """
+        Give all instances of this class one logger, named after the class.
+
+        Classes with many instances call this instead of ``__init__()``, so
+        each instance doesn't need its own logger attributes.
+        """
+        if "logger" not in cls.__dict__:
+            cls.logger_name = cls.__name__
+            cls.logger = logging.getLogger(cls.__name__)
 
     def __init__(self, logger_name=""):
         """
@@ -80,7 +96,9 @@ class LoggingObject(object):
 
         :param message: Message to be logged
         """
-        self.logger.debug(self._get_format_string(message))
+        # skip formatting messages that won't be logged
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(self._get_format_string(message))
 
     def info(self, message):
         """
@@ -88,7 +106,8 @@ class LoggingObject(object):
 
         :param message: Message to be logged
         """
-        self.logger.info(self._get_format_string(message))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(self._get_format_string(message))
 
     def warn(self, message):
         """
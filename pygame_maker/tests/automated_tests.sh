@@ -41,6 +41,10 @@ if ! $SCRIPT_DIR/test_language_engine.py -v ; then
     FAILED_LIST="$FAILED_LIST test_language_engine.py"
     TEST_FAILURES=1
 fi
+if ! $SCRIPT_DIR/test_code_cache.py -v ; then
+    FAILED_LIST="$FAILED_LIST test_code_cache.py"
+    TEST_FAILURES=1
+fi
 if ! $SCRIPT_DIR/test_styles.py -v ; then
     FAILED_LIST="$FAILED_LIST test_styles.py"
     TEST_FAILURES=1
@@ -53,6 +57,26 @@ if ! $SCRIPT_DIR/test_sound.py -v ; then
     FAILED_LIST="$FAILED_LIST test_sound.py"
     TEST_FAILURES=1
 fi
+if ! $SCRIPT_DIR/test_frame_profiler.py -v ; then
+    FAILED_LIST="$FAILED_LIST test_frame_profiler.py"
+    TEST_FAILURES=1
+fi
+if ! $SCRIPT_DIR/test_instance_lifecycle.py -v ; then
+    FAILED_LIST="$FAILED_LIST test_instance_lifecycle.py"
+    TEST_FAILURES=1
+fi
+if ! $SCRIPT_DIR/test_motion.py -v ; then
+    FAILED_LIST="$FAILED_LIST test_motion.py"
+    TEST_FAILURES=1
+fi
+if ! $SCRIPT_DIR/test_instance_hierarchy.py -v ; then
+    FAILED_LIST="$FAILED_LIST test_instance_hierarchy.py"
+    TEST_FAILURES=1
+fi
+if ! $SCRIPT_DIR/test_spatial_index.py -v ; then
+    FAILED_LIST="$FAILED_LIST test_spatial_index.py"
+    TEST_FAILURES=1
+fi
 
 if [ "$TEST_FAILURES" != "0" ] ; then
     echo The following tests had failures:
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Measure the time taken to register the code blocks and compile the action
+parameter expressions found in the demo and unit test YAML files, the same
+work a game does while loading its objects and rooms.  Each round uses a new language engine, so that every code block
+is compiled; registering the same sources again, as more instances would,
+is timed separately.
+
+Usage: bench_code_block_startup.py [rounds] [--packrat]
+
+With --packrat, pyparsing's packrat memoization is turned on first, for
+comparison.
+"""
+
+import os
+import sys
+import time
+import glob
+import yaml
+import pyparsing
+from pygame_maker.logic.language_engine import LanguageEngine
+
+DEFAULT_ROUNDS = 50
+#: YAML files searched for code blocks, relative to the pygame_maker directory
+CORPUS_GLOBS = ("script_data/*.yaml", "tests/unittest_files/*.yaml")
+#: Keys whose values are game language code blocks
+CODE_KEYS = ("code", "init_code")
+
+
+def find_code_blocks(yaml_obj, blocks, expressions):
+    """
+    Collect the code blocks and '=' expressions found in a loaded YAML
+    object.
+    """
+    if isinstance(yaml_obj, dict):
+        for key, value in yaml_obj.items():
+            if key in CODE_KEYS and isinstance(value, str):
+                blocks.append(value)
+            else:
+                find_code_blocks(value, blocks, expressions)
+    elif isinstance(yaml_obj, list):
+        for value in yaml_obj:
+            find_code_blocks(value, blocks, expressions)
+    elif isinstance(yaml_obj, str) and yaml_obj.startswith("=") and len(yaml_obj) > 1:
+        expressions.append(yaml_obj[1:])
+
+
+def load_corpus():
+    """Return the code blocks and expressions in every corpus YAML file."""
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    blocks = []
+    expressions = []
+    for corpus_glob in CORPUS_GLOBS:
+        for yaml_path in sorted(glob.glob(os.path.join(package_dir, corpus_glob))):
+            with open(yaml_path, "r") as yaml_file:
+                find_code_blocks(yaml.safe_load(yaml_file), blocks, expressions)
+    return blocks, expressions
+
+
+def main():
+    """
+    Register the corpus repeatedly, and print the time per code block in the
+    fastest round and on average, and the time to register it again.
+    """
+    args = sys.argv[1:]
+    if "--packrat" in args:
+        args.remove("--packrat")
+        pyparsing.ParserElement.enablePackrat()
+    rounds = DEFAULT_ROUNDS
+    if args:
+        rounds = int(args[0])
+    blocks, expressions = load_corpus()
+    round_times = []
+    shared_times = []
+    for _ in range(rounds):
+        language_engine = LanguageEngine()
+        for handle_prefix, times in (("bench", round_times), ("shared", shared_times)):
+            start_time = time.time()
+            for block_num, block in enumerate(blocks):
+                language_engine.register_code_block(
+                    "{}_{}".format(handle_prefix, block_num), block)
+            for expression in expressions:
+                language_engine.get_expression(expression)
+            times.append(time.time() - start_time)
+    block_count = len(blocks) + len(expressions)
+    block_msec = 1000.0 / block_count
+    print("{:d} code blocks ({:d} in corpus, {:d} of them expressions), {:.2f} msec per "
+          "code block (best round), {:.2f} msec (average)".format(
+              rounds * block_count, block_count, len(expressions),
+              min(round_times) * block_msec, sum(round_times) * block_msec / rounds))
+    print("registering the same sources again: {:.3f} msec per code block".format(
+        sum(shared_times) * block_msec / rounds))
+
+
+if __name__ == "__main__":
+    main()
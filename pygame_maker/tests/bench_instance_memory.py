@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Measure the memory used by each object instance, and the time taken to
+create it.
+
+Usage: bench_instance_memory.py [instance_count]
+"""
+
+import gc
+import sys
+import time
+import types
+import logging
+import pygame
+from pygame_maker.actors.object_type import ObjectType, ManagerObjectType, \
+    CollideableObjectType
+from pygame_maker.actors.simple_object_instance import SimpleObjectInstance
+from pygame_maker.actors.motion import MotionArrays
+from pygame_maker.events.event_engine import EventEngine
+from pygame_maker.logic.language_engine import LanguageEngine
+
+DEFAULT_INSTANCE_COUNT = 10000
+#: Objects of these types are shared between instances, so they aren't
+#: counted as part of an instance's size
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                logging.Logger, pygame.sprite.AbstractGroup, ObjectType, MotionArrays)
+
+
+class MyGameEngine(object):
+    """A minimal game engine, containing only what object types need."""
+    def __init__(self):
+        self.event_engine = EventEngine()
+        self.language_engine = LanguageEngine()
+        self.resources = {'sprites': {}, 'sounds': {}, 'objects': {}}
+
+
+def get_instance_size(instance, game_engine):
+    """
+    Return the bytes used by an instance and every object only it refers to.
+    Shared objects, such as its object type, the game engine, other
+    instances, dict keys (attribute and symbol names) and singletons, aren't
+    counted, nor are default symbol values.  An instance's slot in its
+    type's motion arrays is counted.
+    """
+    size = 0
+    seen = set([id(game_engine), id(None), id(True), id(False)])
+    # default symbol values are shared by all instances of a class
+    seen.add(id(instance.symbols.defaults))
+    pending = [instance]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, SHARED_TYPES):
+            continue
+        if isinstance(obj, SimpleObjectInstance) and obj is not instance:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            pending.extend(obj.values())
+        else:
+            pending.extend(gc.get_referents(obj))
+    if isinstance(getattr(instance, "motion", None), MotionArrays):
+        # one float per field, plus the in_use and root flags
+        size += len(MotionArrays.FIELDS) * 8 + 2
+    return size
+
+
+def measure_instances(obj_type, screen, count, game_engine):
+    """
+    Create instances of the given object type, and return the bytes and
+    microseconds used per instance along with the instances.
+    """
+    gc.collect()
+    start_time = time.time()
+    instances = [obj_type.spawn_instance(screen)[0] for _ in range(count)]
+    elapsed = time.time() - start_time
+    total_size = sum([get_instance_size(inst, game_engine) for inst in instances])
+    return (total_size / float(count), elapsed * 1000000.0 / count, instances)
+
+
+def main():
+    """Measure both kinds of instance and print the results."""
+    count = DEFAULT_INSTANCE_COUNT
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+    game_engine = MyGameEngine()
+    screen = pygame.Surface((640, 480))
+    kept = []
+    for obj_type in (CollideableObjectType("obj_collideable", game_engine),
+                     ManagerObjectType("obj_manager", game_engine)):
+        bytes_per, usec_per, instances = measure_instances(obj_type, screen, count,
+                                                           game_engine)
+        kept.append(instances)
+        print("{}: {:d} instances, {:.0f} bytes and {:.1f} usec per instance".format(
+            type(obj_type).__name__, count, bytes_per, usec_per))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Measure the time taken to handle a step event whose code block changes
+every instance's motion, with the code block run once for all instances
+and run for each instance in turn.
+
+Usage: bench_step_batch.py [instance_count] [steps]
+"""
+
+import sys
+import time
+import pygame
+from pygame_maker.actors.object_type import CollideableObjectType
+from pygame_maker.actions.action import Action
+from pygame_maker.actions.action_sequence import ActionSequence
+from pygame_maker.events.event import StepEvent
+from pygame_maker.events.event_engine import EventEngine
+from pygame_maker.logic.language_engine import LanguageEngine
+
+DEFAULT_INSTANCE_COUNT = 200
+DEFAULT_STEPS = 100
+#: The step event's code block
+STEP_CODE = """
+if (position.x > 320) {
+    hspeed = hspeed - 0.5
+} else {
+    hspeed = hspeed + 0.5
+}
+vspeed = vspeed * 0.9
+"""
+
+
+class MyGameEngine(object):
+    """A minimal game engine, containing only what object types need."""
+    GAME_ENGINE_ACTIONS = []
+
+    def __init__(self):
+        self.event_engine = EventEngine()
+        self.language_engine = LanguageEngine()
+        self.resources = {'sprites': {}, 'sounds': {}, 'objects': {}}
+
+
+def time_steps(count, steps, batch_min_instances):
+    """
+    Create instances of an object type with a step event, and return the
+    microseconds taken to handle each step event.
+    """
+    game_engine = MyGameEngine()
+    screen = pygame.Surface((640, 480))
+    obj_type = CollideableObjectType("obj_stepper", game_engine)
+    obj_type.BATCH_MIN_INSTANCES = batch_min_instances
+    sequence = ActionSequence()
+    sequence.append_action(Action.get_action_instance_by_name(
+        "execute_code", code=STEP_CODE, apply_to="self"))
+    obj_type["normal_step"] = sequence
+    for inst_num in range(count):
+        inst = obj_type.create_instance(screen, {"position": (inst_num % 640, 240)})
+        inst.speed = inst_num % 5
+        inst.direction = inst_num * 7
+    step_event = StepEvent("normal_step")
+    start_time = time.time()
+    for _ in range(steps):
+        obj_type.handle_step_event(step_event)
+        obj_type.update()
+    return (time.time() - start_time) * 1000000.0 / steps
+
+
+def main():
+    """Time step events both ways and print the results."""
+    count = DEFAULT_INSTANCE_COUNT
+    steps = DEFAULT_STEPS
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        steps = int(sys.argv[2])
+    batch_usec = time_steps(count, steps, 1)
+    single_usec = time_steps(count, steps, count + 1)
+    print("{:d} instances: {:.0f} usec per step in batches, {:.0f} usec per step "
+          "for each instance ({:.1f}x)".format(count, batch_usec, single_usec,
+                                               single_usec / batch_usec))
+
+
+if __name__ == "__main__":
+    main()
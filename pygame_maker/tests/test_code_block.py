@@ -9,10 +9,12 @@ Unit test the pygame_maker.logic.code_block module.
 
 import imp
 import logging
+import math
 import unittest
+import numpy as np
 from pyparsing import ParseException, ParseFatalException
 from pygame_maker.events.event import Event
-from pygame_maker.logic.code_block import CodeBlockGenerator
+from pygame_maker.logic.code_block import CodeBlockGenerator, CodeBlockTypeError
 from pygame_maker.logic.language_engine import SymbolTable
 from pygame_maker.logic import run_time_support
 
@@ -45,6 +47,21 @@ class DummyObject(object):
         self.action_called = True
 
 
+class DummyBatchScope(object):
+    """Stub scope for running code blocks for many instances at once."""
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.mask = np.ones(len(symbols["x"]), dtype=bool)
+
+    def read(self, symbol, mask):
+        """Return a symbol's value for every instance."""
+        return self.symbols[symbol]
+
+    def store(self, symbol, value, mask):
+        """Assign a symbol for the instances selected by the mask."""
+        self.symbols[symbol] = np.where(mask, value, self.symbols[symbol])
+
+
 class TestCodeBlock(unittest.TestCase):
     """Unit tests for the code_block module."""
 
@@ -337,4 +354,254 @@ a = infinite_recursion()
         with self.assertRaises(run_time_support.CodeBlockRuntimeError):
             code_block.run(sym_tables)
 
+    def test_060shared_grammar(self):
+        """
+        Test that the grammar is built once, and that operators still need
+        to be delimited like keywords.
+        """
+        module_context = imp.new_module('for_grammar')
+        CodeBlockGenerator.wrap_code_block(
+            "grammar1", module_context, "x = 1", self.functionmap)
+        bnf = CodeBlockGenerator.bnf
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "grammar2", module_context,
+            "orange = 1 < 2\nc = orange or andy\nd = distance (3, 4) % 2", self.functionmap)
+        self.assertIs(CodeBlockGenerator.bnf, bnf)
+        code_block.load(['operator', 'math'])
+        sym_tables = {"globals": SymbolTable(), "locals": SymbolTable({"andy": 0})}
+        code_block.run(sym_tables)
+        self.assertEqual(sym_tables["locals"]["c"], True)
+        self.assertEqual(sym_tables["locals"]["d"], 1)
+        with self.assertRaises(ParseException):
+            CodeBlockGenerator.wrap_code_block(
+                "grammar3", module_context, "c = 1 <=2", self.functionmap)
+
+    def test_065symbols_in_python_locals(self):
+        """
+        Test that symbols are read once into Python locals, unless functions
+        that may change them are called.
+        """
+        module_context = imp.new_module('for_symbol_locals')
+        local_code = """
+x = x + 1
+if (x > 2) {
+    limit = x * 2
+    y = limit + x
+}
+"""
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "symlocals", module_context, local_code, self.functionmap)
+        code_block.load(['operator', 'math'])
+        self.assertEqual(code_block.to_python().count("get_symbol("), 1)
+        global_table = SymbolTable({"x": 2})
+        local_table = SymbolTable(sym_change_callback=self.sym_change_callback)
+        # assigning to a constant has no effect, so later reads still find
+        #  the constant
+        local_table.set_constant("limit", 10)
+        code_block.run({"globals": global_table, "locals": local_table})
+        self.assertEqual(global_table.vars, {"x": 3})
+        self.assertEqual(local_table.vars, {"y": 13})
+        self.assertEqual(self.symbol_change_list, [{"y": 13}])
+        # calling a function defined in the code block keeps the lookups
+        module_context = imp.new_module('for_symbol_lookups')
+        lookup_code = """
+function bump(void) {
+    x = x + 1
+    return x
+}
+y = bump()
+z = x
+"""
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "symlookups", module_context, lookup_code, self.functionmap)
+        code_block.load(['operator', 'math'])
+        self.assertNotIn("store_symbol(", code_block.to_python())
+        sym_tables = {"globals": SymbolTable(), "locals": SymbolTable({"x": 1})}
+        code_block.run(sym_tables)
+        self.assertEqual(sym_tables["locals"].vars, {"x": 2, "y": 2, "z": 2})
+        # assignments may change other symbols through the symbol change
+        #  callback, so those are looked up again after one
+        module_context = imp.new_module('for_callback_changes')
+        callback_code = """
+limit = speed * 2
+speed = speed + 1
+if (limit > 0) {
+    x = 1
+} else {
+    x = 2
+}
+y = hspeed + limit + x
+"""
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "callbackchanges", module_context, callback_code, self.functionmap)
+        code_block.load(['operator', 'math'])
+        local_table = SymbolTable({"speed": 2, "hspeed": 0})
+
+        def change_hspeed(item, val):
+            """Update hspeed whenever speed changes."""
+            if item == "speed":
+                local_table.vars["hspeed"] = val * 10
+
+        local_table.sym_change_callback = change_hspeed
+        code_block.run({"globals": SymbolTable(), "locals": local_table})
+        self.assertEqual(local_table["y"], 35)
+        # only speed is loaded when the block starts, while symbols assigned
+        #  on every path keep their Python locals
+        self.assertEqual(code_block.to_python().count("get_symbol("), 3)
+
+    def test_070constant_folding(self):
+        """
+        Test that constant expressions are folded, and that conditional
+        branches that can never run are removed.
+        """
+        module_context = imp.new_module('for_folding')
+        folding_code = """
+area = pi * 2 ^ 2
+if (1 > 2) {
+    x = 1
+} elseif (x > 0) {
+    x = 2
+} elseif (true) {
+    x = 3
+} else {
+    x = 4
+}
+if (false and x) {
+    y = 1
+}
+flag = true or x
+"""
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "folding", module_context, folding_code, self.functionmap)
+        code_block.load(['operator', 'math'])
+        python_code = code_block.to_python()
+        self.assertNotIn("operator.mul", python_code)
+        self.assertNotIn(" and ", python_code)
+        self.assertNotIn(" or ", python_code)
+        self.assertEqual(python_code.count("if ("), 1)
+        self.assertEqual(python_code.count("else:"), 1)
+        self.assertNotIn("'y'", python_code)
+        for x_value, x_result in ((1, 2), (-1, 3)):
+            sym_tables = {"globals": SymbolTable(), "locals": SymbolTable({"x": x_value})}
+            code_block.run(sym_tables)
+            self.assertEqual(sym_tables["locals"].vars,
+                             {"area": math.pi * 4, "x": x_result, "flag": 1})
+        # a block whose every line is unreachable still runs
+        module_context = imp.new_module('for_dead_code')
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "deadcode", module_context, "if (false) {\n  x = 1\n}", self.functionmap)
+        code_block.load(['operator', 'math'])
+        sym_tables = {"globals": SymbolTable(), "locals": SymbolTable()}
+        code_block.run(sym_tables)
+        self.assertEqual(sym_tables["locals"].vars, {})
+        # dividing constants by zero fails when the line runs
+        module_context = imp.new_module('for_zero_division')
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "zerodivision", module_context, "x = 1\ny = 1 / 0", self.functionmap)
+        code_block.load(['operator', 'math'])
+        sym_tables = {"globals": SymbolTable(), "locals": SymbolTable()}
+        with self.assertRaises(ZeroDivisionError):
+            code_block.run(sym_tables)
+        self.assertEqual(sym_tables["locals"].vars, {"x": 1})
+
+    def test_075batch_code(self):
+        """
+        Test running code blocks once for many instances, and leaving out
+        code blocks that can't run that way.
+        """
+        batch_code = """
+if ((x > 1) and (y < 1)) {
+    y = x * 2 + step
+} elseif (x == 1) {
+    x = x ^ 2 - 1
+} else {
+    y = -y
+}
+"""
+        module_context = imp.new_module('for_batch')
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "batch", module_context, batch_code, self.functionmap)
+        code_block.load(['operator', 'math'])
+        run_batch, reads, stores = code_block.get_batch_code()
+        self.assertEqual(reads, ("x", "y", "step"))
+        self.assertEqual(stores, ("y", "x"))
+        batch_scope = DummyBatchScope({"x": np.array([0.0, 1.0, 2.0, 3.0]),
+                                       "y": np.array([4.0, 0.0, 0.0, 1.0]),
+                                       "step": 0.5})
+        run_batch(batch_scope)
+        self.assertEqual(list(batch_scope.symbols["x"]), [0.0, 0.0, 2.0, 3.0])
+        self.assertEqual(list(batch_scope.symbols["y"]), [-4.0, 0.0, 4.5, -1.0])
+        for unbatched_code in ("x = distance(x, 3)", "global x = 1", "y = self"):
+            module_context = imp.new_module('for_no_batch')
+            code_block = CodeBlockGenerator.wrap_code_block(
+                "nobatch", module_context, unbatched_code, self.functionmap)
+            code_block.load(['operator', 'math'])
+            self.assertIs(code_block.get_batch_code(), None, unbatched_code)
+
+    def test_080type_inference(self):
+        """
+        Test inferring the types of symbols and function return values, and
+        reporting type errors when code blocks are loaded.
+        """
+        typed_code = """
+function greeting(number n) {
+    return "hello"
+}
+a = 1
+b = a > 2
+c = greeting(a) + "!"
+if (x) {
+    d = 1
+    e = 2
+} else {
+    d = 3
+    e = "three"
+}
+f = distance(a, x)
+g = x
+"""
+        module_context = imp.new_module('for_types')
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "types", module_context, typed_code, self.functionmap)
+        self.assertEqual(code_block.functionmap["greeting"]["return_type"], "string")
+        code_block.load(['operator', 'math'])
+        # distance() isn't given a return type in this function map, and x
+        #  could hold anything
+        self.assertEqual(code_block.symbol_types,
+                         {"a": "number", "b": "boolean", "c": "string", "d": "number"})
+        sym_tables = {"globals": SymbolTable(), "locals": SymbolTable({"x": 0})}
+        code_block.run(sym_tables)
+        self.assertEqual(sym_tables["locals"]["c"], "hello!")
+        for bad_code in ('x = "a" - 1', 'x = 1 + "a"', 'x = "a" < 3', 'x = 2 % "a"',
+                         'x = "a" * "b"', 'x = distance("a", 1)', 'y = "a"\nx = y ^ 2',
+                         'function bad(string s) {\n  return s - 1\n}'):
+            module_context = imp.new_module('for_type_errors')
+            with self.assertRaises(CodeBlockTypeError):
+                code_block = CodeBlockGenerator.wrap_code_block(
+                    "typeerror", module_context, bad_code, self.functionmap)
+                code_block.load(['operator', 'math'])
+        # strings may still be repeated, formatted and compared for equality
+        module_context = imp.new_module('for_strings')
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "strings", module_context, 'x = "ab" * 2\ny = "%d" % 3\nz = x == "abab"',
+            self.functionmap)
+        code_block.load(['operator', 'math'])
+        sym_tables = {"globals": SymbolTable(), "locals": SymbolTable()}
+        code_block.run(sym_tables)
+        self.assertEqual(sym_tables["locals"].vars, {"x": "abab", "y": "3", "z": True})
+        # numbers aren't converted in batches, and operations that would
+        #  mix types for some instances don't run in batches
+        module_context = imp.new_module('for_batch_types')
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "batchtypes", module_context, "x = (y - 1) * 2 + z", self.functionmap)
+        code_block.infer_types()
+        batch_code = code_block.to_python_batch()
+        self.assertIn("operator.mul(operator.sub(", batch_code)
+        self.assertIn("batch_number(_batch.read('z', _mask0))", batch_code)
+        module_context = imp.new_module('for_mixed_batch')
+        code_block = CodeBlockGenerator.wrap_code_block(
+            "mixedbatch", module_context, "x = (y > 1) or 2", self.functionmap)
+        code_block.load(['operator', 'math'])
+        self.assertIs(code_block.get_batch_code(), None)
+
 unittest.main()
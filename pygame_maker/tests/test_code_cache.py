@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Unit test the pygame_maker.logic.code_cache module.
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pygame_maker.logic.code_cache import CodeBlockCache
+from pygame_maker.logic.language_engine import LanguageEngine, SymbolTable
+
+CCLOGGER = logging.getLogger("CodeBlockCache")
+CCHANDLER = logging.StreamHandler()
+CCFORMATTER = logging.Formatter("%(levelname)s: %(message)s")
+CCHANDLER.setFormatter(CCFORMATTER)
+CCLOGGER.addHandler(CCHANDLER)
+CCLOGGER.setLevel(logging.ERROR)
+
+
+class TestCodeBlockCache(unittest.TestCase):
+    """Unit tests for the code_cache module."""
+
+    def setUp(self):
+        self.cache_dir = os.path.join(tempfile.mkdtemp(), "code_cache")
+        with open("unittest_files/testpgm", "r") as source_f:
+            self.source_string = source_f.read()
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.cache_dir))
+
+    def run_test_program(self, language_engine):
+        """Register and run the test program, returning its symbols."""
+        language_engine.register_code_block("testA", self.source_string)
+        test_locals = SymbolTable()
+        language_engine.execute_code_block("testA", test_locals)
+        return test_locals.vars
+
+    def test_005warm_start(self):
+        """Test that a second engine loads code blocks from the cache."""
+        test_answers = {"a": 26, "b": -259, "x": 64, "y": 12}
+        cold_engine = LanguageEngine(self.cache_dir)
+        self.assertEqual(self.run_test_program(cold_engine), test_answers)
+        block_key = cold_engine.get_code_block_key(self.source_string)
+        self.assertTrue(os.path.exists(cold_engine.code_cache.get_path(block_key)))
+        self.assertEqual(os.listdir(self.cache_dir), [block_key + CodeBlockCache.SUFFIX])
+        warm_engine = LanguageEngine(self.cache_dir)
+        self.assertEqual(self.run_test_program(warm_engine), test_answers)
+        # the cached code block was never parsed
+        self.assertIs(warm_engine.code_blocks["testA"].astree, None)
+        self.assertIsNot(cold_engine.code_blocks["testA"].astree, None)
+
+    def test_010unusable_files(self):
+        """Test that outdated or damaged cache files are compiled again."""
+        cache = CodeBlockCache(self.cache_dir)
+        self.assertIs(cache.load("missing"), None)
+        cache.store("damaged", [compile("x = 1", "<test>", "exec")])
+        with open(cache.get_path("damaged"), "r+b") as cache_file:
+            cache_file.truncate(len(cache.header) + 3)
+        self.assertIs(cache.load("damaged"), None)
+        cache.store("outdated", [])
+        self.assertEqual(cache.load("outdated"), [])
+        CodeBlockCache.FORMAT_VERSION += 1
+        try:
+            self.assertIs(CodeBlockCache(self.cache_dir).load("outdated"), None)
+        finally:
+            CodeBlockCache.FORMAT_VERSION -= 1
+        language_engine = LanguageEngine(self.cache_dir)
+        block_key = language_engine.get_code_block_key(self.source_string)
+        with open(language_engine.code_cache.get_path(block_key), "wb") as cache_file:
+            cache_file.write(b"garbage")
+        self.assertEqual(self.run_test_program(language_engine)["x"], 64)
+        self.assertIsNot(language_engine.code_cache.load(block_key), None)
+
+    def test_015unwritable_cache(self):
+        """Test that code blocks still run when the cache can't be written."""
+        with open(self.cache_dir, "w") as blocking_file:
+            blocking_file.write("not a directory")
+        language_engine = LanguageEngine(self.cache_dir)
+        self.assertEqual(self.run_test_program(language_engine)["x"], 64)
+
+    def test_020cached_expressions(self):
+        """Test that expressions are kept in the cache too."""
+        local_table = SymbolTable({"x": 4})
+        for language_engine in (LanguageEngine(self.cache_dir), LanguageEngine(self.cache_dir)):
+            evaluate = language_engine.get_expression("x * 2 + 1")
+            self.assertEqual(evaluate(local_table, language_engine.global_symbol_table), 9)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        # the second engine loaded the expression without parsing it
+        self.assertIs(list(language_engine.expressions.values())[0].astree, None)
+
+
+# run from the tests directory to find the unittest_files subdirectory
+os.chdir(os.path.dirname(os.path.abspath(sys.argv[0])))
+
+unittest.main()
@@ -42,6 +42,9 @@ class TestEvent(unittest.TestCase):
         good_event4 = Event.get_event_instance_by_name("kb_/_keydn")
         print(good_event4)
         self.assertIs(good_event4.__class__, KeyEvent)
+        good_event4a = Event.get_event_instance_by_name("kb_left_held")
+        print(good_event4a)
+        self.assertIs(good_event4a.__class__, KeyEvent)
 
     def test_012valid_collision_events(self):
         """Test that a collision event is properly recognized."""
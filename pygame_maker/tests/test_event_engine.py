@@ -84,5 +84,18 @@ class TestEventEngine(unittest.TestCase):
         ]
         self.assertEqual(self.called_events, expected_calls)
 
+    def test_015unhandled_events(self):
+        """Test handler checks, and that unhandled events are discarded."""
+        self.assertFalse(self.event_engine.has_handlers('begin_step'))
+        self.event_engine.queue_event(StepEvent('begin_step'))
+        self.event_engine.transmit_event('begin_step')
+        self.assertTrue('begin_step' not in self.event_engine.event_queues)
+        self.event_engine.register_event_handler(
+            'begin_step', lambda name: self.event_handler(name, 'hdlr1'))
+        self.assertTrue(self.event_engine.has_handlers('begin_step'))
+        self.event_engine.queue_event(StepEvent('begin_step'))
+        self.event_engine.transmit_event('begin_step')
+        self.assertEqual(self.called_events, ['<StepEvent "begin_step"> hdlr1'])
+
 unittest.main()
 
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Unit test the pygame_maker.support.frame_profiler module.
+"""
+
+import unittest
+import logging
+from pygame_maker.support.frame_profiler import FrameProfiler
+
+FPLOGGER = logging.getLogger("FrameProfiler")
+FPHANDLER = logging.StreamHandler()
+FPFORMATTER = logging.Formatter("%(levelname)s: %(message)s")
+FPHANDLER.setFormatter(FPFORMATTER)
+FPLOGGER.addHandler(FPHANDLER)
+FPLOGGER.setLevel(logging.INFO)
+
+
+class FakeTimer(object):
+    """A timer that only advances when told to."""
+    def __init__(self):
+        self.now = 0.0
+
+    def advance(self, msec):
+        """Move the clock forward by the given number of milliseconds."""
+        self.now += msec / 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestFrameProfiler(unittest.TestCase):
+    """Unit tests for the frame_profiler module."""
+
+    def setUp(self):
+        self.timer = FakeTimer()
+
+    def run_frame(self, profiler, phase_times):
+        """Simulate one frame, spending the given ms in each phase."""
+        profiler.start_frame()
+        for phase, msec in phase_times:
+            self.timer.advance(msec)
+            profiler.mark(phase)
+        profiler.end_frame()
+
+    def test_005disabled_profiler(self):
+        """Test that a disabled profiler collects nothing."""
+        profiler = FrameProfiler(timer=self.timer)
+        self.run_frame(profiler, [("events", 1), ("flip", 2)])
+        self.assertEqual(profiler.frame_count, 0)
+        self.assertEqual(profiler.get_percentiles(), {})
+        self.assertIsNone(profiler.percentile("events", 50))
+
+    def test_010phase_percentiles(self):
+        """Test per-phase and whole frame percentiles."""
+        profiler = FrameProfiler(enabled=True, timer=self.timer)
+        for msec in range(1, 11):
+            self.run_frame(profiler, [("events", msec), ("draw", 2)])
+        self.assertEqual(profiler.frame_count, 10)
+        self.assertAlmostEqual(profiler.percentile("events", 50), 5.0)
+        self.assertAlmostEqual(profiler.percentile("events", 95), 10.0)
+        self.assertAlmostEqual(profiler.percentile("events", 0), 1.0)
+        self.assertAlmostEqual(profiler.percentile("draw", 99), 2.0)
+        self.assertAlmostEqual(profiler.percentile(FrameProfiler.FRAME_TOTAL, 50), 7.0)
+        stats = profiler.get_percentiles([50])
+        self.assertEqual(sorted(stats.keys()), ["draw", "events", "frame"])
+        self.assertAlmostEqual(stats["draw"][50], 2.0)
+
+    def test_015rolling_window(self):
+        """Test that only the most recent frames are kept."""
+        profiler = FrameProfiler(enabled=True, window_size=3, timer=self.timer)
+        for msec in [100, 1, 2, 3]:
+            self.run_frame(profiler, [("motion", msec)])
+        self.assertEqual(len(profiler.samples["motion"]), 3)
+        self.assertAlmostEqual(profiler.percentile("motion", 100), 3.0)
+        profiler.reset()
+        self.assertEqual(profiler.frame_count, 0)
+        self.assertIsNone(profiler.percentile("motion", 50))
+
+    def test_020budget_and_summary(self):
+        """Test over-budget counting and the summary line."""
+        profiler = FrameProfiler(enabled=True, frame_budget_ms=16.0,
+                                 timer=self.timer)
+        self.run_frame(profiler, [("collision", 10)])
+        self.run_frame(profiler, [("collision", 20)])
+        self.assertEqual(profiler.over_budget_count, 1)
+        lines = profiler.summary_lines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("collision: p50=10.00"))
+        self.assertTrue(lines[1].startswith("frame: "))
+        self.assertTrue(profiler.summary_line().endswith("over budget: 1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
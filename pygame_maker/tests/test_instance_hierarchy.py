@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Unit test the pygame_maker.actors.instance_hierarchy module.
+"""
+
+import unittest
+import logging
+import pygame
+from pygame_maker.actors.object_type import CollideableObjectType
+from pygame_maker.actions.action_sequence import ActionSequence
+from pygame_maker.events.event_engine import EventEngine
+from pygame_maker.logic.language_engine import LanguageEngine
+
+IHLOGGER = logging.getLogger("InstanceHierarchy")
+IHHANDLER = logging.StreamHandler()
+IHFORMATTER = logging.Formatter("%(levelname)s: %(message)s")
+IHHANDLER.setFormatter(IHFORMATTER)
+IHLOGGER.addHandler(IHHANDLER)
+IHLOGGER.setLevel(logging.INFO)
+
+
+class MyGameEngine(object):
+    """A minimal game engine, containing only what object types need."""
+    def __init__(self):
+        self.event_engine = EventEngine()
+        self.language_engine = LanguageEngine()
+        self.resources = {'sprites': {}, 'sounds': {}, 'objects': {}}
+        self.queued = []
+        # record each queued event
+        original_queue = self.event_engine.queue_event
+        def queue_event(an_event):
+            self.queued.append((an_event.name, an_event["instance"]))
+            original_queue(an_event)
+        self.event_engine.queue_event = queue_event
+
+
+class TestInstanceHierarchy(unittest.TestCase):
+    """Unit tests for the instance_hierarchy module."""
+
+    def setUp(self):
+        self.game_engine = MyGameEngine()
+        self.parent_type = CollideableObjectType("obj_parent", self.game_engine)
+        self.child_type = CollideableObjectType("obj_child", self.game_engine)
+        # boundary events are only queued for types that handle them
+        for obj_type in (self.parent_type, self.child_type):
+            for ev_name in ("intersect_boundary", "outside_room"):
+                for prefix in ("", "child_", "parent_"):
+                    obj_type[prefix + ev_name] = ActionSequence()
+        self.screen = pygame.Surface((100, 100))
+        # a parent about to touch the right edge, with a child that will
+        #  leave the room, a grandchild left of the room, and a child that
+        #  stays inside
+        self.root = self.parent_type.create_instance(
+            self.screen, {"position": (98, 50), "speed": 2, "direction": 90})
+        self.child = self.child_type.create_instance(
+            self.screen, {"parent": self.root, "position": (15, 0)})
+        self.grandchild = self.child_type.create_instance(
+            self.screen, {"parent": self.child, "position": (-200.5, 2.5)})
+        self.inside_child = self.parent_type.create_instance(
+            self.screen, {"parent": self.root, "position": (-50, 10)})
+        self.game_engine.queued = []
+
+    def test_005flattened_update(self):
+        """Test placing descendants and queuing their boundary events."""
+        self.parent_type.update()
+        hierarchy = self.parent_type.hierarchy
+        self.assertEqual(hierarchy.instances, [self.root, self.child, self.grandchild,
+                                               self.inside_child])
+        self.assertEqual(list(hierarchy.parent_index), [-1, 0, 1, 0])
+        self.assertEqual((self.child.rect.x, self.child.rect.y), (115, 50))
+        self.assertEqual((self.grandchild.rect.x, self.grandchild.rect.y), (-85, 52))
+        self.assertEqual((self.inside_child.rect.x, self.inside_child.rect.y), (50, 60))
+        self.assertEqual(self.game_engine.queued, [
+            ("intersect_boundary", self.root),
+            ("parent_intersect_boundary", self.child),
+            ("outside_room", self.child),
+            ("child_outside_room", self.root),
+            ("parent_outside_room", self.grandchild),
+            ("outside_room", self.grandchild),
+            ("child_outside_room", self.child),
+            ("parent_intersect_boundary", self.inside_child),
+        ])
+
+    def test_010matches_recursive_update(self):
+        """Test that the flattened update matches the recursive one."""
+        self.parent_type.update()
+        batched = self.game_engine.queued[1:]
+        batched_rects = [tuple(inst.rect) for inst in (self.child, self.grandchild,
+                                                      self.inside_child)]
+        self.game_engine.queued = []
+        for inst in (self.child, self.grandchild, self.inside_child):
+            inst.rect.x = 0
+            inst.rect.y = 0
+        #pylint: disable=protected-access
+        self.root._update_child_instances(self.root._detect_boundary_events())
+        #pylint: enable=protected-access
+        self.assertEqual(self.game_engine.queued[1:], batched)
+        self.assertEqual([tuple(inst.rect) for inst in (self.child, self.grandchild,
+                                                       self.inside_child)],
+                         batched_rects)
+
+    def test_015rebuild_on_change(self):
+        """Test that the hierarchy is only rebuilt when it changes."""
+        self.parent_type.update()
+        hierarchy = self.parent_type.hierarchy
+        old_instances = hierarchy.instances
+        self.parent_type.update()
+        self.assertIs(hierarchy.instances, old_instances)
+        self.grandchild.destroy_object(None)
+        self.parent_type.update()
+        self.assertEqual(hierarchy.instances, [self.root, self.child, self.inside_child])
+        # destroying the parent releases the remaining children
+        self.root.destroy_object(None)
+        self.parent_type.update()
+        self.assertEqual(hierarchy.instances, [])
+        self.assertIs(self.child.symbols["parent"], None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Unit test the pygame_maker.actors.instance_lifecycle module.
+"""
+
+import unittest
+import logging
+import pygame
+from pygame_maker.actors.object_type import ManagerObjectType
+from pygame_maker.actors.instance_lifecycle import InstanceLifecycle
+from pygame_maker.events.event_engine import EventEngine
+from pygame_maker.logic.language_engine import LanguageEngine
+
+ILLOGGER = logging.getLogger("InstanceLifecycle")
+ILHANDLER = logging.StreamHandler()
+ILFORMATTER = logging.Formatter("%(levelname)s: %(message)s")
+ILHANDLER.setFormatter(ILFORMATTER)
+ILLOGGER.addHandler(ILHANDLER)
+ILLOGGER.setLevel(logging.INFO)
+
+
+class MyGameEngine(object):
+    """A minimal game engine, containing only what object types need."""
+    def __init__(self):
+        self.event_engine = EventEngine()
+        self.language_engine = LanguageEngine()
+        self.resources = {'sprites': {}, 'sounds': {}, 'objects': {}}
+        self.transmitted = []
+        # record each transmission
+        original_transmit = self.event_engine.transmit_event
+        def transmit_event(event_name):
+            self.transmitted.append(event_name)
+            original_transmit(event_name)
+        self.event_engine.transmit_event = transmit_event
+
+
+class TestInstanceLifecycle(unittest.TestCase):
+    """Unit tests for the instance_lifecycle module."""
+
+    def setUp(self):
+        self.game_engine = MyGameEngine()
+        self.lifecycle = InstanceLifecycle(self.game_engine)
+        self.obj_type = ManagerObjectType("obj_test", self.game_engine)
+        self.screen = pygame.Surface((320, 240))
+        self.received = []
+        for ev_name in ("create", "create_child", "destroy"):
+            self.game_engine.event_engine.register_event_handler(
+                ev_name, lambda ev: self.received.append((ev.name, ev["instance"])))
+
+    def test_005bulk_spawn(self):
+        """Test that bulk creation transmits the create event once."""
+        new_instances = self.lifecycle.spawn(
+            self.screen, [(self.obj_type, {"position": (idx, 0)}) for idx in range(5)])
+        self.assertEqual(len(new_instances), 5)
+        self.assertEqual(self.obj_type.get_instances(), new_instances)
+        self.assertEqual([inst.inst_id for inst in new_instances], list(range(5)))
+        self.assertEqual(self.game_engine.transmitted, ['create'])
+        self.assertEqual(self.received, [('create', inst) for inst in new_instances])
+
+    def test_010queued_creation(self):
+        """Test creation of queued instances, including children."""
+        parent = self.obj_type.create_instance(self.screen)
+        self.received = []
+        self.game_engine.transmitted = []
+        self.lifecycle.queue_create(self.obj_type, {"parent": parent})
+        self.lifecycle.queue_create(self.obj_type)
+        self.assertEqual(len(self.obj_type.get_instances()), 1)
+        new_instances = self.lifecycle.create_queued(self.screen)
+        self.assertEqual(len(new_instances), 2)
+        self.assertEqual(self.lifecycle.create_queue, [])
+        self.assertIs(new_instances[0].symbols["parent"], parent)
+        self.assertEqual(self.game_engine.transmitted, ['create', 'create_child'])
+        self.assertEqual(self.received, [('create', new_instances[0]),
+                                         ('create', new_instances[1]),
+                                         ('create_child', parent)])
+        self.assertEqual(self.lifecycle.create_queued(self.screen), [])
+
+    def test_015bulk_despawn(self):
+        """Test that bulk destruction transmits the destroy event once."""
+        new_instances = self.lifecycle.spawn(
+            self.screen, [(self.obj_type, None) for _ in range(6)])
+        self.received = []
+        self.game_engine.transmitted = []
+        doomed = new_instances[1:5]
+        self.lifecycle.despawn(doomed)
+        # instances already being destroyed are skipped
+        self.lifecycle.despawn(doomed[0:1])
+        self.assertEqual(self.game_engine.transmitted, ['destroy'])
+        self.assertEqual(self.received, [('destroy', inst) for inst in doomed])
+        self.obj_type.update()
+        self.assertEqual(self.obj_type.get_instances(),
+                         [new_instances[0], new_instances[5]])
+
+    def test_020instance_pool(self):
+        """Test that destroyed instances are re-used by pooled types."""
+        pooled_type = ManagerObjectType("obj_pooled", self.game_engine, pool_size=2)
+        first_instances = self.lifecycle.spawn(
+            self.screen, [(pooled_type, {"score": 10}) for _ in range(3)])
+        self.assertEqual(pooled_type.get_pool_stats(),
+                         {"size": 2, "available": 0, "hits": 0, "misses": 3})
+        self.lifecycle.despawn(first_instances)
+        pooled_type.update()
+        self.assertEqual(pooled_type.get_instances(), [])
+        self.assertEqual(len(pooled_type.instance_pool), 2)
+        new_instances = self.lifecycle.spawn(
+            self.screen, [(pooled_type, {"position.x": 5}) for _ in range(3)])
+        self.assertEqual(pooled_type.get_pool_stats(),
+                         {"size": 2, "available": 0, "hits": 2, "misses": 4})
+        self.assertTrue(new_instances[0] in first_instances)
+        self.assertTrue(new_instances[1] in first_instances)
+        self.assertFalse(new_instances[2] in first_instances)
+        self.assertEqual([inst.inst_id for inst in new_instances], [3, 4, 5])
+        for inst in new_instances:
+            # re-used instances start over with fresh symbols
+            self.assertFalse('score' in inst.symbols.keys())
+            self.assertEqual(inst.position.x, 5)
+            self.assertIs(inst.symbols["parent"], None)
+        self.assertEqual(pooled_type.get_instances(), new_instances)
+
+
+if __name__ == "__main__":
+    unittest.main()
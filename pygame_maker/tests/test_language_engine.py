@@ -12,6 +12,7 @@ import math
 import os
 import sys
 import unittest
+from pygame_maker.logic.code_block import ExpressionError
 from pygame_maker.logic.language_engine import LanguageEngine, SymbolTable
 
 CBLOGGER = logging.getLogger("CodeBlock")
@@ -98,6 +99,157 @@ sym4 = 42
         expected_changes = [{'sym1': 24}, {'sym3': 25}, {'sym4': 42}]
         self.assertEqual(self.symbol_change_list, expected_changes)
 
+    def test_020key_pressed(self):
+        """Test the key_pressed() function."""
+        language_engine = LanguageEngine()
+        code_block = """
+a = key_pressed("kb_A")
+b = key_pressed("B")
+if (key_pressed("A")) { c = 5 }
+        """
+        language_engine.register_code_block("testA", code_block)
+        test_locals = SymbolTable()
+        # no pressed key set available yet
+        language_engine.execute_code_block("testA", test_locals)
+        self.assertEqual(test_locals.vars, {'a': 0, 'b': 0})
+        language_engine.global_symbol_table.set_constant('_pressed_keys', set(['kb_A']))
+        test_locals = SymbolTable()
+        language_engine.execute_code_block("testA", test_locals)
+        self.assertEqual(test_locals.vars, {'a': 1, 'b': 0, 'c': 5})
+
+    def test_025shared_defaults(self):
+        """Test symbol tables sharing default values."""
+        defaults = {'speed': 0, 'name': "ship"}
+        table_a = SymbolTable(defaults=defaults)
+        table_b = SymbolTable(defaults=defaults)
+        table_a['speed'] = 5
+        table_a.set_constant('limit', 10)
+        self.assertEqual((table_a['speed'], table_b['speed']), (5, 0))
+        self.assertEqual(table_a['name'], "ship")
+        self.assertEqual(defaults, {'speed': 0, 'name': "ship"})
+        self.assertEqual(table_a.vars, {'speed': 5})
+        self.assertEqual(sorted(table_a.keys()), ['limit', 'name', 'speed'])
+        # copies of the table include the defaults
+        self.assertEqual(SymbolTable(table_b).vars, defaults)
+
+    def test_030shared_compiled_blocks(self):
+        """Test that handles with the same source share one compiled code block."""
+        language_engine = LanguageEngine()
+        language_engine.register_code_block("instA", "speed = speed + 1")
+        language_engine.register_code_block("instB", "speed = speed + 1")
+        language_engine.register_code_block("other", "speed = 0")
+        code_blocks = language_engine.code_blocks
+        self.assertIs(code_blocks["instA"], code_blocks["instB"])
+        self.assertIsNot(code_blocks["instA"], code_blocks["other"])
+        self.assertEqual(len(language_engine.compiled_blocks), 2)
+        shared_block = code_blocks["instA"]
+        language_engine.unregister_code_block("instA")
+        inst_locals = SymbolTable({"speed": 1})
+        language_engine.execute_code_block("instB", inst_locals)
+        self.assertEqual(inst_locals["speed"], 2)
+        # the compiled block is released with its last handle, but kept for
+        #  re-use
+        language_engine.unregister_code_block("instB")
+        self.assertEqual(len(language_engine.compiled_blocks), 1)
+        language_engine.register_code_block("instC", "speed = speed + 1")
+        self.assertIs(code_blocks["instC"], shared_block)
+        language_engine.unregister_code_block("instC")
+        for block_num in range(LanguageEngine.RELEASED_BLOCK_LIMIT):
+            language_engine.register_code_block("temp", "x = {}".format(block_num))
+            language_engine.unregister_code_block("temp")
+        language_engine.register_code_block("instD", "speed = speed + 1")
+        self.assertIsNot(code_blocks["instD"], shared_block)
+
+    def test_035scoped_symbols(self):
+        """Test a symbol table layered over another one."""
+        instance_table = SymbolTable({'speed': 3, 'name': "ship"},
+                                     defaults={'friction': 0})
+        instance_table.set_constant('limit', 10)
+        scope = SymbolTable(sym_change_callback=self.sym_change_callback,
+                            defaults=instance_table)
+        scope.set_constant('self', "inst")
+        self.assertTrue('friction' in scope and 'limit' in scope and 'self' in scope)
+        self.assertFalse('self' in instance_table or 'unknown' in scope)
+        self.assertEqual(sorted(scope.keys()), ['friction', 'limit', 'name', 'self', 'speed'])
+        # symbols are read through the scope, so later changes show up
+        instance_table['speed'] = 4
+        self.assertEqual(scope['speed'], 4)
+        language_engine = LanguageEngine()
+        language_engine.register_code_block("testA", """
+speed = speed + 1
+name = "ship"
+friction = 0.5
+        """)
+        language_engine.execute_code_block("testA", scope)
+        # assignments stay in the scope, and setting a symbol to the value
+        #  it already has isn't reported
+        self.assertEqual(scope.vars, {'speed': 5, 'name': "ship", 'friction': 0.5})
+        self.assertEqual(instance_table.vars, {'speed': 4, 'name': "ship"})
+        self.assertEqual(self.symbol_change_list, [{'speed': 5}, {'friction': 0.5}])
+
+    def test_040expressions(self):
+        """Test compiling and evaluating expressions."""
+        language_engine = LanguageEngine()
+        language_engine.global_symbol_table['level'] = 2
+        speed_expression = language_engine.get_expression("base_speed * level + pi")
+        self.assertIs(language_engine.get_expression("base_speed * level + pi"),
+                      speed_expression)
+        self.assertEqual(len(language_engine.expressions), 1)
+        # symbols are read straight from the tables, which are left unchanged
+        instance_table = SymbolTable({'base_speed': 3, 'level': 1},
+                                     sym_change_callback=self.sym_change_callback)
+        self.assertEqual(speed_expression(instance_table, language_engine.global_symbol_table),
+                         3 + math.pi)
+        self.assertEqual(speed_expression(SymbolTable(), language_engine.global_symbol_table),
+                         SymbolTable.DEFAULT_UNINITIALIZED_VALUE * 2 + math.pi)
+        self.assertEqual(instance_table.vars, {'base_speed': 3, 'level': 1})
+        self.assertEqual(self.symbol_change_list, [])
+        self.assertEqual(language_engine.code_blocks, {})
+        distance_expression = language_engine.get_expression("distance(x, 10) > 5")
+        self.assertIs(distance_expression(SymbolTable({'x': 3}), SymbolTable()), True)
+        self.assertEqual(language_engine.get_expression('"ship"')(SymbolTable(), SymbolTable()),
+                         "ship")
+        with self.assertRaises(ExpressionError):
+            language_engine.get_expression("x\ny = 2")
+
+    def test_045execution_budget(self):
+        """Test that code blocks going over their step budget are stopped."""
+        language_engine = LanguageEngine()
+        language_engine.register_code_block("fanout", """
+function fan(number depth) {
+    if (depth > 0) {
+        a = fan(depth - 1)
+        b = fan(depth - 1)
+    }
+    return depth
+}
+x = 1
+y = fan(depth)
+z = 2
+        """)
+        budget = language_engine.budget
+        # run() charges its 3 lines, and each of the 7 calls to fan() its 4
+        language_engine.execute_code_block("fanout", SymbolTable({'depth': 2}))
+        self.assertEqual((budget.frame_steps, budget.block_steps), (31, {'fanout': 31}))
+        budget.step_limit = 1000
+        deep_table = SymbolTable({'depth': 20})
+        language_engine.execute_code_block("fanout", deep_table)
+        # the code block stopped partway through
+        self.assertEqual(deep_table['x'], 1)
+        self.assertNotIn('z', deep_table)
+        self.assertEqual(budget.over_budget, ['fanout'])
+        self.assertEqual(budget.block_steps['fanout'], 31 + 1003)
+        self.assertEqual((budget.block_name, budget.steps), (None, 0))
+        language_engine.start_frame()
+        self.assertEqual((budget.frame_steps, budget.block_steps, budget.over_budget),
+                         (0, {}, []))
+        # the frame limit stops every code block once it's reached
+        budget.frame_step_limit = 40
+        for _ in range(2):
+            language_engine.execute_code_block("fanout", SymbolTable({'depth': 2}))
+        self.assertEqual(budget.over_budget, ['fanout'])
+        self.assertEqual(budget.frame_steps, 42)
+
 # run from the tests directory to find the unittest_files subdirectory
 os.chdir(os.path.dirname(os.path.abspath(sys.argv[0])))
 
@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Unit test the pygame_maker.actors.motion module.
+"""
+
+import unittest
+import logging
+import numpy as np
+import pygame
+from pygame_maker.actors.motion import MotionArrays
+from pygame_maker.actors.object_type import CollideableObjectType
+from pygame_maker.actions.action import Action
+from pygame_maker.actions.action_sequence import ActionSequence
+from pygame_maker.events.event import StepEvent
+from pygame_maker.events.event_engine import EventEngine
+from pygame_maker.logic.language_engine import LanguageEngine
+
+MALOGGER = logging.getLogger("MotionArrays")
+MAHANDLER = logging.StreamHandler()
+MAFORMATTER = logging.Formatter("%(levelname)s: %(message)s")
+MAHANDLER.setFormatter(MAFORMATTER)
+MALOGGER.addHandler(MAHANDLER)
+MALOGGER.setLevel(logging.INFO)
+
+
+class MyGameEngine(object):
+    """A minimal game engine, containing only what object types need."""
+    GAME_ENGINE_ACTIONS = []
+
+    def __init__(self):
+        self.event_engine = EventEngine()
+        self.language_engine = LanguageEngine()
+        self.resources = {'sprites': {}, 'sounds': {}, 'objects': {}}
+
+
+class TestMotion(unittest.TestCase):
+    """Unit tests for the motion module."""
+
+    def setUp(self):
+        self.game_engine = MyGameEngine()
+        self.obj_type = CollideableObjectType("obj_test", self.game_engine)
+        self.screen = pygame.Surface((100, 100))
+        self.received = []
+        for ev_name in ("intersect_boundary", "outside_room"):
+            # boundary events are only sent to types that handle them
+            self.obj_type[ev_name] = ActionSequence()
+            self.game_engine.event_engine.register_event_handler(
+                ev_name, lambda ev: self.received.append((ev.name, ev["instance"])))
+
+    def test_005slot_allocation(self):
+        """Test slot allocation, release, re-use and growth."""
+        motion_arrays = MotionArrays(capacity=2)
+        owners = [object() for _ in range(3)]
+        slots = [motion_arrays.allocate(owner) for owner in owners]
+        self.assertEqual(slots, [0, 1, 2])
+        self.assertEqual(motion_arrays.capacity, 4)
+        self.assertIs(motion_arrays.instances[2], owners[2])
+        motion_arrays.fields["speed"][1] = 3.0
+        motion_arrays.release(1)
+        self.assertEqual(list(motion_arrays.get_live_mask()), [True, False, True])
+        self.assertEqual(list(motion_arrays.get_live_mask([2])), [True, False, False])
+        # released slots are re-used, with their fields cleared
+        self.assertEqual(motion_arrays.allocate(owners[1]), 1)
+        self.assertEqual(motion_arrays.fields["speed"][1], 0.0)
+
+    def test_010instance_views(self):
+        """Test that instance motion symbols are views into the arrays."""
+        inst = self.obj_type.create_instance(self.screen, {"position": (10, 20)})
+        slot = inst.motion_slot
+        fields = self.obj_type.motion.fields
+        inst.speed = 2.0
+        inst.direction = 90.0
+        self.assertAlmostEqual(fields["hspeed"][slot], 2.0)
+        self.assertAlmostEqual(inst.symbols["hspeed"], 2.0)
+        fields["x"][slot] = 15.0
+        self.assertEqual(inst.position.x, 15.0)
+        self.assertEqual(inst.symbols["position.x"], 15.0)
+        inst.symbols["friction"] = 0.5
+        self.assertEqual(inst.friction, 0.5)
+        self.assertTrue("position.y" in inst.symbols.keys())
+
+    def test_015batched_motion(self):
+        """Test moving all instances at once, with boundary events."""
+        inside = self.obj_type.create_instance(self.screen, {"position": (50, 50)})
+        leaving = self.obj_type.create_instance(self.screen, {"position": (99, 50)})
+        doomed = self.obj_type.create_instance(self.screen, {"position": (50, 50)})
+        for inst in (inside, leaving, doomed):
+            inst.speed = 2
+            inst.direction = 90.0
+        doomed.destroy_object(None)
+        self.obj_type.update()
+        self.assertEqual((inside.rect.x, inside.rect.y), (52, 50))
+        self.assertEqual(leaving.rect.x, 101)
+        # destroyed instances aren't moved
+        self.assertEqual(doomed.position.x, 50.0)
+        self.assertEqual(self.received, [("outside_room", leaving)])
+        self.received = []
+        leaving.speed = 0
+        inside.position = (102, 50)
+        inside.direction = 270.0
+        self.obj_type.update()
+        self.assertEqual(self.received, [("intersect_boundary", inside)])
+
+    def test_020friction(self):
+        """Test that friction slows instances down for the next update."""
+        inst = self.obj_type.create_instance(self.screen, {"position": (10, 10)})
+        inst.speed = 1.5
+        inst.direction = 180.0
+        inst.friction = 1.0
+        self.obj_type.update()
+        self.assertAlmostEqual(inst.position.y, 11.5)
+        self.assertAlmostEqual(inst.speed, 0.5)
+        self.assertAlmostEqual(inst.vspeed, 0.5)
+        self.obj_type.update()
+        self.obj_type.update()
+        self.assertAlmostEqual(inst.speed, 0.0)
+        self.assertAlmostEqual(inst.position.y, 12.0)
+
+    def test_025removed_instance(self):
+        """Test that removed instances release their slot."""
+        inst = self.obj_type.create_instance(self.screen, {"position": (30, 40), "speed": 1})
+        slot = inst.motion_slot
+        inst.destroy_object(None)
+        self.obj_type.update()
+        self.assertFalse(self.obj_type.motion.in_use[slot])
+        # the removed instance keeps its own copy of its motion state
+        self.assertEqual(inst.position.x, 30.0)
+        self.assertEqual(inst.speed, 1.0)
+        new_inst = self.obj_type.create_instance(self.screen, {"position": (5, 5)})
+        self.assertEqual(new_inst.motion_slot, slot)
+        self.assertEqual(inst.position.x, 30.0)
+
+    def test_030gravity(self):
+        """Test gravity, using the object type's default forces."""
+        kwargs = CollideableObjectType.gen_kwargs_from_yaml_obj(
+            "obj_falling", {"gravity": 0.5, "gravity_direction": 180, "friction": 0.1},
+            self.game_engine)
+        falling_type = CollideableObjectType("obj_falling", self.game_engine, **kwargs)
+        self.assertEqual((falling_type.gravity, falling_type.gravity_direction,
+                          falling_type.friction), (0.5, 180.0, 0.1))
+        inst = falling_type.create_instance(self.screen, {"position": (10, 10),
+                                                          "friction": 0.0})
+        self.assertEqual((inst.gravity, inst.friction), (0.5, 0.0))
+        falling_type.update()
+        # gravity changes the speed for the next update
+        self.assertEqual(inst.position.y, 10.0)
+        self.assertAlmostEqual(inst.speed, 0.5)
+        self.assertAlmostEqual(inst.direction, 180.0)
+        self.assertAlmostEqual(inst.vspeed, 0.5)
+        falling_type.update()
+        self.assertAlmostEqual(inst.position.y, 10.5)
+        self.assertAlmostEqual(inst.speed, 1.0)
+        # sideways motion curves toward the gravity direction
+        inst.speed = 1.0
+        inst.direction = 90.0
+        falling_type.update()
+        self.assertAlmostEqual(inst.hspeed, 1.0)
+        self.assertAlmostEqual(inst.vspeed, 0.5)
+        self.assertAlmostEqual(inst.direction, 116.565, places=3)
+        # the single instance update matches the batched one
+        inst.update()
+        self.assertAlmostEqual(inst.vspeed, 1.0)
+        self.assertAlmostEqual(inst.direction, 135.0)
+
+    def test_035lazy_rect_sync(self):
+        """Test that position changes reach the rect on the next update or draw."""
+        inst = self.obj_type.create_instance(self.screen, {"position": (10, 20)})
+        self.obj_type.update()
+        self.assertEqual((inst.rect.x, inst.rect.y), (10, 20))
+        inst.position.x = 30.4
+        inst.position.x += 1.0
+        inst.position.y = 40.6
+        # the symbols see the change immediately, but the rect waits
+        self.assertAlmostEqual(inst.symbols["position.x"], 31.4)
+        self.assertEqual((inst.rect.x, inst.rect.y), (10, 20))
+        self.obj_type.update()
+        self.assertEqual((inst.rect.x, inst.rect.y), (31, 41))
+        inst.symbols["position.y"] = 5.0
+        self.obj_type.sync_rects()
+        self.assertEqual(inst.rect.y, 5)
+        # a single instance can bring its own rect up to date
+        inst.position = (60, 70)
+        inst.sync_rect()
+        self.assertEqual((inst.rect.x, inst.rect.y), (60, 70))
+        self.assertEqual(len(self.obj_type.motion.take_dirty_root_slots(
+            self.obj_type.motion.get_live_mask())), 0)
+
+    def test_040boundary_codes(self):
+        """Test classifying instances against the room boundaries."""
+        motion_arrays = MotionArrays()
+        slots = []
+        for _ in range(5):
+            slot = motion_arrays.allocate(object())
+            for field, value in (("width", 2), ("height", 10), ("screen_width", 100),
+                                 ("screen_height", 100)):
+                motion_arrays.fields[field][slot] = value
+            slots.append(slot)
+        # inside, crossing the bottom edge (taller than wide), crossing the
+        #  left edge, below the room, and right of the room
+        codes = motion_arrays.get_boundary_codes(
+            np.array(slots), np.array([50.0, 50.0, -1.0, 50.0, 101.0]),
+            np.array([50.0, 95.0, 50.0, 101.0, 50.0]))
+        self.assertEqual(list(codes), [MotionArrays.NO_BOUNDARY,
+                                       MotionArrays.INTERSECT_BOUNDARY,
+                                       MotionArrays.INTERSECT_BOUNDARY,
+                                       MotionArrays.OUTSIDE_ROOM,
+                                       MotionArrays.OUTSIDE_ROOM])
+
+    def test_045boundary_event_modes(self):
+        """
+        Test sending boundary events only on transitions, and only to types
+        that handle them.
+        """
+        kwargs = CollideableObjectType.gen_kwargs_from_yaml_obj(
+            "obj_edge", {"boundary_events": "transition"}, self.game_engine)
+        edge_type = CollideableObjectType("obj_edge", self.game_engine, **kwargs)
+        for ev_name in ("intersect_boundary", "outside_room"):
+            edge_type[ev_name] = ActionSequence()
+        self.assertEqual(edge_type.boundary_events, "transition")
+        inst = edge_type.create_instance(self.screen, {"position": (96, 50)})
+        inst.speed = 2
+        inst.direction = 90.0
+        for _ in range(4):
+            edge_type.update()
+        inst.direction = 270.0
+        for _ in range(3):
+            edge_type.update()
+        self.assertEqual([name for name, _ in self.received],
+                         ["intersect_boundary", "outside_room", "intersect_boundary"])
+        # types without boundary event handlers queue nothing
+        quiet_type = CollideableObjectType("obj_quiet", self.game_engine)
+        quiet_inst = quiet_type.create_instance(self.screen, {"position": (150, 50)})
+        quiet_inst.speed = 1
+        queued = []
+        original_queue = self.game_engine.event_engine.queue_event
+        self.game_engine.event_engine.queue_event = queued.append
+        quiet_type.update()
+        self.game_engine.event_engine.queue_event = original_queue
+        self.assertEqual(queued, [])
+
+    def make_step_type(self, name, code, batch=True):
+        """
+        Create an object type running a code block in its step event, with
+        instances lined up along the X axis.
+        """
+        step_type = CollideableObjectType(name, self.game_engine)
+        if not batch:
+            step_type.BATCH_MIN_INSTANCES = 1000
+        sequence = ActionSequence()
+        sequence.append_action(Action.get_action_instance_by_name(
+            "execute_code", code=code, apply_to="self"))
+        step_type["normal_step"] = sequence
+        for inst_num in range(10):
+            inst = step_type.create_instance(self.screen, {"position": (inst_num * 10, 20)})
+            inst.speed = inst_num % 4
+            inst.direction = 45.0 * inst_num
+        return step_type
+
+    def test_050batched_step_code(self):
+        """
+        Test that step event code blocks run for all instances at once have
+        the same results as running them for each instance.
+        """
+        self.game_engine.language_engine.global_symbol_table["push"] = 0.5
+        code = ("speed = speed + push\n"
+                "if (position.x > 50) {\n"
+                "  direction = 90\n"
+                "} elseif (speed > 2) {\n"
+                "  hspeed = hspeed * 2\n"
+                "  position.y = position.y + vspeed\n"
+                "} else {\n"
+                "  gravity_direction = direction - 450\n"
+                "}\n")
+        batch_type = self.make_step_type("obj_batch", code)
+        single_type = self.make_step_type("obj_single", code, batch=False)
+        for _ in range(2):
+            batch_type.handle_step_event(StepEvent("normal_step"))
+            single_type.handle_step_event(StepEvent("normal_step"))
+        count = batch_type.motion.slot_count
+        for field in MotionArrays.FIELDS:
+            self.assertTrue(np.array_equal(batch_type.motion.fields[field][:count],
+                                           single_type.motion.fields[field][:count]),
+                            field)
+        self.assertTrue(np.array_equal(batch_type.motion.rect_dirty[:count],
+                                       single_type.motion.rect_dirty[:count]))
+        an_action = batch_type["normal_step"].main_block.contained_statements[0].action
+        self.assertIsNot(self.game_engine.language_engine.get_batch_code(
+            an_action["language_engine_handle"]), None)
+        inst = batch_type.get_instances()[9]
+        self.assertAlmostEqual(inst.speed, 2.0)
+        self.assertAlmostEqual(inst.hspeed, 2.0)
+
+    def test_055batch_fallbacks(self):
+        """
+        Test that code blocks run for each instance when they can't run for
+        all instances at once.
+        """
+        language_engine = self.game_engine.language_engine
+        language_engine.global_symbol_table["push"] = 2
+        # an instance's own symbol hides the global symbol
+        shadow_type = self.make_step_type("obj_shadow", "speed = push")
+        shadow_type.get_instances()[3].symbols["push"] = 5
+        shadow_type.handle_step_event(StepEvent("normal_step"))
+        self.assertEqual([inst.speed for inst in shadow_type.get_instances()[2:5]],
+                         [2.0, 5.0, 2.0])
+        # code blocks calling functions never run in batches
+        call_type = self.make_step_type("obj_call", "speed = distance(direction, 400)")
+        call_type.handle_step_event(StepEvent("normal_step"))
+        self.assertEqual(call_type.get_instances()[1].speed, 355.0)
+        # dividing by zero for one instance leaves the motion arrays as they
+        #  were, then reports the error from that instance's code block
+        divide_type = self.make_step_type("obj_divide", "speed = 10 / (position.x - 0)")
+        speeds = divide_type.motion.fields["speed"][:divide_type.motion.slot_count].copy()
+        with self.assertRaises(ZeroDivisionError):
+            divide_type.handle_step_event(StepEvent("normal_step"))
+        self.assertTrue(np.array_equal(
+            divide_type.motion.fields["speed"][:divide_type.motion.slot_count], speeds))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,6 +13,9 @@ import sys
 import os
 import pygame
 from pygame_maker.actors.object_sprite import ObjectSprite, ObjectSpriteException
+from pygame_maker.actors.object_type import CollideableObjectType
+from pygame_maker.events.event_engine import EventEngine
+from pygame_maker.logic.language_engine import LanguageEngine
 
 
 class DummyGameEngine(object):
@@ -200,6 +203,78 @@ class TestSprite(unittest.TestCase):
         os.unlink(tmpf_info[1])
         self.assertEqual(self.good_sprite, new_sprite)
 
+    def test_035shared_subimages(self):
+        """
+        Test that instances share their sprite's subimages, until one needs
+        its own copy.
+        """
+        self.game_engine.event_engine = EventEngine()
+        self.game_engine.language_engine = LanguageEngine()
+        sprite_strip = ObjectSprite("spr_strip", filename="unittest_files/spaceship_strip07.png")
+        self.game_engine.resources = {'sprites': {'spr_strip': sprite_strip}, 'sounds': {},
+                                      'objects': {}}
+        obj_type = CollideableObjectType("obj_ship", self.game_engine, sprite="spr_strip")
+        screen = pygame.Surface((640, 480))
+        ship_a = obj_type.create_instance(screen)
+        ship_b = obj_type.create_instance(screen)
+        self.assertIs(ship_a.image, sprite_strip.subimages[0])
+        self.assertIs(ship_b.image, ship_a.image)
+        ship_a.subimage_number = 3
+        self.assertIs(ship_a.image, sprite_strip.subimages[3])
+        # changing pixels needs a private copy
+        own_image = ship_a.get_own_image()
+        self.assertIsNot(own_image, sprite_strip.subimages[3])
+        self.assertIs(ship_a.get_own_image(), own_image)
+        own_image.fill((255, 0, 0))
+        self.assertNotEqual(sprite_strip.subimages[3].get_at((0, 0)), (255, 0, 0, 255))
+        # switching subimages goes back to the shared ones
+        ship_a.subimage_number = 4
+        self.assertIs(ship_a.image, sprite_strip.subimages[4])
+        self.assertFalse(ship_a.owns_image)
+
+    def test_040animation(self):
+        """
+        Test advancing the animation of every instance at once, with the
+        frame timing and frame sequence set by the object type.
+        """
+        self.game_engine.event_engine = EventEngine()
+        self.game_engine.language_engine = LanguageEngine()
+        sprite_strip = ObjectSprite("spr_strip", filename="unittest_files/spaceship_strip07.png")
+        self.game_engine.resources = {'sprites': {'spr_strip': sprite_strip}, 'sounds': {},
+                                      'objects': {}}
+        obj_yaml = """
+CollideableObjectType:
+  - obj_ship:
+      sprite: spr_strip
+      image_speed: 0.5
+      animation_frames: [2, 4, 6]
+"""
+        obj_type = CollideableObjectType.load_from_yaml(obj_yaml, self.game_engine)[0]
+        self.assertEqual(obj_type.image_speed, 0.5)
+        self.assertEqual(obj_type.animation_frames, [2, 4, 6])
+        queued = []
+        original_queue = self.game_engine.event_engine.queue_event
+        def queue_event(an_event):
+            if an_event.name == "animation_end":
+                queued.append(an_event["instance"])
+            original_queue(an_event)
+        self.game_engine.event_engine.queue_event = queue_event
+        screen = pygame.Surface((640, 480))
+        ship_a = obj_type.create_instance(screen)
+        ship_b = obj_type.create_instance(screen, {"image_speed": -1})
+        still_ship = obj_type.create_instance(screen, {"image_speed": 0})
+        self.assertIs(ship_a.image, sprite_strip.subimages[2])
+        shown = []
+        for _ in range(6):
+            obj_type.update()
+            shown.append((ship_a.subimage_number, ship_b.subimage_number))
+        self.assertEqual(shown, [(2, 6), (4, 4), (4, 2), (6, 6), (6, 4), (2, 2)])
+        self.assertIs(ship_a.image, sprite_strip.subimages[2])
+        self.assertEqual(still_ship.subimage_number, 2)
+        # the backward animation ends each time it passes the first frame
+        self.assertEqual(queued, [ship_b, ship_b, ship_a])
+        self.assertIn("image_speed: 0.5", obj_type.to_yaml())
+
 # run from the tests directory to find the unittest_files subdirectory
 os.chdir(os.path.dirname(os.path.abspath(sys.argv[0])))
 
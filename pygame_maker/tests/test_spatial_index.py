@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Author: Ron Lockwood-Childs
+
+Licensed under LGPL v2.1 (see file COPYING for details)
+
+Unit test the pygame_maker.actors.spatial_index module.
+"""
+
+import unittest
+import logging
+import pygame
+from pygame_maker.actors.object_type import CollideableObjectType, ManagerObjectType
+from pygame_maker.actors.spatial_index import SpatialIndex
+from pygame_maker.events.event_engine import EventEngine
+from pygame_maker.logic.language_engine import LanguageEngine, SymbolTable
+
+SILOGGER = logging.getLogger("SpatialGrid")
+SIHANDLER = logging.StreamHandler()
+SIFORMATTER = logging.Formatter("%(levelname)s: %(message)s")
+SIHANDLER.setFormatter(SIFORMATTER)
+SILOGGER.addHandler(SIHANDLER)
+SILOGGER.setLevel(logging.INFO)
+
+
+class MyGameEngine(object):
+    """A minimal game engine, containing only what object types need."""
+    def __init__(self):
+        self.event_engine = EventEngine()
+        self.language_engine = LanguageEngine()
+        self.resources = {'sprites': {}, 'sounds': {}, 'objects': {}}
+
+
+class TestSpatialIndex(unittest.TestCase):
+    """Unit tests for the spatial_index module."""
+
+    def setUp(self):
+        self.game_engine = MyGameEngine()
+        self.obj_type = CollideableObjectType("obj_test", self.game_engine)
+        self.game_engine.resources['objects']['obj_test'] = self.obj_type
+        self.game_engine.resources['objects']['obj_manager'] = ManagerObjectType(
+            "obj_manager", self.game_engine)
+        self.spatial_index = SpatialIndex(self.game_engine)
+        self.screen = pygame.Surface((640, 480))
+        # instances without an image cover the single pixel at their
+        #  position, so their centers are half a pixel further on
+        self.positions = [(10, 10), (100, 20), (300, 300), (-200, 50), (610, 470)]
+        self.instances = [self.obj_type.create_instance(self.screen, {"position": pos})
+                          for pos in self.positions]
+
+    def test_005instances_in_rect(self):
+        """Test finding the instances inside a rectangle."""
+        found = self.spatial_index.instances_in_rect(pygame.Rect(0, 0, 101, 50))
+        self.assertEqual(set(found), set(self.instances[0:2]))
+        self.assertEqual(self.spatial_index.instances_in_rect((-500, -500, 100, 100)), [])
+        self.assertEqual(self.spatial_index.instances_in_rect((600, 460, 20, 20),
+                                                              ["obj_test"]),
+                         [self.instances[4]])
+
+    def test_010instances_within(self):
+        """Test finding the instances within a radius."""
+        found = self.spatial_index.instances_within((300.5, 300.5), 0)
+        self.assertEqual(found, [self.instances[2]])
+        found = self.spatial_index.instances_within((55.5, 15.5), 46)
+        self.assertEqual(set(found), set(self.instances[0:2]))
+        self.assertEqual(self.spatial_index.instances_within((55.5, 15.5), 44), [])
+
+    def test_015nearest(self):
+        """Test finding the closest instance, near and far from the point."""
+        self.assertIs(self.spatial_index.nearest("obj_test", (0, 0)), self.instances[0])
+        self.assertIs(self.spatial_index.nearest("obj_test", (-1000, 40)), self.instances[3])
+        self.assertIs(self.spatial_index.nearest("obj_test", (5000, 5000)),
+                      self.instances[4])
+        # types without a grid, or unknown types, have no nearest instance
+        self.assertIs(self.spatial_index.nearest("obj_manager", (0, 0)), None)
+        self.assertIs(self.spatial_index.nearest("obj_unknown", (0, 0)), None)
+
+    def test_020follows_motion(self):
+        """Test that the grid follows moved and removed instances."""
+        grid = self.obj_type.spatial_grid
+        self.assertEqual(len(grid), 5)
+        self.instances[0].speed = 5
+        self.instances[0].direction = 90
+        self.obj_type.update()
+        self.assertEqual(self.spatial_index.instances_within((15.5, 10.5), 0),
+                         [self.instances[0]])
+        self.instances[1].position = (400, 400)
+        self.assertIs(self.spatial_index.nearest("obj_test", (390, 390)), self.instances[1])
+        self.instances[2].destroy_object(None)
+        self.obj_type.update()
+        self.assertEqual(len(grid), 4)
+        self.assertIs(self.spatial_index.nearest("obj_test", (300, 300)), self.instances[1])
+
+    def test_025language_functions(self):
+        """Test the nearest_instance() and count_in_radius() functions."""
+        language_engine = self.game_engine.language_engine
+        language_engine.register_code_block("testA", """
+a = nearest_instance("obj_test", 290, 280)
+b = count_in_radius("obj_test", 50, 15, 100)
+c = nearest_instance("obj_unknown", 0, 0)
+        """)
+        test_locals = SymbolTable()
+        # no spatial index available yet
+        language_engine.execute_code_block("testA", test_locals)
+        self.assertEqual(test_locals.vars, {'a': -1, 'b': 0, 'c': -1})
+        language_engine.global_symbol_table.set_constant('_spatial_index',
+                                                         self.spatial_index)
+        test_locals = SymbolTable()
+        language_engine.execute_code_block("testA", test_locals)
+        self.assertEqual(test_locals.vars, {'a': self.instances[2].inst_id, 'b': 2, 'c': -1})
+
+
+if __name__ == "__main__":
+    unittest.main()